@@ -0,0 +1,81 @@
+"""
+Wysyłka e-maili przez kolejkę zadań.
+
+EMAIL_BACKEND = "apps.jobs.mail.QueuedEmailBackend" sprawia, że każde
+send_mail() / EmailMessage.send() (także resety hasła z djoser) tylko
+zapisuje zadanie, a połączenie SMTP nawiązuje worker - backendem
+z ustawienia JOBS_EMAIL_BACKEND.
+"""
+
+import base64
+
+from django.conf import settings
+from django.core.mail import EmailMessage, EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .queue import job
+
+DEFAULT_DELIVERY_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+
+
+def serialize_message(message):
+    attachments = []
+    for attachment in message.attachments:
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        elif not isinstance(content, bytes):
+            # Załącznik MIMEBase - do kolejki trafia jego zakodowana postać
+            content = content.as_bytes()
+            filename, mimetype = filename or "attachment.eml", "message/rfc822"
+        attachments.append([filename, base64.b64encode(content).decode(), mimetype])
+    return {
+        "subject": message.subject,
+        "body": message.body,
+        "from_email": message.from_email,
+        "to": list(message.to),
+        "cc": list(message.cc),
+        "bcc": list(message.bcc),
+        "reply_to": list(message.reply_to),
+        "headers": dict(message.extra_headers),
+        "content_subtype": message.content_subtype,
+        "alternatives": [list(alternative) for alternative in getattr(message, "alternatives", [])],
+        "attachments": attachments,
+    }
+
+
+def deserialize_message(data, connection=None):
+    message = EmailMultiAlternatives(
+        subject=data["subject"],
+        body=data["body"],
+        from_email=data["from_email"],
+        to=data["to"],
+        cc=data["cc"],
+        bcc=data["bcc"],
+        reply_to=data["reply_to"],
+        headers=data["headers"],
+        alternatives=[tuple(alternative) for alternative in data["alternatives"]],
+        connection=connection,
+    )
+    message.content_subtype = data["content_subtype"]
+    for filename, content, mimetype in data["attachments"]:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+@job(queue="default", max_attempts=8)
+def send_email(data):
+    backend = getattr(settings, "JOBS_EMAIL_BACKEND", DEFAULT_DELIVERY_BACKEND)
+    with get_connection(backend, fail_silently=False) as connection:
+        deserialize_message(data, connection).send()
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        queued = 0
+        for message in email_messages:
+            if not isinstance(message, EmailMessage) or not message.recipients():
+                continue
+            send_email.delay(serialize_message(message))
+            queued += 1
+        return queued
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs.models import DeadJob
+
+
+class Command(BaseCommand):
+    help = "Przenosi zadania z DeadJob z powrotem do kolejki."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--id", type=int, action="append", dest="ids", help="ID zadania (wielokrotnie)")
+        parser.add_argument("--name", help="Tylko zadania o tej nazwie")
+
+    def handle(self, *args, ids=None, name=None, **options):
+        dead = DeadJob.objects.order_by("id")
+        if ids:
+            dead = dead.filter(pk__in=ids)
+        if name:
+            dead = dead.filter(name=name)
+
+        requeued = 0
+        for dead_job in dead:
+            dead_job.requeue()
+            requeued += 1
+        self.stdout.write(self.style.SUCCESS(f"Ponownie w kolejce: {requeued}"))
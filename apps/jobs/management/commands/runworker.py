@@ -0,0 +1,55 @@
+import signal
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+
+from apps.jobs.process import run_process
+from apps.jobs.queue import get_config
+from apps.jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Uruchamia workery kolejki zadań (apps.jobs): N procesów po M wątków."
+
+    def add_arguments(self, parser):
+        config = get_config()
+        parser.add_argument("--processes", type=int, default=config["PROCESSES"])
+        parser.add_argument("--threads", type=int, default=config["THREADS"])
+        parser.add_argument(
+            "--queue", action="append", dest="queues", help=f"Kolejka (wielokrotnie), domyślnie {config['QUEUES']}"
+        )
+        parser.add_argument("--poll-interval", type=float, default=config["POLL_INTERVAL"])
+        parser.add_argument("--burst", action="store_true", help="Zakończ, gdy kolejka jest pusta")
+
+    def handle(self, *args, processes, threads, queues, poll_interval, burst, **options):
+        queues = queues or get_config()["QUEUES"]
+        self.stdout.write(f"Worker: {processes} proc. x {threads} wątków, kolejki: {', '.join(queues)}")
+
+        if processes <= 1:
+            processed = Worker(queues, threads, poll_interval, burst, stdout=self.stdout).run()
+            self.stdout.write(self.style.SUCCESS(f"Zakończono, wykonano zadań: {processed}"))
+            return
+
+        # spawn: procesy potomne zestawiają własne połączenia z bazą
+        context = get_context("spawn")
+        children = [
+            context.Process(target=run_process, args=(queues, threads, poll_interval, burst), daemon=False)
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def forward(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for child in children:
+            child.join()
+        failed = sum(1 for child in children if child.exitcode)
+        if failed:
+            self.stdout.write(self.style.ERROR(f"Procesy zakończone błędem: {failed}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Zakończono"))
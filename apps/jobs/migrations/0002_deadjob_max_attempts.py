@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deadjob',
+            name='max_attempts',
+            field=models.PositiveIntegerField(default=5),
+        ),
+    ]
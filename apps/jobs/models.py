@@ -0,0 +1,68 @@
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Zadanie w kolejce. Wykonane zadania są usuwane, te które wyczerpały
+    próby - przenoszone do DeadJob.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    STATUS_CHOICES = [
+        (QUEUED, "W kolejce"),
+        (RUNNING, "W trakcie"),
+    ]
+
+    name = models.CharField(max_length=200)
+    queue = models.CharField(max_length=50, default="default")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Pobieranie kolejnych zadań: WHERE queue = ? AND status = 'queued' AND run_at <= ? ORDER BY run_at, id
+            models.Index(fields=["queue", "run_at", "id"], condition=Q(status="queued"), name="job_ready_idx"),
+            # Odzyskiwanie zadań po awarii workera
+            models.Index(fields=["queue", "locked_at"], condition=Q(status="running"), name="job_running_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
+
+
+class DeadJob(models.Model):
+    """
+    Zadanie, które nie powiodło się ``max_attempts`` razy. Można je ponowić
+    (requeue_dead_jobs) po usunięciu przyczyny błędu.
+    """
+    name = models.CharField(max_length=200)
+    queue = models.CharField(max_length=50)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    # Limit prób z zadania - wraca do kolejki razem z nim
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    failed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
+
+    @transaction.atomic
+    def requeue(self):
+        job = Job.objects.create(
+            name=self.name, queue=self.queue, args=self.args, kwargs=self.kwargs, max_attempts=self.max_attempts
+        )
+        self.delete()
+        return job
@@ -0,0 +1,16 @@
+"""
+Punkt wejścia procesów potomnych ``runworker`` (multiprocessing, spawn).
+
+Moduł celowo nie importuje modeli na poziomie modułu - proces potomny
+rozpakowuje cel przed django.setup().
+"""
+
+
+def run_process(queues, threads, poll_interval, burst):
+    import django
+
+    django.setup()
+
+    from .worker import Worker
+
+    Worker(queues, threads, poll_interval, burst).run()
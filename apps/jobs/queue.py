@@ -0,0 +1,182 @@
+"""
+Kolejka zadań w bazie danych - bez dodatkowych usług.
+
+    @job(queue="mail", max_attempts=5)
+    def send_report(user_id): ...
+
+    send_report.delay(user.pk)   # wiersz Job, widoczny dla workerów po COMMIT
+    send_report(user.pk)         # zwykłe, synchroniczne wywołanie
+
+Wiersz Job powstaje w bieżącej transakcji, więc wycofanie transakcji
+wycofuje też zadanie, a worker nie zobaczy go przed zatwierdzeniem danych,
+na których ma pracować. Workery (``manage.py runworker``) pobierają
+zadania przez SELECT ... FOR UPDATE SKIP LOCKED tam, gdzie baza to
+obsługuje; na SQLite zadanie przejmuje warunkowy UPDATE (zapisy i tak są
+tam serializowane).
+"""
+
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import DeadJob, Job
+
+DEFAULTS = {
+    "MAX_ATTEMPTS": 5,
+    # Opóźnienie kolejnej próby: BACKOFF_BASE * 2^(próba - 1), maksymalnie BACKOFF_MAX sekund
+    "BACKOFF_BASE": 10,
+    "BACKOFF_MAX": 3600,
+    # Zadanie "w trakcie" dłużej niż tyle sekund uznajemy za porzucone przez martwy worker
+    "LOCK_TIMEOUT": 600,
+    "POLL_INTERVAL": 1.0,
+    "PROCESSES": 1,
+    "THREADS": 4,
+    "QUEUES": ["default"],
+}
+
+_registry = {}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "JOBS", {})}
+
+
+class JobFunction:
+    def __init__(self, func, name, queue, max_attempts):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+        self.__wrapped__ = func
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return enqueue(self.name, args, kwargs, queue=self.queue, max_attempts=self.max_attempts)
+
+    def delay_at(self, run_at, *args, **kwargs):
+        return enqueue(self.name, args, kwargs, queue=self.queue, max_attempts=self.max_attempts, run_at=run_at)
+
+
+def job(func=None, *, name=None, queue="default", max_attempts=None):
+    """
+    Rejestruje funkcję jako zadanie kolejki. Argumenty muszą dać się zapisać jako JSON.
+    """
+    def decorator(func):
+        job_name = name or f"{func.__module__}.{func.__qualname__}"
+        wrapped = JobFunction(func, job_name, queue, max_attempts or get_config()["MAX_ATTEMPTS"])
+        _registry[job_name] = wrapped
+        return wrapped
+
+    return decorator(func) if func is not None else decorator
+
+
+def get_job(name):
+    if name not in _registry:
+        # Import modułu rejestruje zadanie (dekorator); nazwa to ścieżka do funkcji
+        import_string(name)
+    return _registry[name]
+
+
+def enqueue(name, args=(), kwargs=None, queue="default", max_attempts=None, run_at=None):
+    return Job.objects.create(
+        name=name,
+        queue=queue,
+        args=list(args),
+        kwargs=kwargs or {},
+        max_attempts=max_attempts or get_config()["MAX_ATTEMPTS"],
+        run_at=run_at or timezone.now(),
+    )
+
+
+def backoff(attempts, config=None):
+    config = config or get_config()
+    delay = min(config["BACKOFF_BASE"] * 2 ** (attempts - 1), config["BACKOFF_MAX"])
+    # Rozrzut, żeby zadania, które padły razem, nie wracały razem
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(worker_id, queues, limit=1):
+    """
+    Przejmuje do ``limit`` gotowych zadań dla workera ``worker_id`` i zwraca je.
+    """
+    config = get_config()
+    now = timezone.now()
+    ready = Q(status=Job.QUEUED, run_at__lte=now) | Q(
+        status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=config["LOCK_TIMEOUT"])
+    )
+    candidates = Job.objects.filter(ready, queue__in=queues).order_by("run_at", "id")
+    taken = {"status": Job.RUNNING, "locked_by": worker_id, "locked_at": now, "attempts": F("attempts") + 1}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(candidates.select_for_update(skip_locked=True).values_list("id", flat=True)[:limit])
+            Job.objects.filter(id__in=ids).update(**taken)
+    else:
+        ids = []
+        for job_id, status, locked_at in candidates.values_list("id", "status", "locked_at")[:limit * 4]:
+            # Warunkowy UPDATE: jeśli inny worker był szybszy, stan wiersza już się nie zgadza
+            if Job.objects.filter(id=job_id, status=status, locked_at=locked_at).update(**taken):
+                ids.append(job_id)
+                if len(ids) >= limit:
+                    break
+    return list(Job.objects.filter(id__in=ids, locked_by=worker_id).order_by("run_at", "id"))
+
+
+def run(job_row):
+    """
+    Wykonuje przejęte zadanie: usuwa je po sukcesie, planuje ponowienie
+    albo przenosi do DeadJob po wyczerpaniu prób. Zwraca True przy sukcesie.
+    """
+    try:
+        get_job(job_row.name)(*job_row.args, **job_row.kwargs)
+    except Exception:
+        fail(job_row, traceback.format_exc())
+        return False
+    Job.objects.filter(pk=job_row.pk, locked_by=job_row.locked_by).delete()
+    return True
+
+
+def fail(job_row, error):
+    current = Job.objects.filter(pk=job_row.pk, locked_by=job_row.locked_by)
+    if job_row.attempts >= job_row.max_attempts:
+        with transaction.atomic():
+            if current.delete()[0]:
+                DeadJob.objects.create(
+                    name=job_row.name,
+                    queue=job_row.queue,
+                    args=job_row.args,
+                    kwargs=job_row.kwargs,
+                    attempts=job_row.attempts,
+                    max_attempts=job_row.max_attempts,
+                    last_error=error,
+                    created_at=job_row.created_at,
+                )
+        return
+    current.update(
+        status=Job.QUEUED,
+        run_at=timezone.now() + backoff(job_row.attempts),
+        locked_by="",
+        locked_at=None,
+        last_error=error,
+    )
+
+
+def run_pending(queues=None, worker_id="inline"):
+    """
+    Wykonuje wszystkie gotowe zadania w bieżącym wątku (testy, skrypty). Zwraca liczbę wykonanych.
+    """
+    queues = queues or get_config()["QUEUES"]
+    done = 0
+    while batch := claim(worker_id, queues, limit=100):
+        for job_row in batch:
+            done += run(job_row)
+    return done
@@ -0,0 +1,124 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import OperationalError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import DeadJob, Job
+from .queue import claim, job, run, run_pending
+from .worker import Worker
+
+calls = []
+
+
+@job
+def record(value):
+    calls.append(value)
+
+
+@job(max_attempts=2)
+def explode():
+    raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_job_is_enqueued_with_transaction(self):
+        try:
+            with transaction.atomic():
+                record.delay("wycofane")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        record.delay("zatwierdzone")
+
+        self.assertEqual(Job.objects.get().args, ["zatwierdzone"])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, ["zatwierdzone"])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_is_retried_then_dead_lettered(self):
+        explode.delay()
+
+        self.assertEqual(run_pending(), 0)
+        retry = Job.objects.get()
+        self.assertEqual((retry.status, retry.attempts), (Job.QUEUED, 1))
+        self.assertGreater(retry.run_at, timezone.now())
+        self.assertIn("boom", retry.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        run_pending()
+        self.assertFalse(Job.objects.exists())
+        dead = DeadJob.objects.get()
+        self.assertEqual((dead.attempts, dead.max_attempts), (2, 2))
+
+        dead.requeue()
+        requeued = Job.objects.get()
+        self.assertEqual((requeued.name, requeued.max_attempts), (explode.name, 2))
+
+    def test_claimed_job_is_not_taken_twice(self):
+        record.delay(1)
+        self.assertEqual(len(claim("a", ["default"])), 1)
+        self.assertEqual(claim("b", ["default"]), [])
+
+        # Worker "a" umarł - po LOCK_TIMEOUT zadanie wraca do puli
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(len(claim("b", ["default"])), 1)
+
+    @override_settings(
+        EMAIL_BACKEND="apps.jobs.mail.QueuedEmailBackend",
+        JOBS_EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    )
+    def test_email_is_sent_by_worker(self):
+        message = mail.EmailMultiAlternatives("Reset hasła", "Tekst", "noreply@example.com", ["jan@example.com"])
+        message.attach_alternative("<p>Tekst</p>", "text/html")
+        message.send()
+
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Job.objects.get().name, "apps.jobs.mail.send_email")
+
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+
+
+class RunWorkerCommandTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_runworker_burst(self):
+        for value in range(6):
+            record.delay(value)
+        out = StringIO()
+        call_command("runworker", "--burst", "--threads", "2", stdout=out)
+
+        self.assertEqual(sorted(calls), list(range(6)))
+        self.assertIn("wykonano zadań: 6", out.getvalue())
+        self.assertFalse(Job.objects.exists())
+
+    def test_worker_thread_survives_database_error(self):
+        record.delay("pierwsze")
+        record.delay("drugie")
+        # Zerwane połączenie przy zapisie wyniku pierwszego zadania
+        side_effects = [OperationalError("server closed the connection unexpectedly"), run]
+
+        def flaky_run(job_row):
+            effect = side_effects.pop(0)
+            if isinstance(effect, Exception):
+                raise effect
+            return effect(job_row)
+
+        out = StringIO()
+        with mock.patch("apps.jobs.worker.run", flaky_run):
+            processed = Worker(threads=1, poll_interval=0, burst=True, stdout=out).run()
+
+        self.assertEqual((processed, calls), (1, ["drugie"]))
+        self.assertIn("server closed the connection", out.getvalue())
+        # Pierwsze zostaje "w trakcie" - po LOCK_TIMEOUT przejmie je inny worker
+        self.assertEqual(Job.objects.get().status, Job.RUNNING)
@@ -0,0 +1,87 @@
+import os
+import signal
+import socket
+import threading
+
+from django.db import DatabaseError, close_old_connections, connection
+
+from .queue import claim, get_config, run
+
+
+class Worker:
+    """
+    Pętla workera w jednym procesie: ``threads`` wątków, każdy pobiera
+    i wykonuje po jednym zadaniu. Każdy wątek ma własne połączenie z bazą.
+    """
+
+    def __init__(self, queues=None, threads=None, poll_interval=None, burst=False, stdout=None):
+        config = get_config()
+        self.queues = queues or config["QUEUES"]
+        self.threads = threads or config["THREADS"]
+        self.poll_interval = config["POLL_INTERVAL"] if poll_interval is None else poll_interval
+        self.burst = burst
+        self.stdout = stdout
+        self.stop_event = threading.Event()
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def worker_id(self, thread_no):
+        return f"{socket.gethostname()}:{os.getpid()}:{thread_no}"[:100]
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def stop(self, *args):
+        self.stop_event.set()
+
+    def loop(self, thread_no):
+        worker_id = self.worker_id(thread_no)
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                try:
+                    jobs = claim(worker_id, self.queues)
+                except DatabaseError as error:
+                    # Np. zerwane połączenie - spróbujemy ponownie przy następnym obrocie pętli
+                    self.log(f"Błąd pobierania zadań: {error}")
+                    connection.close()
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                if not jobs:
+                    if self.burst:
+                        return
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                for job_row in jobs:
+                    try:
+                        ok = run(job_row)
+                    except DatabaseError as error:
+                        # Zapis wyniku się nie udał - zadanie zostaje "w trakcie" i po LOCK_TIMEOUT
+                        # przejmie je ponownie któryś worker; wątek działa dalej na nowym połączeniu
+                        self.log(f"Błąd zapisu stanu zadania {job_row.name} #{job_row.pk}: {error}")
+                        connection.close()
+                        continue
+                    with self._lock:
+                        self.processed += 1
+                    self.log(f"{'OK' if ok else 'BŁĄD'} {job_row.name} #{job_row.pk} (próba {job_row.attempts})")
+        finally:
+            connection.close()
+
+    def run(self):
+        if threading.current_thread() is threading.main_thread():
+            # Po SIGTERM kończymy bieżące zadania i wychodzimy
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+        threads = [
+            threading.Thread(target=self.loop, args=(thread_no,), name=f"job-worker-{thread_no}", daemon=True)
+            for thread_no in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            # join z timeoutem, żeby główny wątek mógł odebrać sygnał
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+        return self.processed
+
@@ -0,0 +1,48 @@
+"""
+Metryki połączeń z bazą: otwarcia połączeń przez Django (sygnał
+connection_created) i stan puli psycopg 3 (``OPTIONS["pool"]`` w DATABASES).
+Przy otwarciu połączenia podpinamy też wrapper zbierający zapytania żądań.
+"""
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .registry import registry
+from .sql import record_query
+
+# Klucz z pool.pop_stats() -> (licznik, mnożnik jednostki)
+POOL_COUNTERS = {
+    "connections_num": ("django_db_pool_connections_total", 1),
+    "requests_num": ("django_db_pool_requests_total", 1),
+    "requests_wait_ms": ("django_db_pool_wait_seconds_total", 0.001),
+    "requests_errors": ("django_db_pool_errors_total", 1),
+}
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    registry.inc("django_db_connections_total", {"alias": connection.alias})
+    # Sygnał przychodzi przy każdym ponownym połączeniu tego samego wrappera
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def record_pool_stats():
+    """
+    Przepisuje stan pul bieżącego procesu do ``registry``. Liczniki puli są
+    przy tym zerowane (pop_stats), więc do registry trafiają tylko przyrosty.
+    """
+    for alias in connections:
+        # Pula jest wspólna dla wątków procesu; wrapper bez puli (SQLite, tryb persistent) ma None lub brak atrybutu
+        pool = getattr(connections[alias], "pool", None)
+        if pool is None:
+            continue
+        stats = pool.pop_stats()
+        labels = {"alias": alias}
+        registry.set("django_db_pool_size", labels, stats.get("pool_size", 0))
+        registry.set("django_db_pool_in_use", labels, stats.get("pool_size", 0) - stats.get("pool_available", 0))
+        registry.set("django_db_pool_waiting", labels, stats.get("requests_waiting", 0))
+        for key, (name, scale) in POOL_COUNTERS.items():
+            if stats.get(key):
+                registry.inc(name, labels, stats[key] * scale)
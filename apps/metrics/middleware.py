@@ -0,0 +1,121 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .database import record_pool_stats
+from .registry import get_config, registry
+from .sql import QueryRecorder, current_recorder
+
+logger = logging.getLogger("apps.metrics")
+
+UNRESOLVED = "<unresolved>"
+
+
+def view_label(request):
+    """
+    Nazwa URL-a z config/urls.py (np. "project-detail") - stała liczba etykiet niezależnie od ścieżek.
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNRESOLVED
+    return match.view_name or match._func_path
+
+
+class MetricsMiddleware:
+    """
+    Mierzy czas żądania oraz liczbę, czas i powtórzenia zapytań SQL
+    (wrapper na każdym połączeniu, recorder żądania w ContextVar) i zapisuje je w ``registry``
+    z etykietą widoku. Działa synchronicznie (WSGI) i asynchronicznie (ASGI),
+    żeby nie wymuszać przejścia do wątku przed widokami async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        config = get_config()
+        self.enabled = config["ENABLED"]
+        self.slow_threshold = config["SLOW_REQUEST_THRESHOLD"]
+        self.similar_threshold = config["SIMILAR_QUERY_THRESHOLD"]
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        self.record(request, response, recorder, duration)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with self.recording(recorder):
+            response = await self.get_response(request)
+        duration = time.perf_counter() - start
+
+        self.record(request, response, recorder, duration)
+        return response
+
+    @contextmanager
+    def recording(self, recorder):
+        token = current_recorder.set(recorder)
+        try:
+            yield recorder
+        finally:
+            current_recorder.reset(token)
+
+    def record(self, request, response, recorder, duration):
+        view = view_label(request)
+        labels = {"view": view}
+        similar = recorder.similar()
+        repeated = {sql: count for sql, count in similar.items() if count >= self.similar_threshold}
+
+        registry.inc("django_http_requests_total", {**labels, "method": request.method, "status": response.status_code})
+        registry.observe("django_http_request_duration_seconds", labels, duration)
+        registry.inc("django_sql_queries_total", labels, recorder.count)
+        registry.inc("django_sql_duration_seconds_total", labels, recorder.duration)
+        registry.inc("django_sql_duplicate_queries_total", labels, recorder.duplicates())
+        registry.inc("django_sql_similar_queries_total", labels, recorder.count - len(similar))
+        if repeated:
+            registry.inc("django_http_n_plus_one_requests_total", labels)
+        record_pool_stats()
+        registry.flush()
+
+        if self.slow_threshold is not None and duration >= self.slow_threshold:
+            logger.warning(
+                json.dumps(
+                    {
+                        "event": "slow_request",
+                        "view": view,
+                        "method": request.method,
+                        "path": request.path,
+                        "status": response.status_code,
+                        "duration_ms": round(duration * 1000, 1),
+                        "sql_queries": recorder.count,
+                        "sql_ms": round(recorder.duration * 1000, 1),
+                        "duplicate_queries": recorder.duplicates(),
+                        "repeated_queries": [
+                            {"sql": sql[:300], "count": count}
+                            for sql, count in sorted(repeated.items(), key=lambda item: -item[1])[:5]
+                        ],
+                    },
+                    ensure_ascii=False,
+                )
+            )
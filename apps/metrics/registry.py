@@ -0,0 +1,249 @@
+"""
+Liczniki i histogramy metryk żądań, bezpieczne dla wielu procesów.
+
+Każdy proces zbiera metryki w pamięci (pomiar to kilka operacji na
+słownikach pod lockiem), a co ``FLUSH_INTERVAL`` sekund zapisuje ich
+migawkę do pliku ``<DIR>/metrics-<pid>.json`` (zapis atomowy przez
+os.replace). Endpoint /metrics sumuje migawki wszystkich procesów - tak
+samo jak tryb multiprocess klienta Prometheusa. Pliki zakończonych
+procesów zostają, więc liczniki nie cofają się po restarcie workera;
+wskaźniki (gauge, np. stan puli połączeń) sumujemy tylko z żyjących procesów.
+
+Bez ``DIR`` (np. runserver) metryki obejmują tylko bieżący proces.
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+DEFAULTS = {
+    "ENABLED": True,
+    # Katalog na migawki procesów; wymagany przy serwerze typu pre-fork (gunicorn, uvicorn --workers)
+    "DIR": None,
+    "FLUSH_INTERVAL": 5,
+    # Token dla scrapera (nagłówek "Authorization: Bearer <token>"); bez niego tylko zalogowani admini
+    "TOKEN": None,
+    "BUCKETS": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    # Żądania dłuższe niż tyle sekund są logowane (None - bez logowania)
+    "SLOW_REQUEST_THRESHOLD": None,
+    # Tyle wykonań zapytania o tym samym odcisku w jednym żądaniu uznajemy za N+1
+    "SIMILAR_QUERY_THRESHOLD": 5,
+}
+
+COUNTERS = {
+    "django_http_requests_total": "Liczba żądań HTTP",
+    "django_sql_queries_total": "Liczba zapytań SQL wykonanych w żądaniach",
+    "django_sql_duration_seconds_total": "Łączny czas zapytań SQL w żądaniach",
+    "django_sql_duplicate_queries_total": "Zapytania identyczne (SQL i parametry) z wcześniejszym w tym samym żądaniu",
+    "django_sql_similar_queries_total": "Zapytania o tym samym odcisku co wcześniejsze w tym samym żądaniu",
+    "django_http_n_plus_one_requests_total": "Żądania, w których jedno zapytanie powtórzyło się co najmniej "
+    "SIMILAR_QUERY_THRESHOLD razy",
+    "django_db_connections_total": "Połączenia z bazą otwarte przez Django (w trybie pool - pobrania z puli)",
+    "django_db_pool_connections_total": "Nowe połączenia otwarte przez pulę",
+    "django_db_pool_requests_total": "Pobrania połączenia z puli",
+    "django_db_pool_wait_seconds_total": "Łączny czas oczekiwania na połączenie z puli",
+    "django_db_pool_errors_total": "Pobrania z puli zakończone błędem (np. przekroczony timeout)",
+}
+GAUGES = {
+    "django_db_pool_size": "Połączenia otwarte w puli",
+    "django_db_pool_in_use": "Połączenia z puli wydane wątkom",
+    "django_db_pool_waiting": "Wątki czekające na połączenie z puli",
+}
+HISTOGRAMS = {
+    "django_http_request_duration_seconds": "Czas obsługi żądania HTTP",
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "METRICS", {})}
+
+
+class Registry:
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or get_config()["BUCKETS"])
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.counters = defaultdict(float)
+        self.gauges = {}
+        # (nazwa, etykiety) -> [liczniki kubełków..., suma, liczba]
+        self.histograms = {}
+        self.flushed_at = time.monotonic()
+
+    def _check_fork(self):
+        # Po fork() dziecko dziedziczy stan rodzica - liczymy od zera we własnym pliku
+        if os.getpid() != self.pid:
+            self._reset()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+    def inc(self, name, labels, value=1):
+        key = self._key(name, labels)
+        with self._lock:
+            self._check_fork()
+            self.counters[key] += value
+
+    def set(self, name, labels, value):
+        key = self._key(name, labels)
+        with self._lock:
+            self._check_fork()
+            self.gauges[key] = value
+
+    def observe(self, name, labels, value):
+        key = self._key(name, labels)
+        with self._lock:
+            self._check_fork()
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            self._check_fork()
+            return {
+                "pid": self.pid,
+                "buckets": list(self.buckets),
+                "counters": [[name, dict(labels), value] for (name, labels), value in self.counters.items()],
+                "gauges": [[name, dict(labels), value] for (name, labels), value in self.gauges.items()],
+                "histograms": [
+                    [name, dict(labels), list(series)] for (name, labels), series in self.histograms.items()
+                ],
+            }
+
+    def path(self, directory):
+        return os.path.join(directory, f"metrics-{os.getpid()}.json")
+
+    def flush(self, force=False):
+        directory = get_config()["DIR"]
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self.flushed_at < get_config()["FLUSH_INTERVAL"]:
+            return
+        self.flushed_at = now
+        os.makedirs(directory, exist_ok=True)
+        path = self.path(directory)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """
+        Suma migawek wszystkich procesów (albo tylko bieżący proces bez ``DIR``).
+        """
+        directory = get_config()["DIR"]
+        if not directory:
+            return [self.snapshot()]
+        self.flush(force=True)
+        snapshots = []
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                # Plik zniknął albo proces właśnie go podmienia - pomijamy do następnego odczytu
+                continue
+        return snapshots
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+registry = Registry()
+atexit.register(registry.flush, force=True)
+
+
+def _alive(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge(snapshots):
+    counters = defaultdict(float)
+    gauges = defaultdict(float)
+    histograms = {}
+    buckets = None
+    for snapshot in snapshots:
+        if buckets is None:
+            buckets = snapshot["buckets"]
+        elif snapshot["buckets"] != buckets:
+            # Migawka sprzed zmiany konfiguracji kubełków - nie da się jej zsumować
+            continue
+        for name, labels, value in snapshot["counters"]:
+            counters[Registry._key(name, labels)] += value
+        if snapshot.get("pid") == os.getpid() or _alive(snapshot.get("pid")):
+            for name, labels, value in snapshot.get("gauges", []):
+                gauges[Registry._key(name, labels)] += value
+        for name, labels, series in snapshot["histograms"]:
+            key = Registry._key(name, labels)
+            total = histograms.setdefault(key, [0] * len(series))
+            for index, value in enumerate(series):
+                total[index] += value
+    return buckets or [], counters, gauges, histograms
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, **extra):
+    items = [*labels, *extra.items()]
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(snapshots):
+    """
+    Metryki w formacie tekstowym Prometheusa (wersja 0.0.4).
+    """
+    buckets, counters, gauges, histograms = merge(snapshots)
+    lines = []
+    for kind, metrics, values in (("counter", COUNTERS, counters), ("gauge", GAUGES, gauges)):
+        for name, help_text in metrics.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+    for name, help_text in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (metric, labels), series in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, series):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}")
+            lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {_number(series[-1])}')
+            lines.append(f"{name}_sum{_labels(labels)} {_number(series[-2])}")
+            lines.append(f"{name}_count{_labels(labels)} {_number(series[-1])}")
+    return "\n".join(lines) + "\n"
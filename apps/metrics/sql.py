@@ -0,0 +1,84 @@
+"""
+Zbieranie zapytań SQL w obrębie jednego żądania (connection.execute_wrapper).
+
+Wrapper ``record_query`` jest stały na każdym połączeniu (sygnał
+connection_created), a recorder bieżącego żądania trzyma ContextVar -
+pod ASGI ORM działa w wątkach sync_to_async, które dziedziczą kontekst,
+ale nie połączenia wątku middleware.
+"""
+
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+# QueryRecorder bieżącego żądania (MetricsMiddleware); None - zapytania nie są zbierane
+current_recorder = ContextVar("metrics_query_recorder", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    Postać zapytania bez wartości: zapytania różniące się tylko parametrami
+    (także długością listy w IN) mają ten sam odcisk - tak wygląda N+1.
+    """
+    sql = STRING_LITERAL.sub("?", sql)
+    sql = NUMBER_LITERAL.sub("?", sql)
+    sql = PLACEHOLDER_LIST.sub("(...)", sql)
+    return WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryRecorder:
+    """
+    Wrapper dla ``connection.execute_wrapper()``: liczba, czas i powtórzenia zapytań.
+
+    W trakcie żądania zapamiętujemy tylko surowy SQL (i parametry, żeby
+    wykryć identyczne zapytania); odciski liczymy raz na końcu, dla
+    różnych treści SQL.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.exact = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+            if not many:
+                self.exact[(sql, repr(params))] += 1
+
+    def duplicates(self):
+        """
+        Liczba zapytań identycznych (SQL i parametry) z którymś wcześniejszym.
+        """
+        return sum(count - 1 for count in self.exact.values())
+
+    def similar(self):
+        """
+        {odcisk: liczba wykonań} dla wszystkich zapytań w żądaniu.
+        """
+        groups = Counter()
+        for sql, count in self.statements.items():
+            groups[fingerprint(sql)] += count
+        return groups
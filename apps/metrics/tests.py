@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .database import record_pool_stats
+from .middleware import MetricsMiddleware
+from .registry import DEFAULTS, registry, render
+from .sql import fingerprint
+
+
+def counter(name, **labels):
+    key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+    return registry.counters.get(key, 0)
+
+
+class SqlFingerprintTests(TestCase):
+    def test_queries_differing_only_in_values_share_fingerprint(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) AND "name" = \'a\''),
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s) AND "name" = \'bb\''),
+        )
+        self.assertNotEqual(fingerprint('SELECT * FROM "t1"'), fingerprint('SELECT * FROM "t2"'))
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.user = User.objects.create_user(username='metrics_user', password='password123')
+
+    def test_repeated_queries_are_counted_as_n_plus_one(self):
+        def view(request):
+            for _ in range(6):
+                User.objects.filter(pk=self.user.pk).first()
+            return type('Response', (), {'status_code': 200})()
+
+        with self.assertLogs('apps.metrics', 'WARNING') as logs:
+            with override_settings(METRICS={'SLOW_REQUEST_THRESHOLD': 0}):
+                MetricsMiddleware(view)(RequestFactory().get('/'))
+
+        self.assertEqual(counter('django_sql_queries_total', view='<unresolved>'), 6)
+        self.assertEqual(counter('django_sql_duplicate_queries_total', view='<unresolved>'), 5)
+        self.assertEqual(counter('django_http_n_plus_one_requests_total', view='<unresolved>'), 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['repeated_queries'][0]['count'], 6)
+
+    async def test_queries_are_counted_under_asgi(self):
+        # Widok synchroniczny pod ASGI wykonuje zapytania w wątku sync_to_async
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(counter('django_sql_queries_total', view='dashboard'), 0)
+
+    @override_settings(METRICS={**DEFAULTS, 'TOKEN': 'sekret'})
+    def test_endpoint_requires_token_or_staff(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('dashboard'))
+
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer sekret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'django_http_requests_total{method="GET",status="200",view="dashboard"} 1')
+        self.assertContains(response, 'django_http_request_duration_seconds_count{view="dashboard"} 1')
+
+    def test_snapshots_of_all_processes_are_summed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, 'metrics-1.json'), 'w') as f:
+            json.dump(
+                {
+                    'buckets': list(registry.buckets),
+                    'counters': [['django_sql_queries_total', {'view': 'dashboard'}, 10]],
+                    'histograms': [],
+                },
+                f,
+            )
+        registry.inc('django_sql_queries_total', {'view': 'dashboard'}, 5)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        with override_settings(METRICS={**DEFAULTS, 'DIR': directory}):
+            response = self.client.get(reverse('metrics'))
+        self.assertContains(response, 'django_sql_queries_total{view="dashboard"} 15')
+
+
+class DatabasePoolMetricsTests(TestCase):
+    def setUp(self):
+        registry.clear()
+
+    def test_pool_stats_are_exported(self):
+        stats = {
+            'pool_size': 4, 'pool_available': 1, 'requests_waiting': 2, 'requests_num': 30, 'requests_wait_ms': 1500,
+        }
+        pool = SimpleNamespace(pop_stats=lambda: stats)
+        wrappers = {'default': SimpleNamespace(pool=pool), 'other': object()}
+        with mock.patch('apps.metrics.database.connections', wrappers):
+            record_pool_stats()
+
+        output = render([registry.snapshot()])
+        self.assertIn('# TYPE django_db_pool_in_use gauge', output)
+        self.assertIn('django_db_pool_in_use{alias="default"} 3', output)
+        self.assertIn('django_db_pool_waiting{alias="default"} 2', output)
+        self.assertIn('django_db_pool_requests_total{alias="default"} 30', output)
+        self.assertIn('django_db_pool_wait_seconds_total{alias="default"} 1.5', output)
+
+    def test_gauges_of_finished_processes_are_skipped(self):
+        snapshot = {
+            'pid': 2 ** 22 + 1,
+            'buckets': list(registry.buckets),
+            'counters': [['django_db_pool_requests_total', {'alias': 'default'}, 7]],
+            'gauges': [['django_db_pool_in_use', {'alias': 'default'}, 5]],
+            'histograms': [],
+        }
+        output = render([snapshot])
+        self.assertIn('django_db_pool_requests_total{alias="default"} 7', output)
+        self.assertNotIn('django_db_pool_in_use{', output)
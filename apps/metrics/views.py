@@ -0,0 +1,31 @@
+import hmac
+
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from .database import record_pool_stats
+from .registry import get_config, registry, render
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def has_access(request):
+    token = get_config()["TOKEN"]
+    if token:
+        authorization = request.headers.get("Authorization", "")
+        if hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+            return True
+    return request.user.is_authenticated and request.user.is_staff
+
+
+@never_cache
+@require_GET
+def metrics(request):
+    """
+    Endpoint: GET /metrics - metryki wszystkich procesów w formacie Prometheusa (token scrapera albo admin).
+    """
+    if not has_access(request):
+        return HttpResponseForbidden()
+    record_pool_stats()
+    return HttpResponse(render(registry.collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,116 @@
+"""
+Widoki DRF z asynchronicznymi handlerami (``async def get``).
+
+DRF nie obsługuje widoków async - APIView.dispatch wywołuje uwierzytelnianie,
+uprawnienia i handler synchronicznie. AsyncAPIView powtarza ten przebieg
+w wersji async: pod ASGI żądanie nie zajmuje wątku na czas zapytań do bazy
+(async ORM), a trafienia w cache użytkowników i członkostw obywają się bez
+sync_to_async.
+
+Uwierzytelnianie używa ``aauthenticate``, a uprawnienia ``ahas_permission``
+i ``ahas_object_permission``, jeśli klasa je ma. Pozostałe authenticatory
+działają przez sync_to_async, a synchroniczne sprawdzenia uprawnień
+i limitów są wołane wprost - nie mogą czytać z bazy.
+"""
+
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework import exceptions
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.views import APIView
+
+
+async def _maybe_await(value):
+    return await value if inspect.isawaitable(value) else value
+
+
+class AsyncAPIView(APIView):
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            # options() i http_method_not_allowed() z APIView są synchroniczne
+            response = await _maybe_await(handler(request, *args, **kwargs))
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        if isinstance(request._request, ASGIRequest):
+            self.prerender(self.response)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        await self.acheck_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        for authenticator in request.authenticators:
+            # Jak w DRF: authenticatory dostają Request DRF (np. SessionAuthentication czyta request._request)
+            authenticate = getattr(authenticator, "aauthenticate", None) or sync_to_async(authenticator.authenticate)
+            try:
+                user_auth_tuple = await authenticate(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+        request._not_authenticated()
+
+    async def acheck_permissions(self, request):
+        for permission in self.get_permissions():
+            check = getattr(permission, "ahas_permission", None)
+            allowed = await check(request, self) if check else permission.has_permission(request, self)
+            if not allowed:
+                self.permission_denied(
+                    request, message=getattr(permission, "message", None), code=getattr(permission, "code", None)
+                )
+
+    async def acheck_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            check = getattr(permission, "ahas_object_permission", None)
+            if check:
+                allowed = await check(request, self, obj)
+            else:
+                allowed = permission.has_object_permission(request, self, obj)
+            if not allowed:
+                self.permission_denied(
+                    request, message=getattr(permission, "message", None), code=getattr(permission, "code", None)
+                )
+
+    def prerender(self, response):
+        """
+        Renderuje odpowiedź od razu. Django pod ASGI woła synchroniczne
+        ``render()`` przez sync_to_async, czyli w wątku - dla gotowych danych
+        to zbędne przejście. Przeglądarkowy renderer DRF czyta z bazy
+        (formularze), więc jego zostawiamy Django.
+        """
+        if not hasattr(response, "render") or isinstance(
+            getattr(response, "accepted_renderer", None), BrowsableAPIRenderer
+        ):
+            return
+        response.render()
+
+        async def render():
+            return response
+
+        response.render = render
@@ -0,0 +1,350 @@
+"""
+Benchmark tras HTML i API z config/urls.py (``manage.py bench``).
+
+Trasy są wyszukiwane w resolverze URL-i, a argumenty (pk, status...)
+wypełniane obiektami użytkownika benchmarku - nowe widoki trafiają do
+pomiaru bez zmian tutaj. Żądania idą przez testowego klienta Django
+(w procesie, z liczeniem zapytań SQL) albo przez HTTP do działającego
+serwera.
+"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from http.cookiejar import CookieJar
+
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import URLResolver, get_resolver, reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.metrics.sql import QueryRecorder
+
+from .models import Comment, Project, Task
+
+# Trasy, których nie da się sensownie mierzyć samym GET-em
+SKIPPED = {
+    "logout": "tylko POST",
+    "project-events": "strumień SSE bez końca",
+    "task-update-status": "tylko POST",
+    "api_tasks_status": "tylko PATCH",
+    "api-project-tasks-bulk": "tylko POST",
+    "api_users_onboarding": "tylko POST",
+    "password_reset_confirm": "wymaga tokenu z e-maila",
+    "jwt-create": "tylko POST",
+    "jwt-refresh": "tylko POST",
+    "jwt-verify": "tylko POST",
+    "jwt-revoke": "tylko POST",
+    "user-activation": "tylko POST",
+    "user-resend-activation": "tylko POST",
+    "user-reset-password": "tylko POST",
+    "user-reset-password-confirm": "tylko POST",
+    "user-reset-username": "tylko POST",
+    "user-reset-username-confirm": "tylko POST",
+    "user-set-password": "tylko POST",
+    "user-set-username": "tylko POST",
+}
+
+QUERY_PARAMS = {
+    "search": {"q": "raport"},
+    "api_search": {"q": "raport"},
+}
+
+
+@dataclass
+class Route:
+    name: str
+    path: str
+
+
+@dataclass
+class Fixtures:
+    """
+    Obiekty, którymi wypełniamy argumenty tras: największy projekt użytkownika
+    i najczęściej komentowane zadanie w nim.
+    """
+
+    user: object
+    project: object
+    task: object
+    skipped: dict = field(default_factory=dict)
+
+    @classmethod
+    def for_user(cls, user):
+        project = (
+            Project.objects.filter(team__members=user)
+            .annotate(task_count=Count("tasks"))
+            .order_by("-task_count", "pk")
+            .first()
+        )
+        if project is None:
+            return None
+        task = (
+            Task.objects.filter(project=project)
+            .annotate(comment_count=Count("comments"))
+            .order_by("-comment_count", "pk")
+            .first()
+        )
+        if task is None:
+            return None
+        return cls(user=user, project=project, task=task)
+
+    def kwargs_for(self, name, kwarg_names):
+        values = {}
+        for kwarg in kwarg_names:
+            if kwarg == "pk":
+                if name.startswith("task"):
+                    values[kwarg] = self.task.pk
+                elif name.startswith("team"):
+                    values[kwarg] = self.project.team_id
+                elif name.startswith(("project", "api-project")):
+                    values[kwarg] = self.project.pk
+                else:
+                    return None
+            elif kwarg == "project_id":
+                values[kwarg] = self.project.pk
+            elif kwarg == "status":
+                values[kwarg] = "todo"
+            elif kwarg == "id":
+                values[kwarg] = self.user.pk
+            else:
+                return None
+        return values
+
+
+def _walk(patterns, kwarg_names=(), namespace=""):
+    for pattern in patterns:
+        names = (*kwarg_names, *pattern.pattern.regex.groupindex)
+        if isinstance(pattern, URLResolver):
+            inner = f"{namespace}{pattern.namespace}:" if pattern.namespace else namespace
+            yield from _walk(pattern.url_patterns, names, inner)
+        elif pattern.name:
+            yield f"{namespace}{pattern.name}", names
+
+
+def discover_routes(fixtures, include=None, exclude=()):
+    """
+    Nazwane trasy z config/urls.py jako lista ``Route``; pominięte trafiają do ``fixtures.skipped``.
+    """
+    routes, seen = [], set()
+    for name, kwarg_names in _walk(get_resolver().url_patterns):
+        # Panel admina pomijamy w całości
+        if name in seen or "format" in kwarg_names or name.startswith("admin:"):
+            continue
+        if include and name not in include:
+            continue
+        if name in exclude:
+            continue
+        if name in SKIPPED:
+            fixtures.skipped[name] = SKIPPED[name]
+            continue
+        kwargs = fixtures.kwargs_for(name, kwarg_names)
+        if kwargs is None:
+            fixtures.skipped[name] = f"nieznane argumenty: {', '.join(kwarg_names)}"
+            continue
+        seen.add(name)
+        path = reverse(name, kwargs=kwargs)
+        if name in QUERY_PARAMS:
+            path = f"{path}?{urllib.parse.urlencode(QUERY_PARAMS[name])}"
+        routes.append(Route(name, path))
+    return routes
+
+
+class ClientRunner:
+    """
+    Testowy klient Django w procesie; każdy wątek ma własnego klienta i połączenie z bazą.
+    """
+
+    counts_queries = True
+
+    def __init__(self, user):
+        self.user = user
+        self.token = str(AccessToken.for_user(user))
+        # Jedno logowanie; wątki dostają kopię ciasteczka sesji (bez równoległych zapisów sesji)
+        login = Client()
+        login.force_login(user)
+        self.cookies = login.cookies
+        self._local = threading.local()
+
+    def client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = Client(raise_request_exception=False)
+            client.cookies.update(self.cookies)
+        return client
+
+    def request(self, path):
+        client = self.client()
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = client.get(path, headers={"Authorization": f"Bearer {self.token}"})
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+        return response.status_code, recorder.count
+
+    def close(self):
+        # Tylko połączenia bieżącego wątku
+        connections.close_all()
+        self._local.__dict__.clear()
+
+
+class HttpRunner:
+    """
+    Żądania HTTP do działającego serwera (sesja przez formularz logowania, JWT dla API).
+    """
+
+    counts_queries = False
+
+    def __init__(self, base_url, username, password, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def opener(self):
+        opener = getattr(self._local, "opener", None)
+        if opener is None:
+            cookies = CookieJar()
+            opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+            login_url = self.base_url + reverse("login")
+            opener.open(login_url, timeout=self.timeout).read()
+            csrf_token = next(cookie.value for cookie in cookies if cookie.name == "csrftoken")
+            form = {"username": self.username, "password": self.password, "csrfmiddlewaretoken": csrf_token}
+            opener.open(
+                urllib.request.Request(
+                    login_url, data=urllib.parse.urlencode(form).encode(), headers={"Referer": login_url}
+                ),
+                timeout=self.timeout,
+            ).read()
+            credentials = json.dumps({"username": self.username, "password": self.password}).encode()
+            response = opener.open(
+                urllib.request.Request(
+                    self.base_url + reverse("jwt-create"),
+                    data=credentials,
+                    headers={"Content-Type": "application/json"},
+                ),
+                timeout=self.timeout,
+            )
+            self._local.token = json.loads(response.read())["access"]
+            self._local.opener = opener
+        return opener
+
+    def request(self, path):
+        opener = self.opener()
+        request = urllib.request.Request(
+            self.base_url + path, headers={"Authorization": f"Bearer {self._local.token}"}
+        )
+        try:
+            with opener.open(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as error:
+            return error.code, None
+
+    def close(self):
+        pass
+
+
+def percentile(sorted_values, fraction):
+    """
+    Percentyl metodą najbliższej rangi.
+    """
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(route, samples, wall_time):
+    latencies = sorted(latency for latency, _, _ in samples)
+    queries = [count for _, _, count in samples if count is not None]
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "path": route.path,
+        "requests": len(samples),
+        "errors": sum(1 for _, status, _ in samples if status >= 400),
+        "status": statuses,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        "max_queries": max(queries) if queries else None,
+        "throughput_rps": round(len(samples) / wall_time, 1) if wall_time else None,
+    }
+
+
+def run_route(runner, route, requests, concurrency, warmup=1):
+    for _ in range(warmup):
+        runner.request(route.path)
+
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+    samples = []
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                start = time.perf_counter()
+                status, queries = runner.request(route.path)
+                sample = (time.perf_counter() - start, status, queries)
+                with lock:
+                    samples.append(sample)
+        finally:
+            runner.close()
+
+    threads = [threading.Thread(target=worker, name=f"bench-{i}") for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(route, samples, time.perf_counter() - started)
+
+
+def compare(results, baseline):
+    """
+    Zmiany p95, liczby zapytań i przepustowości względem wyników z innego commita: {trasa: {...}}.
+    """
+    deltas = {}
+    for name, current in results["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if previous is None:
+            continue
+        deltas[name] = {
+            "p95_ms": round(current["p95_ms"] - previous["p95_ms"], 2),
+            "queries_per_request": (
+                round(current["queries_per_request"] - previous["queries_per_request"], 2)
+                if current["queries_per_request"] is not None and previous["queries_per_request"] is not None
+                else None
+            ),
+            "throughput_rps": (
+                round(current["throughput_rps"] - previous["throughput_rps"], 1)
+                if current["throughput_rps"] is not None and previous["throughput_rps"] is not None
+                else None
+            ),
+        }
+    return deltas
+
+
+def dataset_size():
+    return {
+        "projects": Project.objects.count(),
+        "tasks": Task.objects.count(),
+        "comments": Comment.objects.count(),
+    }
@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+
+from django.db.models import Count, F, OuterRef, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+
+from .models import Comment, Task
+
+# Ile kart pokazujemy w kolumnie przy pierwszym renderze tablicy
+BOARD_COLUMN_LIMIT = 50
+
+
+@dataclass
+class BoardColumn:
+    status: str
+    label: str
+    tasks: list = field(default_factory=list)
+    has_more: bool = False
+    next_offset: int = 0
+
+
+def with_card_data(queryset):
+    """
+    Dokłada do zadań przypisanego użytkownika i liczbę komentarzy,
+    tak aby karta zadania nie wykonywała już żadnych dodatkowych zapytań.
+    """
+    # Podzapytanie zamiast JOIN + GROUP BY: liczone z indeksu komentarzy, bez sortowania grup
+    comment_count = (
+        Comment.objects.filter(task=OuterRef("pk")).order_by().values("task").annotate(count=Count("*")).values("count")
+    )
+    return queryset.select_related("assigned_to").annotate(comment_count=Coalesce(Subquery(comment_count), 0))
+
+
+def board_queryset(project):
+    return with_card_data(project.tasks.all()).order_by("id")
+
+
+def board_window_queryset(project, limit=BOARD_COLUMN_LIMIT):
+    """
+    Zapytanie tablicy: maksymalnie ``limit + 1`` pierwszych zadań z każdej kolumny.
+    """
+    return (
+        board_queryset(project)
+        .annotate(position=Window(RowNumber(), partition_by=F("status"), order_by=F("id").asc()))
+        .filter(position__lte=limit + 1)
+    )
+
+
+def load_board(project, limit=BOARD_COLUMN_LIMIT):
+    """
+    Ładuje całą tablicę Kanban jednym zapytaniem.
+
+    Numerujemy zadania w obrębie statusu funkcją okna i pobieramy maksymalnie
+    ``limit + 1`` wierszy na kolumnę - dodatkowy wiersz mówi nam tylko,
+    czy warto pokazać przycisk "Pokaż więcej".
+    """
+    columns = {status: BoardColumn(status, label) for status, label in Task.STATUS_CHOICES}
+
+    for task in board_window_queryset(project, limit):
+        column = columns.get(task.status)
+        if column is None:
+            continue
+        if len(column.tasks) < limit:
+            column.tasks.append(task)
+        else:
+            column.has_more = True
+
+    for column in columns.values():
+        column.next_offset = len(column.tasks)
+    return columns
+
+
+def load_column(project, status, offset=0, limit=BOARD_COLUMN_LIMIT):
+    """
+    Kontynuacja "Pokaż więcej" dla jednej kolumny tablicy.
+    """
+    label = dict(Task.STATUS_CHOICES)[status]
+    tasks = list(board_queryset(project).filter(status=status)[offset:offset + limit + 1])
+    return BoardColumn(
+        status,
+        label,
+        tasks=tasks[:limit],
+        has_more=len(tasks) > limit,
+        next_offset=offset + min(len(tasks), limit),
+    )
@@ -0,0 +1,57 @@
+"""
+Walidatory odpowiedzi warunkowych (ETag / Last-Modified).
+
+Walidatory liczymy tanio, zanim powstanie odpowiedź: dla projektu z wersji
+w ProjectStats (podbijanej przy każdej zmianie zadań i komentarzy), dla
+listy zadań użytkownika z liczby wierszy i MAX(updated_at). Pasujące
+If-None-Match / If-Modified-Since kończą się 304 bez serializacji
+i renderowania szablonu.
+"""
+
+import hashlib
+
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def project_validators(stats, *parts):
+    """
+    (etag, last_modified) dla widoku projektu; ``parts`` rozróżnia reprezentacje.
+    """
+    last_modified = int(stats.changed_at.timestamp()) if stats.changed_at else None
+    return make_etag("project", stats.project_id, stats.version, *parts), last_modified
+
+
+def csrf_part(request):
+    """
+    Część ETagu dla stron z formularzami. Token w HTML pochodzi z sekretu
+    w ciasteczku CSRF - po jego zmianie (np. rotate_token() przy logowaniu)
+    304 zostawiłoby w przeglądarce formularze z nieważnym tokenem.
+    """
+    # get_token() ustawia sekret, jeśli klient go jeszcze nie ma - ETag od razu zgadza się z ciasteczkiem
+    get_token(request)
+    return hashlib.sha1(request.META["CSRF_COOKIE"].encode()).hexdigest()
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """
+    Odpowiedź 304 (lub 412), jeśli nagłówki warunkowe klienta pasują; inaczej None.
+    """
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified=None):
+    if response.status_code != 200:
+        return response
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    # Odpowiedzi zależą od użytkownika - cache tylko po stronie klienta, z rewalidacją
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,112 @@
+"""
+Podsumowanie na stronie głównej (DashboardView): otwarte zadania
+użytkownika, jego zespoły z liczbą członków i liczniki.
+
+Podsumowanie budują zawsze te same trzy zapytania, niezależnie od liczby
+zespołów i zadań, a wynik trafia do cache per użytkownik. Wpisy są
+unieważniane sygnałami (przypisanie, status i treść zadań, zmiany
+projektów, zespołów i członkostwa) oraz przez TaskQuerySet.update()
+i bulk_create().
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.models import Count
+
+DEFAULTS = {
+    "CACHE": "default",
+    "TIMEOUT": 300,
+    "TASK_LIMIT": 50,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "DASHBOARD", {})}
+
+
+def _cache():
+    return caches[get_config()["CACHE"]]
+
+
+def _cache_key(user_id):
+    return f"dashboard:{user_id}"
+
+
+def open_tasks(user):
+    # Import w funkcji: models.py (TaskQuerySet) importuje ten moduł
+    from .models import Task
+
+    # Wyniki lądują w cache - zawsze z bazy głównej, nie z repliki z opóźnieniem
+    return (
+        Task.objects.using(DEFAULT_DB_ALIAS)
+        .filter(assigned_to=user)
+        .exclude(status="done")
+        .select_related("project")
+        .only("title", "priority", "due_date", "project__name")
+        .order_by("due_date", "created_at", "id")
+    )
+
+
+def teams_with_member_counts(team_ids):
+    from .models import Team
+
+    return (
+        Team.objects.using(DEFAULT_DB_ALIAS)
+        .filter(pk__in=team_ids)
+        .annotate(member_count=Count("members"))
+        .order_by("name", "pk")
+    )
+
+
+def build_summary(user, team_ids):
+    """
+    Podsumowanie jako zwykłe słowniki (tanie do serializacji w cache).
+    """
+    limit = get_config()["TASK_LIMIT"]
+    tasks = [
+        {
+            "title": task.title,
+            "project_id": task.project_id,
+            "project_name": task.project.name,
+            "due_date": task.due_date,
+            "priority": task.priority,
+            "priority_display": task.get_priority_display(),
+        }
+        for task in open_tasks(user)[:limit]
+    ]
+    open_count = len(tasks) if len(tasks) < limit else open_tasks(user).count()
+    teams = [
+        {"id": team.pk, "name": team.name, "member_count": team.member_count}
+        for team in teams_with_member_counts(team_ids)
+    ]
+    return {"tasks": tasks, "open_count": open_count, "teams": teams}
+
+
+def get_summary(user, team_ids):
+    cache = _cache()
+    key = _cache_key(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_summary(user, team_ids)
+        # Jak w membership.get_team_ids(): w transakcji zapisujemy dopiero po commit
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: cache.set(key, summary, get_config()["TIMEOUT"]))
+        else:
+            cache.set(key, summary, get_config()["TIMEOUT"])
+    return summary
+
+
+def _forget(user_ids):
+    _cache().delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate(*user_ids):
+    """
+    Jak membership.invalidate(): od razu i ponownie po zatwierdzeniu transakcji.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    _forget(user_ids)
+    transaction.on_commit(lambda: _forget(user_ids))
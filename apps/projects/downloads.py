@@ -0,0 +1,156 @@
+"""
+Wysyłka załączników zadań.
+
+Pliki z storage adresowanego treścią są niezmienne, więc ETag to po prostu
+SHA-256 z nazwy pliku - bez czytania zawartości. Jeśli serwer WWW potrafi
+wysłać plik sam (nginx X-Accel-Redirect, Apache/lighttpd X-Sendfile), Django
+zwraca tylko nagłówki. W przeciwnym razie plik (albo żądany zakres bajtów)
+jest strumieniowany kawałkami, bez ładowania go w całości do pamięci - pod
+ASGI przez iterator async, bo synchroniczny Django zbuforowałby w całości.
+"""
+
+import mimetypes
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header, quote_etag
+
+from .conditional import not_modified_response
+from .storage import attachment_storage, blob_digest, is_blob_name
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def attachment_etag(name):
+    return quote_etag(blob_digest(name)) if is_blob_name(name) else None
+
+
+def parse_range(header, size):
+    """
+    (start, end) włącznie dla pojedynczego zakresu ``bytes=``.
+
+    None oznacza "wyślij cały plik" (brak nagłówka, kilka zakresów lub inna
+    jednostka - RFC 9110 pozwala je zignorować), ValueError - zakres
+    niemożliwy do spełnienia (416).
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N: ostatnie N bajtów
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def iter_range(file, start, length, chunk_size=RANGE_CHUNK_SIZE):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+async def aiter_range(file, start, length, chunk_size=RANGE_CHUNK_SIZE):
+    # Odczyt w puli wątków: duży plik nie blokuje pętli zdarzeń, a między kawałkami wątek jest wolny
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        await sync_to_async(file.seek, thread_sensitive=False)(start)
+        while length > 0:
+            chunk = await read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _if_range_matches(request, etag):
+    if_range = request.headers.get("If-Range")
+    # Daty w If-Range nie obsługujemy - wtedy bezpieczniej wysłać cały plik
+    return not if_range or (etag is not None and if_range.strip() == etag)
+
+
+def _sendfile_response(name, storage):
+    mode = getattr(settings, "ATTACHMENT_SENDFILE", None)
+    if mode == "nginx":
+        response = HttpResponse()
+        prefix = settings.ATTACHMENT_ACCEL_PREFIX.rstrip("/")
+        response["X-Accel-Redirect"] = quote(f"{prefix}/{name}")
+        return response
+    if mode == "sendfile":
+        response = HttpResponse()
+        response["X-Sendfile"] = storage.path(name)
+        return response
+    return None
+
+
+def attachment_response(request, task):
+    """
+    Odpowiedź z załącznikiem zadania: 304 / 206 / 416 / 200 lub przekazanie do serwera WWW.
+    """
+    storage = attachment_storage()
+    name = task.attachment.name
+    etag = attachment_etag(name)
+    filename = task.attachment_name or name.rsplit("/", 1)[-1]
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    if etag is not None:
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+    response = _sendfile_response(name, storage)
+    if response is None:
+        size = storage.size(name)
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size) if _if_range_matches(request, etag) else None
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        asynchronous = isinstance(request, ASGIRequest)
+        if byte_range is None and not asynchronous:
+            response = FileResponse(storage.open(name, "rb"), content_type=content_type)
+        else:
+            start, end = byte_range or (0, size - 1)
+            chunks = (aiter_range if asynchronous else iter_range)(storage.open(name, "rb"), start, end - start + 1)
+            response = StreamingHttpResponse(
+                chunks, status=200 if byte_range is None else 206, content_type=content_type
+            )
+            if byte_range is not None:
+                response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = str(end - start + 1)
+        response["Accept-Ranges"] = "bytes"
+
+    response["Content-Type"] = content_type
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    if etag is not None:
+        response["ETag"] = etag
+        # Treść pod danym adresem może się zmienić (nowy załącznik), więc z rewalidacją
+        response["Cache-Control"] = "private, no-cache"
+    return response
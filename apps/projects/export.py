@@ -0,0 +1,152 @@
+"""
+Strumieniowy eksport zadań projektu (NDJSON / CSV).
+
+Zadania czytamy przez QuerySet.iterator(chunk_size=...), a komentarze
+dociągamy jednym zapytaniem na paczkę zadań - pamięć zależy od rozmiaru
+paczki, nie projektu, a pierwsze bajty odpowiedzi wychodzą przed
+pierwszym zapytaniem.
+
+Pod ASGI Django buforuje synchroniczne iteratory w całości (sync_to_async(list))
+przed wysłaniem pierwszego bajtu, dlatego ``export_rows`` zwraca wtedy wersję
+async (``aiterator``).
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from .board import board_queryset
+from .models import Comment
+
+EXPORT_CHUNK_SIZE = 2000
+
+TASK_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "status",
+    "priority",
+    "due_date",
+    "assigned_to",
+    "comment_count",
+    "created_at",
+    "updated_at",
+]
+
+
+def export_queryset(project, include_comments=False):
+    queryset = board_queryset(project)
+    if include_comments:
+        comments = Comment.objects.select_related("author").order_by("created_at", "id")
+        queryset = queryset.prefetch_related(Prefetch("comments", queryset=comments))
+    return queryset
+
+
+def task_record(task, include_comments=False):
+    record = {
+        "id": task.pk,
+        "title": task.title,
+        "description": task.description,
+        "status": task.status,
+        "priority": task.priority,
+        "due_date": task.due_date,
+        "assigned_to": task.assigned_to.username if task.assigned_to else None,
+        "comment_count": task.comment_count,
+        "created_at": task.created_at,
+        "updated_at": task.updated_at,
+    }
+    if include_comments:
+        record["comments"] = [
+            {
+                "id": comment.pk,
+                "author": comment.author.username,
+                "content": comment.content,
+                "created_at": comment.created_at,
+            }
+            for comment in task.comments.all()
+        ]
+    return record
+
+
+def iter_records(project, include_comments=False, chunk_size=EXPORT_CHUNK_SIZE):
+    queryset = export_queryset(project, include_comments)
+    for task in queryset.iterator(chunk_size=chunk_size):
+        yield task_record(task, include_comments)
+
+
+async def aiter_records(project, include_comments=False, chunk_size=EXPORT_CHUNK_SIZE):
+    queryset = export_queryset(project, include_comments)
+    async for task in queryset.aiterator(chunk_size=chunk_size):
+        yield task_record(task, include_comments)
+
+
+def ndjson_line(record):
+    return json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def iter_ndjson(project, include_comments=False, chunk_size=EXPORT_CHUNK_SIZE):
+    for record in iter_records(project, include_comments, chunk_size):
+        yield ndjson_line(record)
+
+
+async def aiter_ndjson(project, include_comments=False, chunk_size=EXPORT_CHUNK_SIZE):
+    async for record in aiter_records(project, include_comments, chunk_size):
+        yield ndjson_line(record)
+
+
+class _Echo:
+    """
+    Pseudo-plik dla csv.writer: zamiast buforować, zwraca zapisany wiersz.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+class CSVRows:
+    """
+    Nagłówek i wiersze CSV eksportu (wspólne dla wersji sync i async).
+    """
+
+    def __init__(self, include_comments=False):
+        self.writer = csv.writer(_Echo())
+        self.include_comments = include_comments
+        self.fields = TASK_FIELDS + (["comments"] if include_comments else [])
+
+    def header(self):
+        return self.writer.writerow(self.fields)
+
+    def row(self, record):
+        if self.include_comments:
+            # Komentarze w jednej kolumnie jako JSON, żeby wiersz CSV odpowiadał jednemu zadaniu
+            record["comments"] = json.dumps(record["comments"], cls=DjangoJSONEncoder, ensure_ascii=False)
+        return self.writer.writerow([_csv_value(record[field]) for field in self.fields])
+
+
+def iter_csv(project, include_comments=False, chunk_size=EXPORT_CHUNK_SIZE):
+    rows = CSVRows(include_comments)
+    yield rows.header()
+    for record in iter_records(project, include_comments, chunk_size):
+        yield rows.row(record)
+
+
+async def aiter_csv(project, include_comments=False, chunk_size=EXPORT_CHUNK_SIZE):
+    rows = CSVRows(include_comments)
+    yield rows.header()
+    async for record in aiter_records(project, include_comments, chunk_size):
+        yield rows.row(record)
+
+
+def export_rows(export_format, project, include_comments=False, asynchronous=False):
+    """
+    Iterator eksportu w formacie ``"csv"`` lub ``"ndjson"``; z ``asynchronous`` - async (dla ASGI).
+    """
+    if export_format == "csv":
+        return (aiter_csv if asynchronous else iter_csv)(project, include_comments)
+    return (aiter_ndjson if asynchronous else iter_ndjson)(project, include_comments)
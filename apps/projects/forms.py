@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 
+from .membership import get_team_ids, is_team_member
 from .models import Comment, Project, Task, Team
 
 
@@ -17,7 +18,7 @@ class ProjectForm(forms.ModelForm):
 
     def __init__(self, user, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['team'].queryset = Team.objects.filter(members=user)
+        self.fields['team'].queryset = Team.objects.filter(pk__in=get_team_ids(user))
 
 class TaskForm(forms.ModelForm):
     class Meta:
@@ -64,7 +65,7 @@ class AddMemberForm(forms.Form):
             except User.DoesNotExist:
                 raise ValidationError(f"Użytkownik o loginie '{username}' nie istnieje.")
 
-            if self.team.members.filter(pk=user.pk).exists():
+            if is_team_member(user, self.team):
                 raise ValidationError("Ten użytkownik już należy do tego zespołu.")
 
             self.user_to_add = user
@@ -0,0 +1,151 @@
+"""
+Cache fragmentów HTML tablicy Kanban: pojedynczych kart i całych kolumn.
+
+Klucz karty wynika z tego, co karta pokazuje: updated_at zadania (zmienia
+się przy każdym zapisie, także przez TaskQuerySet.update()), liczby
+komentarzy i przypisanego użytkownika. Klucz kolumny - z wersji projektu
+w ProjectStats, podbijanej przy każdej zmianie zadań i komentarzy.
+Nieaktualnych wpisów nie trzeba usuwać: po zmianie nikt już nie pyta
+o stary klucz, a backend cache sam je wyrzuci.
+
+Fragmenty są wspólne dla wszystkich członków zespołu, więc nie mogą
+zawierać nic zależnego od użytkownika. Token CSRF w formularzach zmiany
+statusu jest zapisywany jako znacznik i podmieniany przy każdym żądaniu.
+"""
+
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .board import BOARD_COLUMN_LIMIT, load_board, load_column
+from .models import Task
+
+CSRF_PLACEHOLDER = "__fragment_csrf_token__"
+
+DEFAULTS = {
+    "ALIAS": "fragments",
+    "TIMEOUT": 24 * 60 * 60,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "FRAGMENT_CACHE", {})}
+
+
+class FragmentStats:
+    """
+    Liczniki trafień i chybień cache w bieżącym procesie, osobno dla rodzaju fragmentu.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind, hits, misses):
+        with self._lock:
+            counts = self._counts.setdefault(kind, {"hits": 0, "misses": 0})
+            counts["hits"] += hits
+            counts["misses"] += misses
+
+    def snapshot(self):
+        with self._lock:
+            return {kind: dict(counts) for kind, counts in self._counts.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+stats = FragmentStats()
+
+
+def fragment_cache():
+    return caches[get_config()["ALIAS"]]
+
+
+def card_key(task):
+    assignee = task.assigned_to.username if task.assigned_to_id else ""
+    version = f"{task.updated_at.timestamp()}:{task.comment_count}:{task.assigned_to_id}:{assignee}"
+    return f"card:{task.pk}:{hashlib.sha1(version.encode()).hexdigest()}"
+
+
+def column_key(project_stats, status, offset, limit):
+    changed_at = project_stats.changed_at.timestamp() if project_stats.changed_at else 0
+    return f"column:{project_stats.project_id}:{project_stats.version}:{changed_at}:{status}:{offset}:{limit}"
+
+
+def with_csrf(html, request):
+    return mark_safe(html.replace(CSRF_PLACEHOLDER, get_token(request)))
+
+
+def render_cards(tasks):
+    """
+    HTML kart zadań (z ``with_card_data``), z cache tam, gdzie karta się nie zmieniła.
+    """
+    cache = fragment_cache()
+    keys = [card_key(task) for task in tasks]
+    cached = cache.get_many(keys)
+
+    rendered = {}
+    for key, task in zip(keys, tasks):
+        if key not in cached:
+            rendered[key] = render_to_string("projects/task_card.html", {"task": task, "csrf_token": CSRF_PLACEHOLDER})
+    if rendered:
+        cache.set_many(rendered, get_config()["TIMEOUT"])
+
+    stats.record("card", len(keys) - len(rendered), len(rendered))
+    return [cached.get(key) or rendered[key] for key in keys]
+
+
+def render_column(project, column):
+    cards = [mark_safe(card) for card in render_cards(column.tasks)]
+    return render_to_string("projects/board_column.html", {"project": project, "column": column, "cards": cards})
+
+
+def card_html(task, request):
+    return with_csrf(render_cards([task])[0], request)
+
+
+def board_html(project, project_stats, request, limit=BOARD_COLUMN_LIMIT):
+    """
+    HTML wszystkich kolumn tablicy: {status: html}. Jeśli wszystkie kolumny są
+    w cache, tablica nie wykonuje żadnego zapytania o zadania. Zwraca też
+    załadowaną tablicę (albo None, gdy nie było potrzeby jej ładować).
+    """
+    cache = fragment_cache()
+    keys = {column_key(project_stats, status, 0, limit): status for status, _ in Task.STATUS_CHOICES}
+    cached = cache.get_many(keys)
+
+    board = None
+    rendered = {}
+    if len(cached) < len(keys):
+        board = load_board(project, limit=limit)
+        for key, status in keys.items():
+            if key not in cached:
+                rendered[key] = render_column(project, board[status])
+        cache.set_many(rendered, get_config()["TIMEOUT"])
+
+    stats.record("column", len(cached), len(rendered))
+    columns = {status: with_csrf(cached.get(key) or rendered[key], request) for key, status in keys.items()}
+    return columns, board
+
+
+def column_html(project, project_stats, status, request, offset=0, limit=BOARD_COLUMN_LIMIT):
+    """
+    HTML jednej kolumny (od ``offset``) - "Pokaż więcej" i odświeżanie tablicy na żywo.
+    """
+    cache = fragment_cache()
+    key = column_key(project_stats, status, offset, limit)
+    html = cache.get(key)
+    column = None
+    if html is None:
+        column = load_column(project, status, offset=offset, limit=limit)
+        html = render_column(project, column)
+        cache.set(key, html, get_config()["TIMEOUT"])
+    stats.record("column", int(column is None), int(column is not None))
+    return with_csrf(html, request), column
@@ -0,0 +1,82 @@
+"""
+Masowy import zadań do projektu (JSON lub CSV).
+"""
+
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import Task
+from .serializers import TaskImportSerializer
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def get_batch_size(requested=None):
+    default = getattr(settings, "TASK_IMPORT_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    try:
+        return max(1, min(int(requested), default * 10)) if requested else default
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+
+def team_members_lookup(project):
+    """
+    Jedno zapytanie: {login, "id:<ID>" lub ID jako tekst: ID} dla członków zespołu projektu.
+
+    Login może wyglądać jak ID innego członka - dokładny login ma wtedy
+    pierwszeństwo, a po ID można wskazać jednoznacznie przez prefiks ``id:``
+    (loginy Django nie mogą zawierać dwukropka).
+    """
+    members = list(project.team.members.values_list("id", "username"))
+    lookup = {}
+    for user_id, _ in members:
+        lookup[f"id:{user_id}"] = user_id
+        lookup[str(user_id)] = user_id
+    for user_id, username in members:
+        lookup[username] = user_id
+    return lookup
+
+
+def validate_rows(project, rows, batch_size):
+    """
+    Waliduje wiersze paczkami; zwraca (poprawne zadania, błędy per wiersz).
+    """
+    serializer = TaskImportSerializer(context={"members": team_members_lookup(project)})
+    tasks, errors = [], []
+    for start in range(0, len(rows), batch_size):
+        for index, row in enumerate(rows[start:start + batch_size], start=start):
+            try:
+                data = serializer.run_validation(row)
+            except ValidationError as exc:
+                errors.append({"row": index, "errors": exc.detail})
+                continue
+            assigned_to_id = data.pop("assigned_to", None)
+            tasks.append(Task(project=project, assigned_to_id=assigned_to_id, **data))
+    return tasks, errors
+
+
+def import_tasks(project, rows, partial=False, batch_size=None):
+    """
+    Tworzy zadania przez bulk_create w paczkach, w jednej transakcji.
+
+    Bez ``partial`` jakikolwiek błędny wiersz przerywa import (nic nie jest
+    zapisywane); z ``partial`` poprawne wiersze trafiają do bazy, a błędne
+    wracają w ``errors``.
+    """
+    batch_size = get_batch_size(batch_size)
+    tasks, errors = validate_rows(project, rows, batch_size)
+    if errors and not partial:
+        return ImportResult(errors=errors)
+
+    with transaction.atomic():
+        created = Task.objects.bulk_create(tasks, batch_size=batch_size)
+    return ImportResult(created=len(created), errors=errors)
@@ -0,0 +1,225 @@
+"""
+Zdarzenia tablicy Kanban na żywo (Server-Sent Events).
+
+Zmiany zadań i komentarzy są publikowane po zatwierdzeniu transakcji
+(``publish`` / ``publish_tasks``). Backend rozsyła je do procesów serwera,
+a w każdym procesie ``hub`` przekazuje zdarzenie do kolejek asyncio
+podłączonych klientów. Strumień SSE (``event_stream``) to zwykły async
+generator - tysiące bezczynnych połączeń to tysiące czekających korutyn,
+a nie wątków.
+
+Backendy:
+- LocalBackend - jeden proces (runserver, pojedynczy worker ASGI),
+- PostgresBackend - NOTIFY przy publikacji i wątek z LISTEN w każdym
+  procesie, dla wielu workerów za jednym load balancerem.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from itertools import count
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "BACKEND": "apps.projects.live.LocalBackend",
+    # Co ile sekund wysyłać komentarz SSE, żeby proxy nie zamykały bezczynnych połączeń
+    "HEARTBEAT": 15,
+    "QUEUE_SIZE": 100,
+    "CHANNEL": "board_events",
+    # Przy większej liczbie zmienionych zadań klient przeładowuje kolumny zamiast pojedynczych kart
+    "MAX_TASK_EVENTS": 50,
+}
+
+BOARD_REFRESH = "board.refresh"
+
+_backend = None
+_backend_lock = threading.Lock()
+_event_ids = count(1)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "LIVE_EVENTS", {})}
+
+
+class Subscription:
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def push(self, event):
+        # Wywoływane w pętli zdarzeń klienta (call_soon_threadsafe)
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Klient nie nadąża - zamiast gubić pojedyncze zdarzenia każemy mu odświeżyć tablicę
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": BOARD_REFRESH})
+
+
+class Hub:
+    """
+    Rozsyłanie zdarzeń do subskrybentów w bieżącym procesie (bezpieczne dla wątków).
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, project_id, maxsize=None):
+        subscription = Subscription(asyncio.get_running_loop(), maxsize or get_config()["QUEUE_SIZE"])
+        with self._lock:
+            self._subscribers[project_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, project_id, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(project_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[project_id]
+
+    def dispatch(self, project_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(project_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, event)
+            except RuntimeError:
+                # Pętla klienta już zamknięta - wypisze się w finally strumienia
+                pass
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+hub = Hub()
+
+
+class LocalBackend:
+    """
+    Zdarzenia trafiają tylko do klientów podłączonych do tego samego procesu.
+    """
+
+    def start(self):
+        pass
+
+    def publish(self, project_id, event):
+        hub.dispatch(project_id, event)
+
+
+class PostgresBackend:
+    """
+    pg_notify() przy publikacji; w każdym procesie wątek z własnym połączeniem
+    nasłuchuje (LISTEN) i przekazuje zdarzenia do ``hub``. Ładunek NOTIFY jest
+    ograniczony do 8000 bajtów, dlatego zdarzenia niosą tylko identyfikatory.
+    """
+
+    def __init__(self):
+        self.channel = get_config()["CHANNEL"]
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self.listen, name="board-events-listener", daemon=True)
+                self._thread.start()
+
+    def publish(self, project_id, event):
+        payload = json.dumps({"project": project_id, "event": event})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def stop(self):
+        self._stopped.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def listen(self):
+        while not self._stopped.is_set():
+            try:
+                # Sterownik jak w DATABASES (psycopg 3); brak modułu to też błąd do zalogowania
+                import psycopg
+
+                params = connection.get_connection_params()
+                with psycopg.connect(**params, autocommit=True) as listener:
+                    listener.execute(f'LISTEN "{self.channel}"')
+                    while not self._stopped.is_set():
+                        # Co 30 s wracamy sprawdzić, czy backend nie został zatrzymany
+                        for notify in listener.notifies(timeout=30):
+                            message = json.loads(notify.payload)
+                            hub.dispatch(message["project"], message["event"])
+            except Exception:
+                logger.exception("Nasłuch zdarzeń tablicy przerwany, ponowne połączenie za 5 s")
+                self._stopped.wait(5)
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(get_config()["BACKEND"])()
+        return _backend
+
+
+def publish(project_id, event_type, **data):
+    """
+    Publikuje zdarzenie projektu po zatwierdzeniu bieżącej transakcji.
+    """
+    event = {"type": event_type, **data}
+    transaction.on_commit(lambda: get_backend().publish(project_id, event))
+
+
+def publish_tasks(event_type, tasks):
+    """
+    Zdarzenia dla wielu zadań naraz: ``tasks`` to pary (task_id, project_id).
+    """
+    limit = get_config()["MAX_TASK_EVENTS"]
+    by_project = defaultdict(list)
+    for task_id, project_id in tasks:
+        by_project[project_id].append(task_id)
+    for project_id, task_ids in by_project.items():
+        if len(task_ids) > limit:
+            publish(project_id, BOARD_REFRESH)
+        else:
+            for task_id in task_ids:
+                publish(project_id, event_type, task=task_id)
+
+
+def format_event(event):
+    return f"id: {next(_event_ids)}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(project_id, heartbeat=None):
+    """
+    Strumień SSE dla jednego klienta tablicy projektu.
+    """
+    heartbeat = heartbeat or get_config()["HEARTBEAT"]
+    get_backend().start()
+    subscription = hub.subscribe(project_id)
+    try:
+        # Po ponownym połączeniu klient nie wie, co przegapił - "hello" każe mu zsynchronizować tablicę
+        yield "retry: 3000\n\n" + format_event({"type": "hello", "project": project_id})
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(project_id, subscription)
@@ -0,0 +1,134 @@
+"""
+Test obciążeniowy działającego serwera (``manage.py loadtest``).
+
+Wszyscy klienci (domyślnie 500) działają na jednej pętli asyncio i trzymają
+własne połączenia HTTP/1.1 keep-alive - tyle wątków, ile potrzebowałby
+benchmark.py, samo zaburzyłoby pomiar. Służy do porównania tych samych tras
+pod WSGI (gunicorn, pula wątków) i ASGI (uvicorn, widoki async).
+"""
+
+import asyncio
+import ssl
+import time
+import urllib.parse
+
+from .benchmark import summarize
+
+# Błąd połączenia lub przekroczony czas - w statystykach jako status 0
+CONNECTION_ERROR = 0
+
+
+class HttpClient:
+    """
+    Jedno połączenie keep-alive; po ``Connection: close`` lub błędzie łączy się ponownie.
+    """
+
+    def __init__(self, base_url, path, headers, timeout=30):
+        url = urllib.parse.urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if url.scheme == "https" else None
+        self.timeout = timeout
+        lines = [f"GET {url.path.rstrip('/')}{path} HTTP/1.1", f"Host: {url.netloc}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        self.message = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        self.reader = self.writer = None
+
+    async def request(self):
+        # Serwer mógł zamknąć bezczynne połączenie keep-alive - wtedy GET powtarzamy na nowym
+        attempts = 2 if self.writer is not None else 1
+        for _ in range(attempts):
+            try:
+                return await self.send()
+            except TimeoutError:
+                await self.close()
+                break
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                await self.close()
+        return CONNECTION_ERROR
+
+    async def send(self):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout
+            )
+        self.writer.write(self.message)
+        await self.writer.drain()
+        status, keep_alive = await asyncio.wait_for(read_response(self.reader), self.timeout)
+        if not keep_alive:
+            await self.close()
+        return status
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+async def read_response(reader):
+    """
+    Czyta odpowiedź (Content-Length, chunked lub do końca połączenia); zwraca (status, keep_alive).
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("serwer zamknął połączenie")
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+
+    keep_alive = headers.get("connection") != "close"
+    if status in (204, 304) or 100 <= status < 200:
+        pass
+    elif headers.get("transfer-encoding") == "chunked":
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            await reader.readexactly(size + 2)
+        # Ewentualne nagłówki końcowe aż do pustej linii
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        await reader.read()
+        keep_alive = False
+    return status, keep_alive
+
+
+async def run_load(route, base_url, headers, clients, requests, warmup=1, timeout=30):
+    """
+    ``requests`` żądań GET na ``route.path`` z ``clients`` równoczesnych połączeń; wynik jak w ``summarize``.
+    """
+    pool = [HttpClient(base_url, route.path, headers, timeout) for _ in range(clients)]
+    remaining = iter(range(requests))
+    samples = []
+
+    async def warm(client):
+        for _ in range(warmup):
+            await client.request()
+
+    async def worker(client):
+        while next(remaining, None) is not None:
+            start = time.perf_counter()
+            status = await client.request()
+            samples.append((time.perf_counter() - start, status, None))
+
+    try:
+        # Połączenia otwarte przed pomiarem - liczy się obsługa żądań, nie nawiązywanie połączeń
+        await asyncio.gather(*(warm(client) for client in pool))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for client in pool))
+        wall_time = time.perf_counter() - started
+    finally:
+        await asyncio.gather(*(client.close() for client in pool))
+
+    result = summarize(route, samples, wall_time)
+    result["clients"] = clients
+    result["connection_errors"] = sum(1 for _, status, _ in samples if status == CONNECTION_ERROR)
+    result["errors"] += result["connection_errors"]
+    return result
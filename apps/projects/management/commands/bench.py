@@ -0,0 +1,132 @@
+import json
+import subprocess
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.metrics.registry import registry
+from apps.projects.benchmark import (
+    ClientRunner,
+    Fixtures,
+    HttpRunner,
+    compare,
+    dataset_size,
+    discover_routes,
+    run_route,
+)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Mierzy wszystkie trasy HTML i API z config/urls.py (GET) na bieżących danych, np. z `seed_perf`. "
+        "Wynik (p50/p95/p99, zapytania na żądanie, przepustowość) jako JSON do porównywania między commitami."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Nazwa użytkownika (domyślnie właściciel zespołu z największym projektem)")
+        parser.add_argument("--requests", type=int, default=50, help="Liczba żądań na trasę")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--warmup", type=int, default=2, help="Żądania rozgrzewające (nie wliczane)")
+        parser.add_argument("--route", action="append", dest="routes", help="Tylko ta trasa (wielokrotnie)")
+        parser.add_argument("--exclude", action="append", default=[], help="Pomiń trasę (wielokrotnie)")
+        parser.add_argument(
+            "--base-url", help="Adres działającego serwera, np. http://127.0.0.1:8000 (domyślnie testowy klient)"
+        )
+        parser.add_argument("--password", default="password123", help="Hasło użytkownika przy --base-url")
+        parser.add_argument("--output", help="Plik na wynik JSON (domyślnie stdout)")
+        parser.add_argument("--baseline", help="Wynik JSON z innego commita do porównania")
+
+    def handle(self, *args, **options):
+        user = self.pick_user(options["user"])
+        fixtures = Fixtures.for_user(user)
+        if fixtures is None:
+            raise CommandError(f"Użytkownik {user.username} nie ma projektów z zadaniami")
+        routes = discover_routes(fixtures, include=options["routes"], exclude=options["exclude"])
+        if not routes:
+            raise CommandError("Brak tras do zmierzenia")
+
+        if options["base_url"]:
+            runner = HttpRunner(options["base_url"], user.username, options["password"])
+        else:
+            runner = ClientRunner(user)
+
+        results = {
+            "meta": {
+                "commit": git_commit(),
+                "started_at": timezone.now().isoformat(),
+                "mode": "http" if options["base_url"] else "client",
+                "database": connection.vendor,
+                "db_connection_mode": getattr(settings, "DB_CONNECTION_MODE", None),
+                "user": user.username,
+                "requests_per_route": options["requests"],
+                "concurrency": options["concurrency"],
+                "dataset": dataset_size(),
+                "skipped": fixtures.skipped,
+            },
+            "routes": {},
+        }
+
+        connections_before = self.connections_opened()
+        started = time.perf_counter()
+        # Testowy klient wysyła Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for route in routes:
+                self.stderr.write(f"{route.name} {route.path}")
+                results["routes"][route.name] = run_route(
+                    runner, route, options["requests"], options["concurrency"], warmup=options["warmup"]
+                )
+        results["meta"]["duration_s"] = round(time.perf_counter() - started, 2)
+        # Połączenia otwarte przez Django w tym procesie (przy --base-url - tylko po stronie benchmarku)
+        results["meta"]["db_connections_opened"] = self.connections_opened() - connections_before
+
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                results["baseline_delta"] = compare(results, json.load(f))
+
+        output = json.dumps(results, indent=2, sort_keys=True, ensure_ascii=False)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+            self.write_table(results)
+        else:
+            self.stdout.write(output)
+
+    def connections_opened(self):
+        counters = registry.snapshot()["counters"]
+        return int(sum(value for name, _, value in counters if name == "django_db_connections_total"))
+
+    def pick_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"Nie ma użytkownika {username}")
+        fixtures_user = User.objects.filter(owned_teams__projects__tasks__isnull=False).order_by("pk").first()
+        if fixtures_user is None:
+            raise CommandError("Brak danych do pomiaru - uruchom najpierw `manage.py seed_perf`")
+        return fixtures_user
+
+    def write_table(self, results):
+        deltas = results.get("baseline_delta", {})
+        self.stdout.write(f"{'trasa':<28} {'p50':>8} {'p95':>8} {'p99':>8} {'zapytania':>10} {'rps':>8}  zmiana p95")
+        for name, route in sorted(results["routes"].items()):
+            delta = deltas.get(name, {}).get("p95_ms")
+            self.stdout.write(
+                f"{name:<28} {route['p50_ms']:>8} {route['p95_ms']:>8} {route['p99_ms']:>8} "
+                f"{route['queries_per_request'] if route['queries_per_request'] is not None else '-':>10} "
+                f"{route['throughput_rps']:>8}  {'' if delta is None else f'{delta:+}'}"
+            )
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from apps.projects.models import AttachmentBlob, Task
+from apps.projects.storage import CAS_PREFIX, attachment_storage, is_blob_name
+
+
+def walk_blobs(storage, path=CAS_PREFIX):
+    if not storage.exists(path):
+        return
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield f"{path}/{name}"
+    for directory in directories:
+        yield from walk_blobs(storage, f"{path}/{directory}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Przelicza referencje do załączników na podstawie zadań i usuwa pliki, "
+        "których nie używa już żadne zadanie."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Tylko raportuj, nic nie usuwaj")
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=None,
+            help="Pomijaj pliki zmodyfikowane w ostatnich N sekundach (domyślnie ATTACHMENT_GC_GRACE_SECONDS)",
+        )
+
+    def handle(self, *args, dry_run=False, grace=None, **options):
+        if grace is None:
+            grace = settings.ATTACHMENT_GC_GRACE_SECONDS
+        storage = attachment_storage()
+
+        # Zapisy przez queryset.update() omijają sygnały - liczniki odtwarzamy z zadań
+        with transaction.atomic():
+            references = {
+                row["attachment"]: row["count"]
+                for row in Task.objects.exclude(attachment="").exclude(attachment__isnull=True)
+                .values("attachment").annotate(count=Count("id")).order_by()
+                if is_blob_name(row["attachment"])
+            }
+            referenced = set(references)
+            fixed = 0
+            for blob in AttachmentBlob.objects.select_for_update():
+                actual = references.pop(blob.name, 0)
+                if blob.ref_count != actual:
+                    fixed += 1
+                    self.stdout.write(self.style.WARNING(f"{blob.name}: referencje {blob.ref_count} -> {actual}"))
+                    blob.ref_count = actual
+                    blob.save(update_fields=["ref_count"])
+            for name, count in references.items():
+                if storage.exists(name):
+                    fixed += 1
+                    self.stdout.write(self.style.WARNING(f"{name}: brak wpisu, referencje {count}"))
+                    AttachmentBlob.objects.create(name=name, ref_count=count, size=storage.size(name))
+            if dry_run:
+                transaction.set_rollback(True)
+
+        if dry_run:
+            unused = [
+                name for name in AttachmentBlob.objects.filter(ref_count__lte=0).values_list("pk", flat=True)
+                if not storage.modified_within(name, grace)
+            ]
+        else:
+            unused = AttachmentBlob.objects.collect(grace_seconds=grace)
+
+        # Pliki bez wpisu w bazie, np. po przerwanym zapisie zadania
+        known = referenced | set(AttachmentBlob.objects.values_list("pk", flat=True))
+        orphans = [
+            name for name in walk_blobs(storage)
+            if name not in known and not storage.modified_within(name, grace)
+        ]
+        if not dry_run:
+            for name in orphans:
+                storage.delete(name)
+
+        for name in unused + orphans:
+            self.stdout.write(f"Usunięto {name}" if not dry_run else f"Do usunięcia: {name}")
+
+        summary = f"Poprawiono liczników: {fixed}, nieużywane pliki: {len(unused)}, osierocone pliki: {len(orphans)}"
+        if dry_run:
+            summary += " (dry-run, nic nie zmieniono)"
+        self.stdout.write(self.style.SUCCESS(summary))
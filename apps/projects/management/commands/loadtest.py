@@ -0,0 +1,108 @@
+import asyncio
+import json
+import time
+
+from django.core.management.base import CommandError
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.projects.benchmark import Fixtures, Route, compare
+from apps.projects.loadtest import run_load
+
+from .bench import Command as BenchCommand
+from .bench import git_commit
+
+
+class Command(BenchCommand):
+    help = (
+        "Test obciążeniowy działającego serwera: setki równoczesnych klientów HTTP/1.1 (keep-alive) "
+        "na trasach API. Uruchom raz pod WSGI (gunicorn) i raz pod ASGI (uvicorn), a wyniki porównaj --baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", required=True, help="Adres serwera, np. http://127.0.0.1:8000")
+        parser.add_argument("--user", help="Nazwa użytkownika (domyślnie właściciel zespołu z największym projektem)")
+        parser.add_argument(
+            "--route",
+            action="append",
+            dest="routes",
+            help="Trasa API (wielokrotnie; domyślnie api_my_tasks i api-project-stats)",
+        )
+        parser.add_argument("--clients", type=int, default=500, help="Równoczesne połączenia")
+        parser.add_argument("--requests", type=int, default=5000, help="Liczba żądań na trasę")
+        parser.add_argument("--warmup", type=int, default=1, help="Żądania rozgrzewające na klienta (nie wliczane)")
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--server", help="Opis serwera do wyniku, np. gunicorn-wsgi albo uvicorn-asgi")
+        parser.add_argument("--output", help="Plik na wynik JSON (domyślnie stdout)")
+        parser.add_argument("--baseline", help="Wynik JSON innego przebiegu (np. WSGI) do porównania")
+
+    def handle(self, *args, **options):
+        user = self.pick_user(options["user"])
+        fixtures = Fixtures.for_user(user)
+        if fixtures is None:
+            raise CommandError(f"Użytkownik {user.username} nie ma projektów z zadaniami")
+
+        routes = []
+        for name in options["routes"] or ["api_my_tasks", "api-project-stats"]:
+            kwargs = fixtures.kwargs_for(name, ["pk"] if name == "api-project-stats" else [])
+            routes.append(Route(name, reverse(name, kwargs=kwargs)))
+
+        # Token wystawiony lokalnie - serwer musi mieć ten sam SECRET_KEY i bazę
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}", "Accept": "application/json"}
+        results = {
+            "meta": {
+                "commit": git_commit(),
+                "started_at": timezone.now().isoformat(),
+                "mode": "load",
+                "server": options["server"],
+                "base_url": options["base_url"],
+                "user": user.username,
+                "clients": options["clients"],
+                "requests_per_route": options["requests"],
+            },
+            "routes": {},
+        }
+
+        started = time.perf_counter()
+        for route in routes:
+            self.stderr.write(f"{route.name} {route.path}")
+            results["routes"][route.name] = asyncio.run(
+                run_load(
+                    route,
+                    options["base_url"],
+                    headers,
+                    options["clients"],
+                    options["requests"],
+                    warmup=options["warmup"],
+                    timeout=options["timeout"],
+                )
+            )
+        results["meta"]["duration_s"] = round(time.perf_counter() - started, 2)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                results["baseline_delta"] = compare(results, json.load(f))
+
+        output = json.dumps(results, indent=2, sort_keys=True, ensure_ascii=False)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+            self.write_table(results)
+        else:
+            self.stdout.write(output)
+
+    def write_table(self, results):
+        deltas = results.get("baseline_delta", {})
+        self.stdout.write(f"{'trasa':<28} {'p50':>8} {'p95':>8} {'p99':>8} {'błędy':>7} {'rps':>8}  zmiana p95 / rps")
+        for name, route in sorted(results["routes"].items()):
+            delta = deltas.get(name, {})
+            change = (
+                f"{delta['p95_ms']:+} / {delta['throughput_rps']:+}"
+                if delta.get("p95_ms") is not None and delta.get("throughput_rps") is not None
+                else ""
+            )
+            self.stdout.write(
+                f"{name:<28} {route['p50_ms']:>8} {route['p95_ms']:>8} {route['p99_ms']:>8} "
+                f"{route['errors']:>7} {route['throughput_rps']:>8}  {change}"
+            )
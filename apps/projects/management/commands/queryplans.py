@@ -0,0 +1,159 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from apps.projects.board import BOARD_COLUMN_LIMIT, board_queryset, board_window_queryset
+from apps.projects.dashboard import get_config as dashboard_config
+from apps.projects.dashboard import open_tasks, teams_with_member_counts
+from apps.projects.membership import get_team_ids
+from apps.projects.models import Task, Team
+from apps.projects.pagination import TaskKeysetPagination
+from apps.projects.seeding import seed_dataset
+from apps.projects.views import MyTaskListView, ProjectListView, TaskDetailView
+
+SEQ_SCAN = "seq-scan"
+TEMP_SORT = "temp-sort"
+
+PG_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+PG_SORT = re.compile(r"^\s*(->\s+)?Sort\s+\(")
+
+
+def view_queryset(view_class, user, params=None, api=False, **kwargs):
+    """
+    Queryset zbudowany dokładnie tak, jak robi to widok dla danego użytkownika.
+    """
+    request = RequestFactory().get("/", params or {})
+    request.user = user
+    view = view_class()
+    view.setup(request, **kwargs)
+    if api:
+        view.request = Request(request)
+        view.request.user = user
+    return view.get_queryset()
+
+
+def canonical_querysets(user, project, task):
+    """
+    Zapytania z gorących ścieżek apps/projects/views.py: (nazwa, queryset, dopuszczalne flagi).
+    """
+    page_size = TaskKeysetPagination.page_size + 1
+    return [
+        ("membership: zespoły użytkownika", Team.members.through.objects.filter(user_id=user.pk), set()),
+        ("DashboardView: moje zadania", open_tasks(user)[: dashboard_config()["TASK_LIMIT"]], set()),
+        ("DashboardView: zespoły", teams_with_member_counts(get_team_ids(user)), {TEMP_SORT}),
+        ("ProjectListView", view_queryset(ProjectListView, user), set()),
+        # Zewnętrzne ORDER BY sortuje najwyżej 3 * (limit + 1) wierszy już przyciętych funkcją okna
+        ("ProjectDetailView: tablica", board_window_queryset(project), {TEMP_SORT}),
+        (
+            "ProjectBoardColumnView: pokaż więcej",
+            board_queryset(project).filter(status="todo")[BOARD_COLUMN_LIMIT:2 * BOARD_COLUMN_LIMIT + 1],
+            set(),
+        ),
+        ("MyTaskListView", view_queryset(MyTaskListView, user, api=True)[:page_size], set()),
+        (
+            "MyTaskListView ?status=todo",
+            view_queryset(MyTaskListView, user, {"status": "todo"}, api=True)[:page_size],
+            set(),
+        ),
+        ("TaskDetailView", view_queryset(TaskDetailView, user).filter(pk=task.pk), set()),
+        ("TaskDetailView: komentarze", task.comments.all().order_by("created_at"), set()),
+        (
+            "update_task_status",
+            Task.objects.filter(pk=task.pk, project__team_id__in=get_team_ids(user)),
+            set(),
+        ),
+    ]
+
+
+def explain(queryset):
+    """
+    Plan zapytania jako lista linii tekstu.
+
+    Budujemy EXPLAIN ręcznie zamiast QuerySet.explain(), bo ten nie obsługuje
+    zapytań filtrowanych po funkcji okna (opakowanych w podzapytanie).
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+        rows = cursor.fetchall()
+    return [str(row[-1]) for row in rows]
+
+
+def plan_flags(lines, tables):
+    flags = set()
+    for line in lines:
+        if connection.vendor == "sqlite":
+            if line.startswith("SCAN ") and "USING" not in line and line.split()[1] in tables:
+                flags.add(SEQ_SCAN)
+            if "USE TEMP B-TREE" in line:
+                flags.add(TEMP_SORT)
+        elif connection.vendor == "postgresql":
+            match = PG_SEQ_SCAN.search(line)
+            if match and match.group(1) in tables:
+                flags.add(SEQ_SCAN)
+            if PG_SORT.search(line):
+                flags.add(TEMP_SORT)
+    return flags
+
+
+class Command(BaseCommand):
+    help = (
+        "Uruchamia EXPLAIN dla kanonicznych zapytań z apps/projects/views.py na wygenerowanych danych "
+        "i zgłasza pełne skany tabel oraz sortowania w pamięci tymczasowej."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teams", type=int, default=20)
+        parser.add_argument("--projects-per-team", type=int, default=3)
+        parser.add_argument("--tasks-per-project", type=int, default=300)
+        parser.add_argument("--comments-per-task", type=int, default=2)
+        parser.add_argument("--verbose-plans", action="store_true", help="Wypisz pełne plany zapytań")
+        parser.add_argument("--strict", action="store_true", help="Zakończ błędem, jeśli jakieś zapytanie ma flagi")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            raise CommandError(f"Nieobsługiwana baza danych: {connection.vendor}")
+
+        with transaction.atomic():
+            data = seed_dataset(
+                teams=options["teams"],
+                projects_per_team=options["projects_per_team"],
+                tasks_per_project=options["tasks_per_project"],
+                comments_per_task=options["comments_per_task"],
+                prefix="queryplans",
+            )
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            self.stdout.write(
+                f"Wygenerowano {data.tasks} zadań i {data.comments} komentarzy w {len(data.projects)} projektach"
+            )
+
+            project = data.projects[0]
+            user = project.team.owner
+            task = project.tasks.order_by("id").first()
+            tables = set(connection.introspection.table_names())
+
+            problems = 0
+            for name, queryset, allowed in canonical_querysets(user, project, task):
+                lines = explain(queryset)
+                flags = plan_flags(lines, tables)
+                unexpected = flags - allowed
+                if unexpected:
+                    problems += 1
+                    self.stdout.write(self.style.WARNING(f"[UWAGA] {name}: {', '.join(sorted(unexpected))}"))
+                else:
+                    accepted = f" (dopuszczone: {', '.join(sorted(flags))})" if flags else ""
+                    self.stdout.write(self.style.SUCCESS(f"[OK] {name}{accepted}"))
+                if unexpected or options["verbose_plans"]:
+                    for line in lines:
+                        self.stdout.write(f"    {line}")
+
+            # Dane testowe nie zostają w bazie
+            transaction.set_rollback(True)
+
+        if problems and options["strict"]:
+            raise CommandError(f"Zapytania bez pokrycia indeksami: {problems}")
+        self.stdout.write(f"Zapytania z problemami: {problems}")
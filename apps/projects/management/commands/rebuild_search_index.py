@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.projects.models import Comment, SearchEntry, Task
+from apps.projects.search import SQLITE_FTS_TABLE, backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Uzupełnia indeks wyszukiwania o zadania i komentarze, które nie mają jeszcze wpisów "
+        "(np. dane sprzed wprowadzenia wyszukiwarki). Z --rebuild indeksuje wszystko od zera."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Usuń indeks i zbuduj go od nowa")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, rebuild=False, batch_size=2000, **options):
+        if rebuild:
+            with transaction.atomic():
+                SearchEntry.objects.all().delete()
+                if backend() == "sqlite":
+                    # Tabela FTS5 z zewnętrzną treścią - odbudowa z pustej tabeli wpisów
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+
+        indexed_tasks = SearchEntry.objects.filter(comment__isnull=True).values("task_id")
+        tasks = self.backfill(
+            Task.objects.exclude(pk__in=indexed_tasks), SearchEntry.objects.index_tasks, batch_size
+        )
+        indexed_comments = SearchEntry.objects.filter(comment__isnull=False).values("comment_id")
+        comments = self.backfill(
+            Comment.objects.exclude(pk__in=indexed_comments), SearchEntry.objects.index_comments, batch_size
+        )
+        self.stdout.write(self.style.SUCCESS(f"Zaindeksowano zadań: {tasks}, komentarzy: {comments}"))
+
+    def backfill(self, queryset, index, batch_size):
+        # Klucze po id, żeby kolejne paczki nie skanowały już przetworzonych wierszy
+        total, last_id = 0, 0
+        while ids := list(
+            queryset.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        ):
+            index(ids)
+            total += len(ids)
+            last_id = ids[-1]
+            self.stdout.write(f"  ... {total}")
+        return total
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.projects.models import ProjectStats
+
+
+class Command(BaseCommand):
+    help = "Przelicza od zera liczniki ProjectStats i raportuje rozbieżności."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, action="append", dest="projects", help="ID projektu (wielokrotnie)")
+        parser.add_argument("--dry-run", action="store_true", help="Tylko raportuj, nie zapisuj poprawek")
+
+    def handle(self, *args, projects=None, dry_run=False, **options):
+        stored = {
+            stats.project_id: stats.counters()
+            for stats in ProjectStats.objects.filter(**({"project_id__in": projects} if projects else {}))
+        }
+
+        with transaction.atomic():
+            rebuilt = ProjectStats.objects.rebuild(projects)
+            drifted = 0
+            for project_id, stats in rebuilt.items():
+                actual = stats.counters()
+                before = stored.get(project_id)
+                if before is None:
+                    self.stdout.write(f"Projekt {project_id}: brak liczników, utworzono")
+                    drifted += 1
+                    continue
+                diff = {field: (before[field], value) for field, value in actual.items() if before[field] != value}
+                if diff:
+                    drifted += 1
+                    details = ", ".join(f"{field}: {old} -> {new}" for field, (old, new) in diff.items())
+                    self.stdout.write(self.style.WARNING(f"Projekt {project_id}: {details}"))
+
+            if dry_run:
+                transaction.set_rollback(True)
+
+        summary = f"Sprawdzono {len(rebuilt)} projektów, rozbieżności: {drifted}"
+        if dry_run:
+            summary += " (dry-run, nic nie zapisano)"
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,59 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.projects.seeding import seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Generuje syntetyczny zbiór danych w skali produkcyjnej (bulk_create w paczkach) "
+        "do lokalnych pomiarów wydajności, np. `manage.py bench`. Wszystkie konta mają hasło password123."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teams", type=int, default=100)
+        parser.add_argument("--members-per-team", type=int, default=8)
+        parser.add_argument("--projects-per-team", type=int, default=5)
+        parser.add_argument("--tasks", type=int, default=500, help="Średnia liczba zadań w projekcie")
+        parser.add_argument("--comments", type=int, default=3, help="Średnia liczba komentarzy do zadania")
+        parser.add_argument(
+            "--skew", type=float, default=1.1, help="Wykładnik rozkładu Zipfa (0 - wszystkie projekty równe)"
+        )
+        parser.add_argument("--prefix", default="perf", help="Prefiks nazw użytkowników, zespołów i projektów")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0, help="Ziarno generatora (te same dane przy tym samym)")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{prefix}_user_").exists():
+            raise CommandError(f"Dane z prefiksem {prefix!r} już istnieją - użyj innego --prefix")
+
+        started = time.monotonic()
+
+        def progress(data):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"  ... zadania: {data.tasks}, komentarze: {data.comments} ({elapsed:.0f} s)")
+
+        data = seed_dataset(
+            teams=options["teams"],
+            members_per_team=options["members_per_team"],
+            projects_per_team=options["projects_per_team"],
+            tasks_per_project=options["tasks"],
+            comments_per_task=options["comments"],
+            prefix=prefix,
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+            skew=options["skew"],
+            progress=progress,
+        )
+        elapsed = time.monotonic() - started
+        rows = len(data.users) + len(data.teams) + len(data.projects) + data.tasks + data.comments
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wygenerowano {len(data.users)} użytkowników, {len(data.teams)} zespołów, "
+                f"{len(data.projects)} projektów, {data.tasks} zadań i {data.comments} komentarzy "
+                f"w {elapsed:.1f} s ({rows / max(elapsed, 0.001):.0f} wierszy/s)"
+            )
+        )
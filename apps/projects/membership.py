@@ -0,0 +1,154 @@
+"""
+Serwis członkostwa w zespołach.
+
+Zbiór ID zespołów użytkownika trzymamy w lokalnym (per proces) LRU,
+opcjonalnie wspartym wspólnym cache Django (``TEAM_MEMBERSHIP_CACHE["SHARED_CACHE"]``).
+Wpisy są unieważniane sygnałami (m2m_changed na Team.members, usunięcie
+zespołu lub użytkownika) w bieżącym procesie i we wspólnym cache; lokalne
+LRU innych procesów wygasają po ``LOCAL_TTL`` sekundach.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+
+from apps.common.cache import LRUCache
+
+from .models import Team
+
+DEFAULTS = {
+    "MAX_USERS": 10000,
+    "LOCAL_TTL": 30,
+    "SHARED_CACHE": None,
+    "SHARED_TTL": 300,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "TEAM_MEMBERSHIP_CACHE", {})}
+
+
+_config = get_config()
+_local = LRUCache(_config["MAX_USERS"], ttl=_config["LOCAL_TTL"])
+
+
+def _shared_cache():
+    alias = get_config()["SHARED_CACHE"]
+    return caches[alias] if alias else None
+
+
+def _cache_key(user_id):
+    return f"team-membership:{user_id}"
+
+
+def _store(user_id, team_ids):
+    _local.set(user_id, team_ids)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(_cache_key(user_id), team_ids, get_config()["SHARED_TTL"])
+
+
+def _membership_rows(user):
+    # Zawsze z bazy głównej: replika z opóźnieniem zostawiłaby w cache członkostwo sprzed zmiany na cały TTL
+    rows = Team.members.through.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user.pk)
+    return rows.values_list("team_id", flat=True)
+
+
+def get_team_ids(user):
+    """
+    Zbiór (frozenset) ID zespołów, do których należy użytkownik.
+    """
+    if not getattr(user, "is_authenticated", False):
+        return frozenset()
+
+    team_ids = _local.get(user.pk)
+    if team_ids is not None:
+        return team_ids
+
+    shared = _shared_cache()
+    if shared is not None:
+        team_ids = shared.get(_cache_key(user.pk))
+        if team_ids is not None:
+            _local.set(user.pk, team_ids)
+            return team_ids
+
+    team_ids = frozenset(_membership_rows(user))
+    # Wewnątrz transakcji zapisujemy dopiero po commit - inaczej wycofana
+    # zmiana członkostwa mogłaby zostać w cache.
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _store(user.pk, team_ids))
+    else:
+        _store(user.pk, team_ids)
+    return team_ids
+
+
+async def aget_team_ids(user):
+    """
+    ``get_team_ids`` dla widoków async - trafienie w cache bez wątku, odczyt z bazy przez async ORM.
+    """
+    if not getattr(user, "is_authenticated", False):
+        return frozenset()
+
+    team_ids = _local.get(user.pk)
+    if team_ids is not None:
+        return team_ids
+
+    shared = _shared_cache()
+    if shared is not None:
+        team_ids = await shared.aget(_cache_key(user.pk))
+        if team_ids is not None:
+            _local.set(user.pk, team_ids)
+            return team_ids
+
+    team_ids = frozenset([team_id async for team_id in _membership_rows(user)])
+    _local.set(user.pk, team_ids)
+    if shared is not None:
+        await shared.aset(_cache_key(user.pk), team_ids, get_config()["SHARED_TTL"])
+    return team_ids
+
+
+def team_id_for(obj):
+    """
+    ID zespołu, do którego należy obiekt (Team, Project, Task, Comment).
+    """
+    if isinstance(obj, Team):
+        return obj.pk
+    if hasattr(obj, "team_id"):
+        return obj.team_id
+    if hasattr(obj, "project"):
+        return obj.project.team_id
+    if hasattr(obj, "task"):
+        return obj.task.project.team_id
+    return None
+
+
+def is_team_member(user, obj):
+    """
+    Czy użytkownik należy do zespołu ``obj`` (zespół, obiekt w zespole lub ID zespołu).
+    """
+    team_id = obj if isinstance(obj, int) else team_id_for(obj)
+    return team_id is not None and team_id in get_team_ids(user)
+
+
+def _forget(user_ids):
+    shared = _shared_cache()
+    for user_id in user_ids:
+        _local.delete(user_id)
+    if shared is not None:
+        shared.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate(*user_ids):
+    """
+    Usuwa wpisy użytkowników od razu i ponownie po zatwierdzeniu transakcji,
+    żeby równoległe odczyty nie zapisały stanu sprzed zmiany.
+    """
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    if not user_ids:
+        return
+    _forget(user_ids)
+    transaction.on_commit(lambda: _forget(user_ids))
+
+
+def clear():
+    _local.clear()
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:57
+
+import apps.projects.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_projectstats_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='attachment_name',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Nazwa załącznika'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='attachment',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=apps.projects.storage.attachment_storage, upload_to='attachments/'),
+        ),
+    ]
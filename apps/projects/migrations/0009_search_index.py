@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+# Postgres: tsvector liczony przez bazę (kolumna generowana) + indeks GIN.
+# Tytuł zadania ma wagę A, opis B, treść komentarza C.
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE projects_searchentry ADD COLUMN vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(
+            to_tsvector('simple'::regconfig, coalesce(content, '')),
+            CASE WHEN comment_id IS NULL THEN 'B' ELSE 'C' END::"char"
+        )
+    ) STORED
+    """,
+    "CREATE INDEX projects_searchentry_vector_idx ON projects_searchentry USING gin (vector)",
+]
+POSTGRES_BACKWARD = ["ALTER TABLE projects_searchentry DROP COLUMN vector"]
+
+# SQLite: tabela FTS5 z zewnętrzną treścią, synchronizowana wyzwalaczami.
+# team_id jest w indeksie jako token, więc filtr zespołów zawęża dopasowanie już w FTS5.
+# Uwaga: przebudowa tabeli projects_searchentry przez migracje usuwa wyzwalacze.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE projects_searchentry_fts USING fts5(
+        title, content, team_id, content='projects_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER projects_searchentry_ai AFTER INSERT ON projects_searchentry BEGIN
+        INSERT INTO projects_searchentry_fts(rowid, title, content, team_id)
+        VALUES (new.id, new.title, new.content, new.team_id);
+    END
+    """,
+    """
+    CREATE TRIGGER projects_searchentry_ad AFTER DELETE ON projects_searchentry BEGIN
+        INSERT INTO projects_searchentry_fts(projects_searchentry_fts, rowid, title, content, team_id)
+        VALUES ('delete', old.id, old.title, old.content, old.team_id);
+    END
+    """,
+    """
+    CREATE TRIGGER projects_searchentry_au AFTER UPDATE OF title, content, team_id ON projects_searchentry BEGIN
+        INSERT INTO projects_searchentry_fts(projects_searchentry_fts, rowid, title, content, team_id)
+        VALUES ('delete', old.id, old.title, old.content, old.team_id);
+        INSERT INTO projects_searchentry_fts(rowid, title, content, team_id)
+        VALUES (new.id, new.title, new.content, new.team_id);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS projects_searchentry_ai",
+    "DROP TRIGGER IF EXISTS projects_searchentry_ad",
+    "DROP TRIGGER IF EXISTS projects_searchentry_au",
+    "DROP TABLE IF EXISTS projects_searchentry_fts",
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        run_statements(schema_editor, POSTGRES_FORWARD)
+    elif vendor == "sqlite":
+        try:
+            run_statements(schema_editor, SQLITE_FORWARD)
+        except OperationalError:
+            # SQLite bez FTS5 - wyszukiwanie użyje zwykłego LIKE
+            run_statements(schema_editor, SQLITE_BACKWARD)
+
+
+def drop_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        run_statements(schema_editor, POSTGRES_BACKWARD)
+    elif vendor == "sqlite":
+        run_statements(schema_editor, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_attachment_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.TextField(blank=True)),
+                ('content', models.TextField(blank=True)),
+                ('comment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='projects.comment')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='projects.task')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='projects.team')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('comment__isnull', True)), fields=('task',), name='searchentry_task_uniq'), models.UniqueConstraint(fields=('comment',), name='searchentry_comment_uniq')],
+            },
+        ),
+        migrations.RunPython(create_fulltext, drop_fulltext),
+    ]
@@ -1,5 +1,15 @@
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from . import dashboard
+from .live import publish_tasks
+from .storage import attachment_storage, is_blob_name
 
 
 class Team(models.Model):
@@ -20,6 +30,92 @@ class Project(models.Model):
         return self.name
 
 
+class TaskQuerySet(models.QuerySet):
+    """
+    QuerySet.update() i bulk_create() nie wysyłają sygnałów, więc same
+    przeliczają liczniki ProjectStats, podbijają wersję projektów, których
+    dotknęły, aktualizują indeks wyszukiwania, publikują zdarzenia tablicy
+    i unieważniają podsumowania na dashboardach przypisanych użytkowników.
+    """
+
+    def update(self, **kwargs):
+        # Jak auto_now przy save() - walidatory ETag opierają się na updated_at
+        kwargs.setdefault("updated_at", timezone.now())
+
+        with transaction.atomic(using=self.db):
+            # Zapamiętujemy zadania przed UPDATE - filtr querysetu może przestać do nich pasować
+            rows_before = list(self.values_list("pk", "project_id", "assigned_to_id"))
+            tasks = [(pk, project_id) for pk, project_id, _ in rows_before]
+            project_ids = {project_id for _, project_id in tasks}
+            task_ids = [pk for pk, _ in tasks]
+            tracked = ProjectStats.TRACKED_FIELDS.intersection(kwargs)
+            if tracked:
+                # Tylko zmienione zadania, a nie pełne COUNT po projektach (rebuild)
+                changed = self.model._default_manager.using(self.db).filter(pk__in=task_ids)
+                before = changed.stats_counters()
+            rows = super().update(**kwargs)
+            new_project = kwargs.get("project", kwargs.get("project_id"))
+            if new_project is not None:
+                new_project_id = getattr(new_project, "pk", new_project)
+                project_ids.add(new_project_id)
+            if tracked:
+                after = changed.stats_counters()
+                for project_id in project_ids:
+                    delta = Counter(after.get(project_id))
+                    delta.subtract(before.get(project_id, {}))
+                    # apply_delta() podbija też wersję, także przy zerowej różnicy
+                    ProjectStats.objects.apply_delta(project_id, delta)
+            else:
+                ProjectStats.objects.touch(project_ids)
+            if SearchEntry.TASK_FIELDS.intersection(kwargs):
+                SearchEntry.objects.index_tasks(task_ids)
+                if new_project is not None:
+                    SearchEntry.objects.sync_teams(task_ids=task_ids)
+            if new_project is None:
+                publish_tasks("task.updated", tasks)
+            else:
+                publish_tasks("task.deleted", [pair for pair in tasks if pair[1] != new_project_id])
+                publish_tasks("task.created", [(pk, new_project_id) for pk in task_ids])
+            new_assignee = kwargs.get("assigned_to", kwargs.get("assigned_to_id"))
+            dashboard.invalidate(getattr(new_assignee, "pk", new_assignee), *(user_id for *_, user_id in rows_before))
+        return rows
+
+    def stats_counters(self):
+        """
+        Wkład zadań w liczniki ProjectStats: {project_id: Counter}, zbiorczo
+        jak Task.stats_counters() - jedno zapytanie grupujące.
+        """
+        today = timezone.localdate()
+        rows = (
+            self.order_by()
+            .values("project_id", "status", "priority")
+            .annotate(total=Count("id"), overdue=Count("id", filter=Q(due_date__lt=today) & ~Q(status="done")))
+        )
+        result = {}
+        for row in rows:
+            counters = result.setdefault(row["project_id"], Counter())
+            counters.update(
+                {
+                    "total": row["total"],
+                    f"status_{row['status']}": row["total"],
+                    f"priority_{row['priority']}": row["total"],
+                    "overdue": row["overdue"],
+                }
+            )
+        return result
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            project_ids = {task.project_id for task in created}
+            ProjectStats.objects.rebuild(project_ids)
+            ProjectStats.objects.touch(project_ids)
+            SearchEntry.objects.index_tasks(task.pk for task in created if task.pk is not None)
+            publish_tasks("task.created", [(task.pk, task.project_id) for task in created if task.pk is not None])
+            dashboard.invalidate(*(task.assigned_to_id for task in created))
+        return created
+
+
 class Task(models.Model):
     PRIORITY_CHOICES = [
         ("low", "Low"),
@@ -42,14 +138,50 @@ class Task(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="todo")
     due_date = models.DateField(null=True, blank=True, verbose_name="Termin wykonania")
 
-    attachment = models.FileField(upload_to="attachments/", null=True, blank=True)
+    attachment = models.FileField(
+        upload_to="attachments/", storage=attachment_storage, max_length=255, null=True, blank=True
+    )
+    attachment_name = models.CharField(max_length=255, blank=True, verbose_name="Nazwa załącznika")
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # /api/my-tasks/: filtr po przypisaniu i statusie, kolejność kursora
+            models.Index(fields=["assigned_to", "status", "due_date", "created_at"], name="task_assignee_due_idx"),
+            # Otwarte zadania użytkownika (domyślny widok /api/my-tasks/ i dashboard)
+            models.Index(
+                fields=["assigned_to", "due_date", "created_at", "id"],
+                condition=~models.Q(status="done"),
+                name="task_assignee_open_idx",
+            ),
+            # Tablica Kanban: zadania projektu wg kolumny, w kolejności kart
+            models.Index(fields=["project", "status", "id"], name="task_project_status_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
+    def is_overdue(self, today=None):
+        today = today or timezone.localdate()
+        return self.status != "done" and self.due_date is not None and self.due_date < today
+
+    def stats_counters(self):
+        """
+        Wkład zadania w liczniki ProjectStats: (project_id, {pole: 1, ...}).
+        """
+        counters = {
+            "total": 1,
+            f"status_{self.status}": 1,
+            f"priority_{self.priority}": 1,
+        }
+        if self.is_overdue():
+            counters["overdue"] = 1
+        return self.project_id, counters
+
 
 class Comment(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="comments")
@@ -57,5 +189,283 @@ class Comment(models.Model):
     content = models.TextField(verbose_name="Treść komentarza")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Dyskusja pod zadaniem jest zawsze sortowana po dacie
+            models.Index(fields=["task", "created_at"], name="comment_task_created_idx"),
+        ]
+
     def __str__(self):
         return f"Komentarz {self.author} odnośnie {self.task}"
+
+
+class ProjectStatsManager(models.Manager):
+    def apply_delta(self, project_id, delta):
+        """
+        Atomowo dodaje różnicę do liczników projektu (UPDATE ... SET x = x + n).
+        Brak wiersza oznacza liczniki jeszcze nie policzone - uzupełni je odczyt.
+        """
+        delta = {field: value for field, value in delta.items() if value and field in ProjectStats.COUNTER_FIELDS}
+        self.filter(project_id=project_id).update(
+            version=F("version") + 1,
+            changed_at=timezone.now(),
+            **{field: F(field) + value for field, value in delta.items()},
+        )
+
+    def touch(self, project_ids):
+        """
+        Podbija wersję projektów (zmiana zadań, komentarzy lub samego projektu),
+        co unieważnia ich walidatory ETag / Last-Modified.
+        """
+        self.filter(project_id__in=project_ids).update(version=F("version") + 1, changed_at=timezone.now())
+
+    def rebuild(self, project_ids=None):
+        """
+        Przelicza liczniki od zera. Zwraca słownik {project_id: ProjectStats}.
+        """
+        projects = Project.objects.all()
+        if project_ids is not None:
+            projects = projects.filter(pk__in=project_ids)
+        project_ids = list(projects.values_list("pk", flat=True))
+
+        today = timezone.localdate()
+        aggregates = {
+            "total": Count("id"),
+            "overdue": Count("id", filter=Q(due_date__lt=today) & ~Q(status="done")),
+        }
+        for status, _ in Task.STATUS_CHOICES:
+            aggregates[f"status_{status}"] = Count("id", filter=Q(status=status))
+        for priority, _ in Task.PRIORITY_CHOICES:
+            aggregates[f"priority_{priority}"] = Count("id", filter=Q(priority=priority))
+
+        rows = {
+            row.pop("project_id"): row
+            for row in Task.objects.filter(project_id__in=project_ids)
+            .order_by()
+            .values("project_id")
+            .annotate(**aggregates)
+        }
+
+        result = {}
+        for project_id in project_ids:
+            values = rows.get(project_id) or dict.fromkeys(ProjectStats.COUNTER_FIELDS, 0)
+            result[project_id], _ = self.update_or_create(
+                project_id=project_id,
+                defaults={**values, "overdue_as_of": today},
+                create_defaults={**values, "overdue_as_of": today, "changed_at": timezone.now()},
+            )
+        return result
+
+    def for_project(self, project):
+        """
+        Liczniki projektu. Jeśli ``project`` ma już dociągnięte ``stats``
+        (select_related), odpowiedź nie wymaga żadnego zapytania.
+        """
+        try:
+            stats = project.stats
+        except ProjectStats.DoesNotExist:
+            return self.rebuild([project.pk])[project.pk]
+
+        # "Przeterminowane" zależy od daty, więc odświeżamy je raz dziennie
+        today = timezone.localdate()
+        if stats.overdue_as_of != today:
+            stats.overdue = self._overdue_tasks(project, today).count()
+            stats.overdue_as_of = today
+            stats.save(update_fields=["overdue", "overdue_as_of"])
+        return stats
+
+    async def afor_project(self, project):
+        """
+        ``for_project`` dla widoków async.
+        """
+        try:
+            stats = project.stats
+        except ProjectStats.DoesNotExist:
+            return (await sync_to_async(self.rebuild)([project.pk]))[project.pk]
+
+        today = timezone.localdate()
+        if stats.overdue_as_of != today:
+            stats.overdue = await self._overdue_tasks(project, today).acount()
+            stats.overdue_as_of = today
+            await stats.asave(update_fields=["overdue", "overdue_as_of"])
+        return stats
+
+    def _overdue_tasks(self, project, today):
+        return Task.objects.filter(project_id=project.pk, due_date__lt=today).exclude(status="done")
+
+
+class ProjectStats(models.Model):
+    """
+    Zdenormalizowane liczniki zadań projektu, aktualizowane przyrostowo
+    przez sygnały (apps/projects/signals.py) i TaskQuerySet, oraz wersja
+    projektu używana jako walidator odpowiedzi warunkowych.
+    """
+    TRACKED_FIELDS = frozenset({"project", "project_id", "status", "priority", "due_date"})
+    COUNTER_FIELDS = (
+        "total",
+        *(f"status_{status}" for status, _ in Task.STATUS_CHOICES),
+        *(f"priority_{priority}" for priority, _ in Task.PRIORITY_CHOICES),
+        "overdue",
+    )
+
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    total = models.IntegerField(default=0)
+    status_todo = models.IntegerField(default=0)
+    status_in_progress = models.IntegerField(default=0)
+    status_done = models.IntegerField(default=0)
+    priority_low = models.IntegerField(default=0)
+    priority_medium = models.IntegerField(default=0)
+    priority_high = models.IntegerField(default=0)
+    overdue = models.IntegerField(default=0)
+    overdue_as_of = models.DateField(null=True, blank=True)
+    # Wersja i czas ostatniej zmiany czegokolwiek, co widać na tablicy projektu
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ProjectStatsManager()
+
+    def __str__(self):
+        return f"Statystyki {self.project_id}"
+
+    def counters(self):
+        return {field: getattr(self, field) for field in self.COUNTER_FIELDS}
+
+
+class AttachmentBlobManager(models.Manager):
+    def acquire(self, name):
+        """
+        Dodaje referencję do pliku w storage załączników (tworzy wpis przy pierwszej).
+        """
+        if not is_blob_name(name):
+            return
+        size = attachment_storage().size(name)
+        blob, created = self.get_or_create(name=name, defaults={"ref_count": 1, "size": size})
+        if not created:
+            self.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+
+    def release(self, name):
+        """
+        Zdejmuje referencję; nieużywany plik jest usuwany po zatwierdzeniu transakcji.
+        """
+        if not is_blob_name(name):
+            return
+        self.filter(pk=name).update(ref_count=F("ref_count") - 1)
+        transaction.on_commit(lambda: self.collect([name]))
+
+    def collect(self, names=None, grace_seconds=None):
+        """
+        Usuwa pliki bez referencji. Pliki zmodyfikowane w ostatnich ``grace_seconds``
+        zostają - mogły właśnie zostać wgrane ponownie, zanim zapisano referencję.
+        """
+        if grace_seconds is None:
+            grace_seconds = getattr(settings, "ATTACHMENT_GC_GRACE_SECONDS", 3600)
+        storage = attachment_storage()
+
+        candidates = self.filter(ref_count__lte=0)
+        if names is not None:
+            candidates = candidates.filter(pk__in=names)
+
+        removed = []
+        for name in candidates.values_list("pk", flat=True):
+            with transaction.atomic():
+                blob = self.select_for_update().filter(pk=name, ref_count__lte=0).first()
+                if blob is None or storage.modified_within(name, grace_seconds):
+                    continue
+                storage.delete(name)
+                blob.delete()
+                removed.append(name)
+        return removed
+
+
+class AttachmentBlob(models.Model):
+    """
+    Plik załącznika w storage adresowanym treścią (apps/projects/storage.py)
+    wraz z liczbą zadań, które go używają.
+    """
+    name = models.CharField(max_length=255, primary_key=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = AttachmentBlobManager()
+
+    def __str__(self):
+        return self.name
+
+
+class SearchEntryManager(models.Manager):
+    """
+    Przyrostowe utrzymanie indeksu wyszukiwania: wpisy zadań i komentarzy są
+    podmieniane przy zapisie (usunięcie + wstawienie), a usuwane kaskadowo.
+    Kolumny/tabele pełnotekstowe aktualizuje sama baza (migracja 0009).
+    """
+
+    INDEX_CHUNK_SIZE = 1000
+
+    def _reindex(self, ids, stale, build):
+        ids = list(ids)
+        with transaction.atomic(using=self.db):
+            for start in range(0, len(ids), self.INDEX_CHUNK_SIZE):
+                chunk = ids[start:start + self.INDEX_CHUNK_SIZE]
+                stale(chunk).delete()
+                self.bulk_create(build(chunk))
+
+    def index_tasks(self, task_ids):
+        def build(chunk):
+            rows = Task.objects.filter(pk__in=chunk).values_list("pk", "title", "description", "project__team_id")
+            return [
+                SearchEntry(task_id=pk, team_id=team_id, title=title, content=text)
+                for pk, title, text, team_id in rows
+            ]
+
+        self._reindex(task_ids, lambda chunk: self.filter(task_id__in=chunk, comment__isnull=True), build)
+
+    def index_comments(self, comment_ids):
+        def build(chunk):
+            rows = Comment.objects.filter(pk__in=chunk).values_list(
+                "pk", "task_id", "content", "task__project__team_id"
+            )
+            return [
+                SearchEntry(task_id=task_id, comment_id=pk, team_id=team_id, content=content)
+                for pk, task_id, content, team_id in rows
+            ]
+
+        self._reindex(comment_ids, lambda chunk: self.filter(comment_id__in=chunk), build)
+
+    def sync_teams(self, task_ids=None, project_ids=None):
+        """
+        Po przeniesieniu zadań (lub projektów) do innego zespołu poprawia team_id ich wpisów.
+        """
+        entries = self.all()
+        if task_ids is not None:
+            entries = entries.filter(task_id__in=task_ids)
+        if project_ids is not None:
+            entries = entries.filter(task__project_id__in=project_ids)
+        team_id = Task.objects.filter(pk=OuterRef("task_id")).values("project__team_id")
+        return entries.update(team_id=Subquery(team_id))
+
+
+class SearchEntry(models.Model):
+    """
+    Wpis indeksu pełnotekstowego: zadanie (tytuł + opis) albo komentarz.
+    ``team`` jest zdenormalizowany, żeby filtr uprawnień nie wymagał złączeń.
+    """
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="+")
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="+")
+    title = models.TextField(blank=True)
+    content = models.TextField(blank=True)
+
+    objects = SearchEntryManager()
+
+    # Pola zadania, których zmiana wymaga przeindeksowania
+    TASK_FIELDS = {"title", "description", "project", "project_id"}
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["task"], condition=Q(comment__isnull=True), name="searchentry_task_uniq"),
+            models.UniqueConstraint(fields=["comment"], name="searchentry_comment_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id}/{self.comment_id or '-'}"
@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import date, datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TaskKeysetPagination(BasePagination):
+    """
+    Paginacja kursorem (keyset) po ``(due_date NULLS LAST, created_at, id)``.
+
+    Kursor zapamiętuje klucz ostatniego zwróconego zadania, więc kolejna
+    strona to ``WHERE klucz > kursor ORDER BY klucz LIMIT n`` - koszt nie
+    rośnie z głębokością stronicowania, a nowe zadania dodane w międzyczasie
+    nie przesuwają wyników między stronami.
+    """
+    cursor_query_param = "cursor"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, task):
+        key = [task.due_date.isoformat() if task.due_date else None, task.created_at.isoformat(), task.pk]
+        return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            due_date, created_at, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            return (
+                date.fromisoformat(due_date) if due_date else None,
+                datetime.fromisoformat(created_at),
+                int(pk),
+            )
+        except (TypeError, ValueError):
+            raise NotFound("Nieprawidłowy kursor.")
+
+    def after_cursor(self, due_date, created_at, pk):
+        same_due_date = Q(due_date__isnull=True) if due_date is None else Q(due_date=due_date)
+        after = same_due_date & (Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+        if due_date is not None:
+            # NULLS LAST: zadania bez terminu są "większe" od każdej daty
+            after |= Q(due_date__gt=due_date) | Q(due_date__isnull=True)
+        return after
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.after_cursor(*cursor))
+
+        # Pobieramy jeden wiersz więcej, żeby wiedzieć, czy jest następna strona
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.set_page([task async for task in self.page_queryset(queryset, request).aiterator()])
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Kursor następnej strony (z pola 'next').",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Liczba wyników na stronę (maks. {self.max_page_size}).",
+                "schema": {"type": "integer"},
+            },
+        ]
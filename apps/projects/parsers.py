@@ -0,0 +1,23 @@
+import codecs
+import csv
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVParser(BaseParser):
+    """
+    CSV z nagłówkiem -> lista słowników (jeden na wiersz danych).
+    """
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            reader = csv.DictReader(codecs.getreader(encoding)(stream))
+            # Puste komórki traktujemy jak brak wartości, tak jak brak klucza w JSON
+            return [{key: value for key, value in row.items() if value != ""} for row in reader]
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f"Niepoprawny plik CSV: {exc}")
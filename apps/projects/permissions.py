@@ -1,18 +1,17 @@
 from rest_framework import permissions
 
+from .membership import aget_team_ids, is_team_member, team_id_for
+
 
 class IsTeamMember(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        if hasattr(obj, "members"):
-            return request.user in obj.members.all()
+        # Sprawdzenie w zbiorze ID zespołów użytkownika (cache), bez zapytań o członków
+        return is_team_member(request.user, obj)
 
-        if hasattr(obj, "team"):
-            return request.user in obj.team.members.all()
-        
-        if hasattr(obj, "project"):
-            return request.user in obj.project.team.members.all()
-        
-        return False
+    async def ahas_object_permission(self, request, view, obj):
+        # Dla widoków async (async_views.AsyncAPIView); obj z team_id albo z dociągniętym projektem
+        team_id = team_id_for(obj)
+        return team_id is not None and team_id in await aget_team_ids(request.user)
 
 
 class IsTeamOwner(permissions.BasePermission):
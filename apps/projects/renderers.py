@@ -0,0 +1,24 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Używany tylko do negocjacji formatu (?format=ndjson); treść
+    eksportu powstaje strumieniowo w apps/projects/export.py.
+    """
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get("response")
+        if response is not None and response.exception:
+            # Błędy (404, 403, nieznany format) jako zwykły JSON API, nie repr słownika
+            response["Content-Type"] = JSONRenderer.media_type
+            return JSONRenderer().render(data, renderer_context=renderer_context)
+        return b"" if data is None else str(data).encode(self.charset)
+
+
+class CSVRenderer(NDJSONRenderer):
+    media_type = "text/csv"
+    format = "csv"
@@ -0,0 +1,103 @@
+"""
+Wyszukiwanie pełnotekstowe w zadaniach i komentarzach.
+
+Indeks to tabela SearchEntry utrzymywana przyrostowo (sygnały, TaskQuerySet).
+Dopasowanie i ranking liczy baza: na Postgresie kolumna tsvector z indeksem
+GIN, na SQLite tabela FTS5 (migracja 0009). Na innych bazach - oraz na
+SQLite bez FTS5 - zostaje wolniejszy LIKE bez rankingu.
+
+Każde słowo zapytania jest traktowane jako prefiks ("proj" znajdzie
+"projekt"); słowa krótsze niż MIN_TOKEN_LENGTH są pomijane, bo pasowałyby
+do zbyt dużej części indeksu.
+"""
+
+import re
+from functools import reduce
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import SearchEntry
+
+MIN_TOKEN_LENGTH = 2
+MAX_TOKENS = 8
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+SQLITE_FTS_TABLE = "projects_searchentry_fts"
+
+POSTGRES_SQL = """
+    SELECT e.id, ts_rank(e.vector, query) AS rank
+    FROM projects_searchentry e, to_tsquery('simple'::regconfig, %s) query
+    WHERE e.vector @@ query AND e.team_id = ANY(%s)
+    ORDER BY rank DESC, e.id DESC
+    LIMIT %s
+"""
+
+# bm25() zwraca wartości ujemne (im mniejsza, tym lepiej); tytuł waży więcej niż treść,
+# a trafienie w komentarzu mniej niż w samym zadaniu. Zespoły filtruje już MATCH (kolumna team_id).
+SQLITE_SQL = """
+    SELECT e.id, -bm25({fts}, 10.0, 1.0, 0.0) * (CASE WHEN e.comment_id IS NULL THEN 1.0 ELSE 0.5 END) AS rank
+    FROM {fts} JOIN projects_searchentry e ON e.id = {fts}.rowid
+    WHERE {fts} MATCH %s
+    ORDER BY rank DESC, e.id DESC
+    LIMIT %s
+"""
+
+
+def tokenize(query):
+    tokens = [token for token in re.findall(r"\w+", query.lower()) if len(token) >= MIN_TOKEN_LENGTH]
+    return list(dict.fromkeys(tokens))[:MAX_TOKENS]
+
+
+def backend():
+    if connection.vendor == "postgresql":
+        return "postgresql"
+    if connection.vendor == "sqlite" and SQLITE_FTS_TABLE in connection.introspection.table_names():
+        return "sqlite"
+    return "basic"
+
+
+def _ranked_ids(tokens, team_ids, limit):
+    engine = backend()
+    if engine == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_SQL, [" & ".join(f"{token}:*" for token in tokens), list(team_ids), limit])
+            return cursor.fetchall()
+    if engine == "sqlite":
+        words = " ".join(f'"{token}"*' for token in tokens)
+        teams = " OR ".join(f'"{int(team_id)}"' for team_id in team_ids)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                SQLITE_SQL.format(fts=SQLITE_FTS_TABLE), [f"{{title content}}: ({words}) AND team_id: ({teams})", limit]
+            )
+            return cursor.fetchall()
+
+    match = reduce(
+        lambda condition, token: condition & (Q(title__icontains=token) | Q(content__icontains=token)), tokens, Q()
+    )
+    ids = SearchEntry.objects.filter(match, team_id__in=team_ids).order_by("-id").values_list("id", flat=True)
+    return [(pk, 0.0) for pk in ids[:limit]]
+
+
+def search(query, team_ids, limit=DEFAULT_LIMIT):
+    """
+    Najlepiej dopasowane wpisy (zadania i komentarze) z zespołów ``team_ids``,
+    z atrybutem ``rank``, posortowane od najlepszego.
+    """
+    tokens = tokenize(query)
+    team_ids = list(team_ids)
+    if not tokens or not team_ids:
+        return []
+
+    ranked = _ranked_ids(tokens, team_ids, min(limit, MAX_LIMIT))
+    entries = SearchEntry.objects.select_related("task__project", "comment__author").in_bulk(
+        [pk for pk, _ in ranked]
+    )
+    results = []
+    for pk, rank in ranked:
+        entry = entries.get(pk)
+        if entry is not None:
+            entry.rank = float(rank)
+            results.append(entry)
+    return results
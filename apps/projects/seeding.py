@@ -0,0 +1,180 @@
+"""
+Generowanie syntetycznych danych (zespoły, projekty, zadania, komentarze)
+do pomiarów wydajności. Wszystko idzie przez bulk_create w paczkach,
+więc pamięć nie rośnie z rozmiarem zbioru.
+
+Przy ``skew > 0`` rozkłady są nierówne jak w produkcji: liczba zadań
+w projektach i przypisania w zespole mają rozkład Zipfa (kilka dużych
+projektów i zapracowanych osób), a liczba komentarzy - wykładniczy.
+"""
+
+import random
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from apps.users.models import Profile
+
+from .models import Comment, Project, SearchEntry, Task, Team
+
+VERBS = ["Przygotować", "Poprawić", "Przejrzeć", "Wdrożyć", "Opisać", "Przetestować", "Zaktualizować", "Usunąć"]
+NOUNS = [
+    "raport kwartalny", "formularz logowania", "eksport CSV", "migrację bazy", "dokumentację API",
+    "powiadomienia e-mail", "tablicę Kanban", "wyszukiwarkę", "uprawnienia zespołu", "stronę główną",
+]
+SENTENCES = [
+    "Klient zgłosił problem na produkcji.",
+    "Trzeba uzgodnić szczegóły z zespołem.",
+    "Szczegóły w poprzednim zgłoszeniu.",
+    "Do sprawdzenia na danych testowych.",
+    "Priorytet ustalony na ostatnim spotkaniu.",
+    "Wymaga przeglądu kodu przed wdrożeniem.",
+]
+
+
+def zipf_weights(count, skew, rng):
+    """
+    Wagi ``1 / rank**skew`` w losowej kolejności (skew=0 - rozkład równomierny).
+    """
+    weights = [1 / (rank + 1) ** skew for rank in range(count)]
+    rng.shuffle(weights)
+    return weights
+
+
+def skewed_counts(total, count, skew, rng):
+    """
+    Podział ``total`` elementów na ``count`` grup, każda niepusta.
+    """
+    if count == 0:
+        return []
+    if not skew:
+        return [total // count] * count
+    weights = zipf_weights(count, skew, rng)
+    scale = total / sum(weights)
+    return [max(1, round(weight * scale)) for weight in weights]
+
+
+def sentence_text(rng, sentences):
+    return " ".join(rng.choice(SENTENCES) for _ in range(sentences))
+
+
+@dataclass
+class SeededData:
+    users: list = field(default_factory=list)
+    teams: list = field(default_factory=list)
+    projects: list = field(default_factory=list)
+    tasks: int = 0
+    comments: int = 0
+
+
+def seed_dataset(
+    teams=10,
+    members_per_team=5,
+    projects_per_team=3,
+    tasks_per_project=200,
+    comments_per_task=2,
+    prefix="seed",
+    batch_size=2000,
+    seed=0,
+    skew=0.0,
+    progress=None,
+):
+    """
+    ``tasks_per_project`` i ``comments_per_task`` to średnie - przy ``skew`` = 0
+    dokładne liczby. ``progress`` jest wywoływane z ``SeededData`` po każdej paczce zadań.
+    """
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    statuses = [status for status, _ in Task.STATUS_CHOICES]
+    priorities = [priority for priority, _ in Task.PRIORITY_CHOICES]
+    data = SeededData()
+
+    # Jedno hashowanie hasła dla wszystkich kont - to dane testowe
+    password = make_password("password123")
+    data.users = User.objects.bulk_create(
+        [User(username=f"{prefix}_user_{i}", password=password) for i in range(teams * members_per_team)],
+        batch_size=batch_size,
+    )
+    Profile.objects.bulk_create([Profile(user=user) for user in data.users], batch_size=batch_size)
+
+    members = [data.users[t * members_per_team:(t + 1) * members_per_team] for t in range(teams)]
+    data.teams = Team.objects.bulk_create(
+        [Team(name=f"{prefix} team {t}", owner=members[t][0]) for t in range(teams)], batch_size=batch_size
+    )
+    Team.members.through.objects.bulk_create(
+        [
+            Team.members.through(team_id=team.pk, user_id=user.pk)
+            for team, team_members in zip(data.teams, members)
+            for user in team_members
+        ],
+        batch_size=batch_size,
+    )
+    data.projects = Project.objects.bulk_create(
+        [
+            Project(name=f"{prefix} project {t}-{p}", description="Dane testowe", team=team)
+            for t, team in enumerate(data.teams)
+            for p in range(projects_per_team)
+        ],
+        batch_size=batch_size,
+    )
+
+    team_members = dict(zip((team.pk for team in data.teams), members))
+    pending_tasks = []
+
+    def comment_count():
+        if skew and comments_per_task:
+            return int(rng.expovariate(1 / comments_per_task))
+        return comments_per_task
+
+    def flush_tasks():
+        created = Task.objects.bulk_create(pending_tasks, batch_size=batch_size)
+        pending_tasks.clear()
+        data.tasks += len(created)
+        comments = [
+            Comment(
+                task=task,
+                author=rng.choice(team_members[task.project.team_id]),
+                content=f"Komentarz {c}: {sentence_text(rng, rng.randint(1, 3))}" if skew else f"Komentarz {c}",
+            )
+            for task in created
+            for c in range(comment_count())
+        ]
+        Comment.objects.bulk_create(comments, batch_size=batch_size)
+        # Zadania indeksuje TaskQuerySet.bulk_create, komentarze dokładamy tutaj
+        SearchEntry.objects.index_comments(comment.pk for comment in comments)
+        data.comments += len(comments)
+        if progress is not None:
+            progress(data)
+
+    task_counts = skewed_counts(tasks_per_project * len(data.projects), len(data.projects), skew, rng)
+    for project, task_count in zip(data.projects, task_counts):
+        candidates = team_members[project.team_id]
+        assignee_weights = zipf_weights(len(candidates), skew, rng)
+        for i in range(task_count):
+            if skew:
+                title = f"{rng.choice(VERBS)} {rng.choice(NOUNS)} #{i}"
+                description = sentence_text(rng, rng.randint(1, 6))
+                # Część zadań nie ma jeszcze nikogo przypisanego
+                assignee = None if rng.random() < 0.1 else rng.choices(candidates, assignee_weights)[0]
+            else:
+                title, description, assignee = f"Zadanie {i}", "Opis zadania testowego", rng.choice(candidates)
+            pending_tasks.append(
+                Task(
+                    title=title,
+                    description=description,
+                    project=project,
+                    assigned_to=assignee,
+                    status=rng.choice(statuses),
+                    priority=rng.choice(priorities),
+                    due_date=None if rng.random() < 0.3 else today + timedelta(days=rng.randint(-30, 60)),
+                )
+            )
+            if len(pending_tasks) >= batch_size:
+                flush_tasks()
+    if pending_tasks:
+        flush_tasks()
+
+    return data
@@ -1,6 +1,7 @@
+from django.utils.text import Truncator
 from rest_framework import serializers
 
-from .models import Project, Task
+from .models import Project, SearchEntry, Task
 
 
 class ProjectSerializer(serializers.ModelSerializer):
@@ -28,4 +29,48 @@ class TaskSerializer(serializers.ModelSerializer):
             "team_name",
             "created_at"
         ]
-        read_only_fields = ["created_at"]
\ No newline at end of file
+        read_only_fields = ["created_at"]
+
+
+class TaskImportSerializer(serializers.ModelSerializer):
+    """
+    Walidacja jednego wiersza importu. ``assigned_to`` to login, ``id:<ID>`` lub ID
+    członka zespołu - sprawdzany w słowniku ``context["members"]``, bez zapytań.
+    """
+    assigned_to = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+    class Meta:
+        model = Task
+        fields = ["title", "description", "priority", "status", "due_date", "assigned_to"]
+
+    def validate_assigned_to(self, value):
+        if value in (None, ""):
+            return None
+        user_id = self.context["members"].get(str(value))
+        if user_id is None:
+            raise serializers.ValidationError("Użytkownik nie należy do zespołu projektu.")
+        return user_id
+
+
+class TaskStatusBulkSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    type = serializers.SerializerMethodField()
+    task_title = serializers.CharField(source="task.title")
+    project = serializers.IntegerField(source="task.project_id")
+    project_name = serializers.CharField(source="task.project.name")
+    excerpt = serializers.SerializerMethodField()
+    rank = serializers.FloatField()
+
+    class Meta:
+        model = SearchEntry
+        fields = ["type", "task", "comment", "task_title", "project", "project_name", "excerpt", "rank"]
+
+    def get_type(self, entry) -> str:
+        return "comment" if entry.comment_id else "task"
+
+    def get_excerpt(self, entry) -> str:
+        return Truncator(entry.content).chars(200)
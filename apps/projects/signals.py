@@ -0,0 +1,268 @@
+import os
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db.models import Q, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import dashboard, live, membership
+from .models import AttachmentBlob, Comment, Project, ProjectStats, SearchEntry, Task, Team
+
+# Pola, których zmiana wymaga porównania ze stanem w bazie (liczniki, referencje do plików, dashboardy)
+TASK_STATE_FIELDS = ProjectStats.TRACKED_FIELDS | {"attachment", "assigned_to"}
+
+
+def _stored_task(pk):
+    """
+    Stan zadania w bazie (może różnić się od instancji w pamięci, np. po QuerySet.update()).
+    """
+    if pk is None:
+        return None
+    return (
+        Task.objects.filter(pk=pk)
+        .only("project_id", "assigned_to_id", "status", "priority", "due_date", "attachment")
+        .first()
+    )
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_team(sender, instance, raw=False, **kwargs):
+    instance._stored_team_id = None
+    if not raw and instance.pk is not None:
+        instance._stored_team_id = Project.objects.filter(pk=instance.pk).values_list("team_id", flat=True).first()
+
+
+@receiver(post_save, sender=Project)
+def sync_search_team(sender, instance, created, raw=False, **kwargs):
+    stored_team_id = getattr(instance, "_stored_team_id", None)
+    if not raw and not created and stored_team_id is not None and stored_team_id != instance.team_id:
+        SearchEntry.objects.sync_teams(project_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Project)
+def invalidate_dashboards_on_project_save(sender, instance, created, raw=False, **kwargs):
+    # Dashboard pokazuje nazwę projektu przy otwartych zadaniach
+    if not raw and not created:
+        dashboard.invalidate(
+            *Task.objects.filter(project=instance, assigned_to__isnull=False).values_list("assigned_to_id", flat=True)
+        )
+
+
+@receiver(post_save, sender=Project)
+def create_project_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        ProjectStats.objects.get_or_create(project=instance)
+    else:
+        ProjectStats.objects.touch([instance.pk])
+
+
+@receiver(pre_delete, sender=Project)
+def remember_project_assignees(sender, instance, **kwargs):
+    instance._deleted_assignee_ids = list(
+        Task.objects.filter(project=instance, assigned_to__isnull=False)
+        .values_list("assigned_to_id", flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_delete, sender=Project)
+def invalidate_dashboards_on_project_delete(sender, instance, **kwargs):
+    # Otwarte zadania usuniętego projektu znikają z dashboardów przypisanych osób
+    dashboard.invalidate(*getattr(instance, "_deleted_assignee_ids", []))
+
+
+@receiver(pre_save, sender=Task)
+def remember_stored_task(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._stored_before_save = None
+    if raw:
+        return
+    if instance.attachment and not instance.attachment._committed:
+        # Plik trafi do storage pod nazwą z hasha - zachowujemy oryginalną nazwę
+        instance.attachment_name = os.path.basename(instance.attachment.name)
+    if update_fields is not None and not TASK_STATE_FIELDS.intersection(update_fields):
+        return
+    if not instance._state.adding:
+        instance._stored_before_save = _stored_task(instance.pk)
+
+
+@receiver(post_save, sender=Task)
+def update_stats_on_task_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    before = None if created else instance._stored_before_save
+
+    if update_fields is not None and not ProjectStats.TRACKED_FIELDS.intersection(update_fields):
+        # Liczniki bez zmian, ale karta zadania na tablicy już tak
+        ProjectStats.objects.touch([instance.project_id])
+    else:
+        deltas = {}
+        if before is not None:
+            project_id, counters = before.stats_counters()
+            deltas.setdefault(project_id, Counter()).subtract(counters)
+        project_id, counters = instance.stats_counters()
+        deltas.setdefault(project_id, Counter()).update(counters)
+
+        for project_id, delta in deltas.items():
+            ProjectStats.objects.apply_delta(project_id, delta)
+
+    if update_fields is None or "attachment" in update_fields:
+        old_name = before.attachment.name if before is not None else ""
+        new_name = instance.attachment.name or ""
+        if old_name != new_name:
+            AttachmentBlob.objects.acquire(new_name)
+            AttachmentBlob.objects.release(old_name)
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not SearchEntry.TASK_FIELDS.intersection(update_fields)):
+        return
+    SearchEntry.objects.index_tasks([instance.pk])
+    before = None if created else instance._stored_before_save
+    if before is not None and before.project_id != instance.project_id:
+        # Komentarze przeniesionego zadania należą teraz do innego zespołu
+        SearchEntry.objects.sync_teams(task_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else instance._stored_before_save
+    if before is not None and before.project_id != instance.project_id:
+        live.publish(before.project_id, "task.deleted", task=instance.pk)
+        created = True
+    event_type = "task.created" if created else "task.updated"
+    live.publish(instance.project_id, event_type, task=instance.pk, status=instance.status)
+
+
+@receiver(post_save, sender=Task)
+def invalidate_dashboards_on_task_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else instance._stored_before_save
+    dashboard.invalidate(instance.assigned_to_id, before.assigned_to_id if before is not None else None)
+
+
+@receiver(pre_delete, sender=Task)
+def remember_deleted_task(sender, instance, origin=None, **kwargs):
+    # Przy usuwaniu kaskadowym i QuerySet.delete() instancje są świeżo pobrane
+    # z bazy; przy task.delete() instancja w pamięci może być nieaktualna.
+    instance._stored_before_delete = _stored_task(instance.pk) if origin is instance else None
+
+
+@receiver(post_delete, sender=Task)
+def update_stats_on_task_delete(sender, instance, origin=None, **kwargs):
+    stored = getattr(instance, "_stored_before_delete", None) or instance
+    AttachmentBlob.objects.release(stored.attachment.name)
+    # Przy usuwaniu całego projektu liczniki znikają razem z nim, tablicy nie ma już
+    # do aktualizowania, a dashboardy unieważnia raz invalidate_dashboards_on_project_delete
+    if _deleted_with(origin, Project, Team):
+        return
+    project_id, counters = stored.stats_counters()
+    ProjectStats.objects.apply_delta(project_id, {field: -value for field, value in counters.items()})
+    dashboard.invalidate(stored.assigned_to_id)
+    live.publish(project_id, "task.deleted", task=instance.pk)
+
+
+def _deleted_with(origin, *models):
+    """
+    Czy usunięcie jest kaskadą z usunięcia obiektu (lub querysetu) jednego z ``models``.
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in models
+
+
+@receiver(post_save, sender=Comment)
+def touch_project_on_comment_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ProjectStats.objects.touch([instance.task.project_id])
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        # Karta zadania pokazuje liczbę komentarzy
+        live.publish(instance.task.project_id, "comment.created" if created else "task.updated", task=instance.task_id)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and (update_fields is None or "content" in update_fields):
+        SearchEntry.objects.index_comments([instance.pk])
+
+
+@receiver(post_delete, sender=Comment)
+def touch_project_on_comment_delete(sender, instance, origin=None, **kwargs):
+    # Usunięcie zadania lub projektu samo podbija wersję projektu
+    if not _deleted_with(origin, Task, Project):
+        project_id = Task.objects.filter(pk=instance.task_id).values_list("project_id", flat=True).first()
+        if project_id is not None:
+            ProjectStats.objects.touch([project_id])
+            live.publish(project_id, "task.updated", task=instance.task_id)
+
+
+@receiver(pre_delete, sender=User)
+def touch_projects_on_user_delete(sender, instance, **kwargs):
+    # Zadania użytkownika tracą przypisanie (SET_NULL bez sygnałów), a komentarze znikają
+    ProjectStats.objects.touch(
+        Task.objects.filter(Q(assigned_to=instance) | Q(comments__author=instance)).values("project_id")
+    )
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def invalidate_membership_on_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # Po clear() nie wiemy już, kogo usunięto - zapamiętujemy wcześniej
+        instance._cleared_member_ids = [instance.pk] if reverse else list(instance.members.values_list("pk", flat=True))
+        instance._cleared_team_ids = list(instance.teams.values_list("pk", flat=True)) if reverse else [instance.pk]
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if reverse:
+        user_ids = [instance.pk]
+        team_ids = pk_set or getattr(instance, "_cleared_team_ids", [])
+    elif action == "post_clear":
+        user_ids = getattr(instance, "_cleared_member_ids", [])
+        team_ids = [instance.pk]
+    else:
+        user_ids = pk_set or []
+        team_ids = [instance.pk]
+    membership.invalidate(*user_ids)
+    # Liczba członków zmienia się na dashboardach wszystkich członków zespołu
+    member_ids = Team.members.through.objects.filter(team_id__in=team_ids).values_list("user_id", flat=True)
+    dashboard.invalidate(*user_ids, *member_ids)
+
+
+@receiver(pre_delete, sender=Team)
+def remember_team_members(sender, instance, **kwargs):
+    instance._deleted_member_ids = list(instance.members.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Team)
+def invalidate_membership_on_team_delete(sender, instance, **kwargs):
+    membership.invalidate(*getattr(instance, "_deleted_member_ids", []))
+    dashboard.invalidate(*getattr(instance, "_deleted_member_ids", []))
+
+
+@receiver(post_save, sender=Team)
+def invalidate_dashboards_on_team_save(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        dashboard.invalidate(*instance.members.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=User)
+def invalidate_dashboards_on_user_delete(sender, instance, **kwargs):
+    # Pozostali członkowie zespołów użytkownika widzą mniejszą liczbę członków
+    dashboard.invalidate(
+        *Team.members.through.objects.filter(team__members=instance).values_list("user_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=User)
+def invalidate_membership_on_user_delete(sender, instance, **kwargs):
+    membership.invalidate(instance.pk)
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import time
+
+from django.core.files.storage import FileSystemStorage, storages
+
+CAS_PREFIX = "attachments/sha256"
+
+
+def attachment_storage():
+    """
+    Storage załączników z ustawienia STORAGES["attachments"] (callable, żeby migracje go nie zamrażały).
+    """
+    return storages["attachments"]
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f"{CAS_PREFIX}/")
+
+
+def blob_digest(name):
+    """
+    SHA-256 zawartości zapisany w nazwie pliku (np. attachments/sha256/ab/cd/abcd....pdf).
+    """
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+class _BlobExists(Exception):
+    pass
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Pliki są zapisywane pod nazwą wyliczoną z SHA-256 zawartości, więc ten sam
+    plik wgrany do wielu zadań zajmuje miejsce na dysku tylko raz. Licznik
+    referencji i sprzątanie nieużywanych plików obsługuje AttachmentBlob.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Wywołane w _save() przy kolizji nazwy bloba: plik o tej treści już jest
+        if is_blob_name(name) and self.exists(name):
+            raise _BlobExists(name)
+        # Nazwa docelowa powstaje dopiero w _save() z zawartości pliku
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        hexdigest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        blob_name = f"{CAS_PREFIX}/{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{extension}"
+
+        if self.exists(blob_name):
+            # Odświeżamy mtime, żeby sprzątanie nie usunęło pliku tuż przed zapisem referencji
+            os.utime(self.path(blob_name))
+            return blob_name
+        try:
+            return super()._save(blob_name, content)
+        except _BlobExists:
+            return blob_name
+
+    def modified_within(self, name, seconds):
+        try:
+            return time.time() - os.path.getmtime(self.path(name)) < seconds
+        except FileNotFoundError:
+            return False
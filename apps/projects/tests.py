@@ -1,8 +1,40 @@
+import asyncio
+import csv
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+import psycopg
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, F
+from django.middleware.csrf import _get_new_csrf_string
+from django.test import LiveServerTestCase, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.users import authentication
 
-from .models import Project, Task, Team
+from . import dashboard, fragments, live, membership
+from .board import BOARD_COLUMN_LIMIT
+from .forms import AddMemberForm
+from .models import AttachmentBlob, Comment, Project, ProjectStats, SearchEntry, Task, Team
+from .permissions import IsTeamMember
+from .views import MyTaskListView, ProjectStatsView
 
 
 class ProjectTests(TestCase):
@@ -109,4 +141,909 @@ class ProjectTests(TestCase):
         
         # Sprawdzamy czy w HTML pojawił się błąd formularza
         # (To zadziała tylko jeśli masz walidację w metodzie clean() formularza)
-        self.assertFalse(Task.objects.filter(title='Tajne Zadanie').exists())
\ No newline at end of file
+        self.assertFalse(Task.objects.filter(title='Tajne Zadanie').exists())
+
+class ProjectBoardTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='board_user', password='password123')
+        self.team = Team.objects.create(name='Board Team', owner=self.user)
+        self.team.members.add(self.user)
+        self.project = Project.objects.create(name='Board Project', description='Desc', team=self.team)
+
+    def _create_tasks(self, count):
+        statuses = [status for status, _ in Task.STATUS_CHOICES]
+        tasks = Task.objects.bulk_create([
+            Task(
+                title=f'Zadanie {i}',
+                description='Opis',
+                project=self.project,
+                assigned_to=self.user,
+                status=statuses[i % len(statuses)],
+            )
+            for i in range(count)
+        ])
+        Comment.objects.bulk_create([
+            Comment(task=task, author=self.user, content='Komentarz')
+            for task in tasks for _ in range(2)
+        ])
+
+    def test_board_query_count_does_not_grow_with_tasks(self):
+        """
+        Tablica Kanban ładuje się stałą liczbą zapytań, niezależnie od liczby zadań.
+        """
+        self.client.login(username='board_user', password='password123')
+        url = reverse('project-detail', args=[self.project.id])
+
+        self._create_tasks(3)
+        with CaptureQueriesContext(connection) as small_board:
+            self.client.get(url)
+
+        self._create_tasks(60)
+        with self.assertNumQueries(len(small_board.captured_queries)):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['board']['todo'].tasks[0].comment_count, 2)
+
+    def test_board_column_load_more(self):
+        """
+        Kolumna jest przycinana do limitu, a resztę dociąga widok "Pokaż więcej".
+        """
+        self.client.login(username='board_user', password='password123')
+        self._create_tasks(3 * (BOARD_COLUMN_LIMIT + 5))
+
+        response = self.client.get(reverse('project-detail', args=[self.project.id]))
+        todo = response.context['board']['todo']
+        self.assertEqual(len(todo.tasks), BOARD_COLUMN_LIMIT)
+        self.assertTrue(todo.has_more)
+
+        url = reverse('project-board-column', args=[self.project.id, 'todo'])
+        response = self.client.get(url, {'offset': todo.next_offset})
+        column = response.context['column']
+        self.assertEqual(len(column.tasks), 5)
+        self.assertFalse(column.has_more)
+
+
+class ProjectStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='stats_user', password='password123')
+        self.team = Team.objects.create(name='Stats Team', owner=self.user)
+        self.team.members.add(self.user)
+        self.project = Project.objects.create(name='Stats Project', description='Desc', team=self.team)
+
+    def assertStatsConsistent(self):
+        stored = ProjectStats.objects.get(project=self.project).counters()
+        rebuilt = ProjectStats.objects.rebuild([self.project.pk])[self.project.pk].counters()
+        self.assertEqual(stored, rebuilt)
+        return stored
+
+    def test_counters_follow_task_changes(self):
+        """
+        Liczniki zgadzają się z pełnym przeliczeniem po każdym rodzaju zapisu.
+        """
+        yesterday = timezone.localdate() - timedelta(days=1)
+        task = Task.objects.create(title='A', description='Opis', project=self.project, priority='high')
+        Task.objects.create(title='B', description='Opis', project=self.project, due_date=yesterday)
+        self.assertEqual(self.assertStatsConsistent()['overdue'], 1)
+
+        task.status = 'done'
+        task.save()
+        self.assertEqual(self.assertStatsConsistent()['status_done'], 1)
+
+        Task.objects.filter(project=self.project).update(status='in_progress')
+        self.assertEqual(self.assertStatsConsistent()['status_in_progress'], 2)
+
+        task.delete()
+        self.assertEqual(self.assertStatsConsistent()['total'], 1)
+
+    def test_update_applies_delta_without_rebuild(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        other = Project.objects.create(name='Other Project', description='Desc', team=self.team)
+        Task.objects.create(title='A', description='Opis', project=self.project, priority='high')
+        Task.objects.create(title='B', description='Opis', project=self.project, due_date=yesterday)
+        Task.objects.create(title='C', description='Opis', project=other, status='done')
+
+        with mock.patch.object(ProjectStats.objects, 'rebuild') as rebuild:
+            Task.objects.filter(project=self.project, title__in=['A', 'B']).update(project=other, priority='low')
+            Task.objects.filter(project=other).update(status='in_progress')
+        rebuild.assert_not_called()
+
+        self.assertEqual(self.assertStatsConsistent()['total'], 0)
+        stored = ProjectStats.objects.get(project=other).counters()
+        self.assertEqual(stored, ProjectStats.objects.rebuild([other.pk])[other.pk].counters())
+        self.assertEqual((stored['priority_low'], stored['status_in_progress'], stored['overdue']), (2, 3, 1))
+
+    def test_project_delete_skips_per_task_updates(self):
+        for title in 'ABC':
+            Task.objects.create(title=title, description='Opis', project=self.project, assigned_to=self.user)
+        dashboard._cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(len(dashboard.get_summary(self.user, [self.team.pk])['tasks']), 3)
+
+        with mock.patch.object(ProjectStats.objects, 'apply_delta') as apply_delta:
+            self.project.delete()
+        apply_delta.assert_not_called()
+        self.assertIsNone(dashboard._cache().get(dashboard._cache_key(self.user.pk)))
+        self.assertEqual(dashboard.get_summary(self.user, [self.team.pk])['tasks'], [])
+
+    def test_stats_endpoint_uses_counters(self):
+        Task.objects.create(title='A', description='Opis', project=self.project, status='done')
+        Task.objects.create(title='B', description='Opis', project=self.project)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse('api-project-stats', args=[self.project.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_tasks'], 2)
+        self.assertEqual(response.data['completed_tasks'], 1)
+        self.assertEqual(response.data['by_status']['todo'], 1)
+
+
+class TeamMembershipCacheTests(TestCase):
+    def setUp(self):
+        membership.clear()
+        self.user = User.objects.create_user(username='member', password='password123')
+        self.owner = User.objects.create_user(username='owner', password='password123')
+        self.team = Team.objects.create(name='Cache Team', owner=self.owner)
+        self.team.members.add(self.owner, self.user)
+        self.project = Project.objects.create(name='Cache Project', description='Desc', team=self.team)
+
+    def tearDown(self):
+        membership.clear()
+
+    def test_permission_check_uses_cached_team_ids(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            membership.get_team_ids(self.user)
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with self.assertNumQueries(0):
+            self.assertTrue(IsTeamMember().has_object_permission(request, None, self.project))
+
+    def test_cache_invalidated_on_member_removal(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(membership.is_team_member(self.user, self.team))
+
+        self.team.members.remove(self.user)
+        self.assertFalse(membership.is_team_member(self.user, self.team))
+
+    def test_add_member_form_rejects_existing_member(self):
+        form = AddMemberForm(self.team, data={'username': 'member'})
+        self.assertFalse(form.is_valid())
+
+
+class MyTaskPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='paging_user', password='password123')
+        team = Team.objects.create(name='Paging Team', owner=self.user)
+        team.members.add(self.user)
+        self.project = Project.objects.create(name='Paging Project', description='Desc', team=team)
+        today = timezone.localdate()
+        for i in range(7):
+            Task.objects.create(
+                title=f'Zadanie {i}',
+                description='Opis',
+                project=self.project,
+                assigned_to=self.user,
+                due_date=None if i % 3 == 0 else today + timedelta(days=i % 2),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_are_complete_and_stable(self):
+        """
+        Kolejne strony pokrywają całą listę bez duplikatów, także po dodaniu nowego zadania w trakcie.
+        """
+        expected = list(
+            Task.objects.filter(assigned_to=self.user)
+            .order_by(F('due_date').asc(nulls_last=True), 'created_at', 'id')
+            .values_list('id', flat=True)
+        )
+
+        response = self.client.get(reverse('api_my_tasks'), {'page_size': 3})
+        seen = [task['id'] for task in response.data['results']]
+        Task.objects.create(title='Nowe', description='Opis', project=self.project, assigned_to=self.user)
+
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen.extend(task['id'] for task in response.data['results'])
+
+        self.assertEqual(seen[:len(expected)], expected)
+        self.assertEqual(len(seen), len(set(seen)))
+
+
+class QueryPlansCommandTests(TestCase):
+    def test_queryplans_reports_every_canonical_query(self):
+        out = StringIO()
+        call_command('queryplans', teams=2, projects_per_team=1, tasks_per_project=20, stdout=out)
+
+        self.assertIn('MyTaskListView', out.getvalue())
+        self.assertIn('Zapytania z problemami', out.getvalue())
+        # Dane wygenerowane na potrzeby EXPLAIN są wycofywane
+        self.assertFalse(Team.objects.filter(name__startswith='queryplans').exists())
+
+
+class ConditionalResponseTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='etag_user', password='password123')
+        team = Team.objects.create(name='ETag Team', owner=self.user)
+        team.members.add(self.user)
+        self.project = Project.objects.create(name='ETag Project', description='Desc', team=team)
+        self.task = Task.objects.create(title='A', description='Opis', project=self.project, assigned_to=self.user)
+
+    def test_board_revalidates_until_comment_is_added(self):
+        self.client.login(username='etag_user', password='password123')
+        url = reverse('project-detail', args=[self.project.id])
+
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Comment.objects.create(task=self.task, author=self.user, content='Nowy komentarz')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_board_revalidates_after_csrf_rotation(self):
+        self.client.login(username='etag_user', password='password123')
+        url = reverse('project-detail', args=[self.project.id])
+
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Nowy sekret (jak po rotate_token()) - strona z formularzami musi przyjść z nowym tokenem
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = _get_new_csrf_string()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_my_tasks_revalidates_until_task_is_deleted(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        Task.objects.create(title='B', description='Opis', project=self.project, assigned_to=self.user)
+        url = reverse('api_my_tasks')
+
+        etag = client.get(url)['ETag']
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.task.delete()
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ProjectExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='export_user', password='password123')
+        self.intruder = User.objects.create_user(username='export_intruder', password='password123')
+        team = Team.objects.create(name='Export Team', owner=self.user)
+        team.members.add(self.user)
+        self.project = Project.objects.create(name='Export Project', description='Desc', team=team)
+        task = Task.objects.create(title='A', description='Opis', project=self.project, assigned_to=self.user)
+        Comment.objects.create(task=task, author=self.user, content='Komentarz')
+        Task.objects.create(title='B', description='Opis', project=self.project)
+        self.url = reverse('api-project-export', args=[self.project.pk])
+
+    def test_export_errors_are_json(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        missing = reverse('api-project-export', args=[self.project.pk + 100])
+
+        for url, export_format in [(missing, 'ndjson'), (missing, 'csv'), (self.url, 'xml')]:
+            response = client.get(url, {'format': export_format})
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('detail', json.loads(response.content))
+
+    def test_ndjson_export_with_comments(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(self.url, {'format': 'ndjson', 'comments': '1'})
+
+        self.assertEqual(response.status_code, 200)
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([record['title'] for record in records], ['A', 'B'])
+        self.assertEqual(records[0]['comment_count'], 1)
+        self.assertEqual(records[0]['comments'][0]['content'], 'Komentarz')
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        response = await self.async_client.get(self.url, {'format': 'ndjson'}, headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        # Iterator async - Django nie buforuje go przez sync_to_async(list)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([json.loads(chunk)['title'] for chunk in chunks], ['A', 'B'])
+
+        response = await self.async_client.get(self.url, {'format': 'csv', 'comments': '1'}, headers=headers)
+        rows = list(csv.reader(b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(json.loads(rows[1][-1])[0]['content'], 'Komentarz')
+
+    def test_csv_export_is_limited_to_team_members(self):
+        client = APIClient()
+        client.force_authenticate(self.intruder)
+        self.assertEqual(client.get(self.url, {'format': 'csv'}).status_code, 404)
+
+        client.force_authenticate(self.user)
+        response = client.get(self.url, {'format': 'csv'})
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:2], ['id', 'title'])
+        self.assertEqual(len(rows), 3)
+
+
+class BulkTaskImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='import_user', password='password123')
+        self.outsider = User.objects.create_user(username='outsider', password='password123')
+        team = Team.objects.create(name='Import Team', owner=self.user)
+        team.members.add(self.user)
+        self.project = Project.objects.create(name='Import Project', description='Desc', team=team)
+        self.url = reverse('api-project-tasks-bulk', args=[self.project.pk])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.rows = [
+            {'title': 'A', 'description': 'Opis', 'assigned_to': 'import_user'},
+            {'title': 'B', 'description': 'Opis', 'assigned_to': self.outsider.pk},
+            {'title': 'C', 'description': 'Opis', 'status': 'bogus'},
+        ]
+
+    def test_invalid_rows_abort_whole_import(self):
+        response = self.client.post(self.url, self.rows, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1, 2])
+        self.assertFalse(self.project.tasks.exists())
+
+    def test_partial_import_keeps_valid_rows(self):
+        response = self.client.post(f'{self.url}?partial=1', self.rows, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(self.project.tasks.get().assigned_to, self.user)
+        self.assertEqual(ProjectStats.objects.get(project=self.project).total, 1)
+
+    def test_csv_import(self):
+        body = 'title,description,priority,assigned_to\nA,Opis,high,import_user\nB,Opis,low,\n'
+        response = self.client.post(self.url, body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.project.tasks.filter(priority='high').count(), 1)
+
+    def test_numeric_username_wins_over_colliding_id(self):
+        # Login członka zespołu równy ID innego członka
+        numeric = User.objects.create_user(username=str(self.user.pk), password='password123')
+        self.project.team.members.add(numeric)
+        rows = [
+            {'title': 'A', 'description': 'Opis', 'assigned_to': str(self.user.pk)},
+            {'title': 'B', 'description': 'Opis', 'assigned_to': f'id:{self.user.pk}'},
+            {'title': 'C', 'description': 'Opis', 'assigned_to': f'id:{numeric.pk}'},
+        ]
+        response = self.client.post(self.url, rows, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        assignees = dict(self.project.tasks.values_list('title', 'assigned_to'))
+        self.assertEqual(assignees, {'A': numeric.pk, 'B': self.user.pk, 'C': numeric.pk})
+
+
+class TaskStatusTransitionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='status_user', password='password123')
+        self.intruder = User.objects.create_user(username='status_intruder', password='password123')
+        team = Team.objects.create(name='Status Team', owner=self.user)
+        team.members.add(self.user)
+        self.project = Project.objects.create(name='Status Project', description='Desc', team=team)
+        self.tasks = [
+            Task.objects.create(title=f'Zadanie {i}', description='Opis', project=self.project) for i in range(3)
+        ]
+
+    def test_bulk_status_update_keeps_counters(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        before = Task.objects.get(pk=self.tasks[0].pk).updated_at
+
+        response = client.post(
+            reverse('api_tasks_status'), {'ids': [t.pk for t in self.tasks[:2]], 'status': 'done'}, format='json'
+        )
+
+        self.assertEqual(response.data['updated'], 2)
+        self.assertGreater(Task.objects.get(pk=self.tasks[0].pk).updated_at, before)
+        self.assertEqual(ProjectStats.objects.get(project=self.project).status_done, 2)
+
+    def test_bulk_status_update_ignores_foreign_tasks(self):
+        client = APIClient()
+        client.force_authenticate(self.intruder)
+        data = {'ids': [self.tasks[0].pk], 'status': 'done'}
+        response = client.post(reverse('api_tasks_status'), data, format='json')
+
+        self.assertEqual(response.data['updated'], 0)
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).status, 'todo')
+
+    def test_single_status_change_returns_card_fragment(self):
+        self.client.login(username='status_user', password='password123')
+        url = reverse('task-update-status', args=[self.tasks[0].pk, 'in_progress'])
+
+        response = self.client.post(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Task-Status'], 'in_progress')
+        self.assertContains(response, f'task-card-{self.tasks[0].pk}')
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+
+class TaskAttachmentTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, ATTACHMENT_GC_GRACE_SECONDS=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='files_user', password='password123')
+        team = Team.objects.create(name='Files Team', owner=self.user)
+        team.members.add(self.user)
+        self.project = Project.objects.create(name='Files Project', description='Desc', team=team)
+
+    def create_task(self, filename, content=b'0123456789' * 10):
+        task = Task(title=filename, description='Opis', project=self.project)
+        task.attachment = ContentFile(content, name=filename)
+        task.save()
+        return task
+
+    def test_duplicates_are_stored_once_and_collected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.create_task('spec.pdf')
+            second = self.create_task('kopia.pdf')
+
+        self.assertEqual(first.attachment.name, second.attachment.name)
+        self.assertEqual(second.attachment_name, 'kopia.pdf')
+        self.assertEqual(AttachmentBlob.objects.get().ref_count, 2)
+
+        storage = first.attachment.storage
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(second.attachment.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(second.attachment.name))
+        self.assertFalse(AttachmentBlob.objects.exists())
+
+    async def test_download_streams_asynchronously_under_asgi(self):
+        task = await sync_to_async(self.create_task)('dane.txt')
+        await self.async_client.aforce_login(self.user)
+        url = reverse('task-attachment', args=[task.pk])
+
+        response = await self.async_client.get(url)
+        self.assertTrue(response.is_async)
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), b'0123456789' * 10)
+
+        response = await self.async_client.get(url, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), b'0123456789')
+
+    def test_download_supports_range_and_etag(self):
+        task = self.create_task('dane.txt')
+        self.client.login(username='files_user', password='password123')
+        url = reverse('task-attachment', args=[task.pk])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=500-').status_code, 416)
+
+        with override_settings(ATTACHMENT_SENDFILE='nginx'):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{task.attachment.name}')
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='search_user', password='password123')
+        self.other = User.objects.create_user(username='search_other', password='password123')
+        team = Team.objects.create(name='Search Team', owner=self.user)
+        team.members.add(self.user)
+        other_team = Team.objects.create(name='Other Team', owner=self.other)
+        other_team.members.add(self.other)
+        self.project = Project.objects.create(name='Search Project', description='Desc', team=team)
+        self.other_project = Project.objects.create(name='Other Project', description='Desc', team=other_team)
+
+        self.task = Task.objects.create(title='Migracja bazy', description='Przenieść dane', project=self.project)
+        self.commented = Task.objects.create(title='Raport', description='Kwartalny', project=self.project)
+        self.comment = Comment.objects.create(task=self.commented, author=self.user, content='Czeka na migrację')
+        Task.objects.create(title='Migracja obca', description='Cudzy zespół', project=self.other_project)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, query):
+        response = self.client.get(reverse('api_search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_ranks_tasks_and_comments_within_user_teams(self):
+        results = self.search('migr')
+
+        hits = [(r['type'], r['task']) for r in results]
+        self.assertEqual(hits, [('task', self.task.pk), ('comment', self.commented.pk)])
+        self.assertEqual(results[1]['comment'], self.comment.pk)
+
+    def test_index_follows_saves_updates_and_deletes(self):
+        self.task.title = 'Wdrożenie'
+        self.task.save()
+        Task.objects.filter(pk=self.commented.pk).update(description='Wdrożenie produkcyjne')
+        self.assertEqual({r['task'] for r in self.search('wdroz')}, {self.task.pk, self.commented.pk})
+
+        self.comment.delete()
+        self.assertEqual(self.search('migr'), [])
+
+        self.task.project = self.other_project
+        self.task.save()
+        self.assertEqual([r['task'] for r in self.search('wdroz')], [self.commented.pk])
+
+    def test_backfill_command(self):
+        SearchEntry.objects.all().delete()
+        self.assertEqual(self.search('migr'), [])
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.search('migr')), 2)
+        self.assertEqual(SearchEntry.objects.count(), 4)
+
+
+class LiveBoardEventsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='live_user', password='password123')
+        self.intruder = User.objects.create_user(username='live_intruder', password='password123')
+        team = Team.objects.create(name='Live Team', owner=self.user)
+        team.members.add(self.user)
+        self.project = Project.objects.create(name='Live Project', description='Desc', team=team)
+        self.task = Task.objects.create(title='Na żywo', description='Opis', project=self.project)
+
+    def move_task(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.status = 'done'
+            self.task.save(update_fields=['status', 'updated_at'])
+
+    async def test_stream_pushes_events_after_commit(self):
+        stream = live.event_stream(self.project.pk, heartbeat=5)
+        self.assertIn('event: hello', await anext(stream))
+
+        await sync_to_async(self.move_task)()
+        chunk = await asyncio.wait_for(anext(stream), 1)
+        await stream.aclose()
+
+        self.assertIn('event: task.updated', chunk)
+        self.assertIn(f'"task": {self.task.pk}', chunk)
+        self.assertEqual(len(live.hub), 0)
+
+    async def test_many_task_changes_collapse_to_board_refresh(self):
+        stream = live.event_stream(self.project.pk, heartbeat=5)
+        await anext(stream)
+
+        def bulk_change():
+            with self.captureOnCommitCallbacks(execute=True):
+                live.publish_tasks('task.updated', [(pk, self.project.pk) for pk in range(100)])
+
+        await sync_to_async(bulk_change)()
+        chunk = await asyncio.wait_for(anext(stream), 1)
+        await stream.aclose()
+        self.assertIn('event: board.refresh', chunk)
+
+    async def test_events_endpoint_requires_membership(self):
+        url = reverse('project-events', args=[self.project.pk])
+        await self.async_client.aforce_login(self.intruder)
+        self.assertEqual((await self.async_client.get(url)).status_code, 404)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertIn(b'event: hello', await anext(chunks))
+        await chunks.aclose()
+
+    def test_postgres_backend_listens_with_psycopg(self):
+        backend = live.PostgresBackend()
+        dispatched = threading.Event()
+
+        class Listener:
+            sql = []
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                pass
+
+            def execute(self, sql):
+                self.sql.append(sql)
+
+            def notifies(self, timeout=None):
+                yield SimpleNamespace(payload=json.dumps({'project': 7, 'event': {'type': 'task.updated'}}))
+                backend._stopped.wait(timeout)
+
+        with (
+            mock.patch.object(psycopg, 'connect', return_value=Listener()) as connect,
+            mock.patch.object(live.hub, 'dispatch', side_effect=lambda *args: dispatched.set()) as dispatch,
+        ):
+            backend.start()
+            self.assertTrue(dispatched.wait(5))
+            backend.stop()
+
+        self.assertIs(connect.call_args.kwargs['autocommit'], True)
+        self.assertEqual(Listener.sql, ['LISTEN "board_events"'])
+        dispatch.assert_called_once_with(7, {'type': 'task.updated'})
+
+    def test_card_fragment(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('task-card', args=[self.task.pk]))
+
+        self.assertContains(response, f'task-card-{self.task.pk}')
+        self.assertEqual(response['X-Task-Status'], 'todo')
+        # Pod WSGI strumień nie jest dostępny
+        self.assertEqual(self.client.get(reverse('project-events', args=[self.project.pk])).status_code, 501)
+
+
+class AsyncApiViewTests(TestCase):
+    def setUp(self):
+        authentication.clear()
+        membership.clear()
+        self.user = User.objects.create_user(username='async_user', password='password123')
+        self.intruder = User.objects.create_user(username='async_intruder', password='password123')
+        team = Team.objects.create(name='Async Team', owner=self.user)
+        team.members.add(self.user)
+        self.project = Project.objects.create(name='Async Project', description='Desc', team=team)
+        for title in 'ABC':
+            Task.objects.create(title=title, description='Opis', project=self.project, assigned_to=self.user)
+
+    def tearDown(self):
+        authentication.clear()
+        membership.clear()
+
+    def auth(self, user):
+        return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    def test_views_are_async(self):
+        self.assertTrue(MyTaskListView.view_is_async)
+        self.assertTrue(ProjectStatsView.view_is_async)
+
+    async def test_my_tasks_pages_and_revalidates(self):
+        url = reverse('api_my_tasks')
+        response = await self.async_client.get(url, {'page_size': 2}, headers=self.auth(self.user))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([task['title'] for task in data['results']], ['A', 'B'])
+        self.assertEqual(data['results'][0]['team_name'], 'Async Team')
+        self.assertIsNotNone(data['next'])
+
+        revalidated = await self.async_client.get(
+            url, {'page_size': 2}, headers={**self.auth(self.user), 'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    async def test_sync_authenticators_get_drf_request(self):
+        # Authenticator bez aauthenticate działa przez sync_to_async, z Requestem DRF
+        url = reverse('api-project-stats', args=[self.project.pk])
+        await self.async_client.aforce_login(self.user)
+        with mock.patch.object(ProjectStatsView, 'authentication_classes', [SessionAuthentication]):
+            response = await self.async_client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_tasks'], 3)
+
+    async def test_stats_requires_membership(self):
+        url = reverse('api-project-stats', args=[self.project.pk])
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+        self.assertEqual((await self.async_client.get(url, headers=self.auth(self.intruder))).status_code, 404)
+
+        response = await self.async_client.get(url, headers=self.auth(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_tasks'], 3)
+
+    async def test_async_authentication_rejects_revoked_token(self):
+        token = AccessToken.for_user(self.user)
+        await sync_to_async(authentication.revoke_token)(token)
+
+        response = await self.async_client.get(reverse('api_my_tasks'), headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 401)
+
+
+class StaticFilesTests(TestCase):
+    async def test_async_requests_stream_static_files(self):
+        response = await self.async_client.get('/static/rest_framework/css/bootstrap.min.css')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertIn(b'Bootstrap', b''.join([chunk async for chunk in response.streaming_content]))
+
+    def test_manifest_files_are_compressed_and_immutable(self):
+        source, root = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        self.addCleanup(shutil.rmtree, root)
+        os.makedirs(os.path.join(source, 'css'))
+        with open(os.path.join(source, 'css', 'app.css'), 'w') as f:
+            f.write('body { color: #123456; }\n' * 50)
+
+        storages = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+        }
+        with override_settings(
+            STATIC_ROOT=root, STATICFILES_DIRS=[source], STORAGES=storages, WHITENOISE_USE_FINDERS=False,
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            with open(os.path.join(root, 'staticfiles.json')) as f:
+                hashed = json.load(f)['paths']['css/app.css']
+            self.assertTrue(os.path.exists(os.path.join(root, hashed + '.br')))
+
+            response = self.client_class().get(f'/static/{hashed}', headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('immutable', response['Cache-Control'])
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        fragments.fragment_cache().clear()
+        fragments.stats.reset()
+        self.user = User.objects.create_user(username='fragment_user', password='password123')
+        team = Team.objects.create(name='Fragment Team', owner=self.user)
+        team.members.add(self.user)
+        self.project = Project.objects.create(name='Fragment Project', description='Desc', team=team)
+        self.tasks = [
+            Task.objects.create(title=f'Karta {i}', description='Opis', project=self.project, assigned_to=self.user)
+            for i in range(4)
+        ]
+        self.client.force_login(self.user)
+        self.url = reverse('project-detail', args=[self.project.pk])
+
+    def test_unchanged_board_is_served_from_cache(self):
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Karta 3')
+        self.assertNotContains(response, fragments.CSRF_PLACEHOLDER)
+
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Karta 3')
+        self.assertFalse(any('"projects_task"' in query['sql'] for query in second.captured_queries))
+        self.assertLess(len(second.captured_queries), len(first.captured_queries))
+        self.assertEqual(fragments.stats.snapshot()['column'], {'hits': 3, 'misses': 3})
+
+    def test_changed_task_rerenders_only_its_card(self):
+        self.client.get(self.url)
+        Comment.objects.create(task=self.tasks[0], author=self.user, content='Nowy komentarz')
+
+        response = self.client.get(self.url)
+        self.assertContains(response, 'bi-chat-left-text')
+        self.assertEqual(fragments.stats.snapshot()['card'], {'hits': 3, 'misses': 5})
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.client.get(self.url)
+        api = APIClient()
+        api.force_authenticate(self.user)
+        self.assertEqual(api.get(reverse('api_fragment_stats')).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(api.get(reverse('api_fragment_stats')).data['card']['misses'], 4)
+
+
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        dashboard._cache().clear()
+        self.user = User.objects.create_user(username='dashboard_user', password='password123')
+        self.other = User.objects.create_user(username='dashboard_other', password='password123')
+        self.team = self.make_team('Zespół 0')
+        self.project = Project.objects.create(name='Projekt Dashboard', description='Desc', team=self.team)
+        self.task = Task.objects.create(
+            title='Raport kwartalny', description='Opis', project=self.project, assigned_to=self.user
+        )
+        self.client.force_login(self.user)
+
+    def make_team(self, name):
+        team = Team.objects.create(name=name, owner=self.user)
+        team.members.add(self.user, self.other)
+        return team
+
+    def get_dashboard(self):
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        return response, queries
+
+    def test_query_count_does_not_grow_with_teams_and_tasks(self):
+        authentication.clear()
+        _, small = self.get_dashboard()
+
+        dashboard._cache().clear()
+        for i in range(1, 6):
+            team = self.make_team(f'Zespół {i}')
+            project = Project.objects.create(name=f'Projekt {i}', description='Desc', team=team)
+            for j in range(4):
+                Task.objects.create(title=f'Zadanie {i}.{j}', description='-', project=project, assigned_to=self.user)
+        membership.clear()
+        authentication.clear()
+        response, large = self.get_dashboard()
+
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(len(response.context['teams']), 6)
+        self.assertEqual(response.context['open_count'], 21)
+        self.assertContains(response, 'Projekt 5')
+
+        _, cached = self.get_dashboard()
+        self.assertFalse(any('"projects_task"' in query['sql'] for query in cached.captured_queries))
+
+    def test_summary_follows_task_and_membership_changes(self):
+        response, _ = self.get_dashboard()
+        self.assertContains(response, 'Raport kwartalny')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(pk=self.task.pk).update(status='done')
+        response, _ = self.get_dashboard()
+        self.assertNotContains(response, 'Raport kwartalny')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title='Przypisane', description='Opis', project=self.project, assigned_to=self.other)
+            self.task.refresh_from_db()
+            self.task.status = 'todo'
+            self.task.save()
+        response, _ = self.get_dashboard()
+        self.assertContains(response, 'Raport kwartalny')
+        self.assertEqual(response.context['teams'][0]['member_count'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.members.remove(self.other)
+        response, _ = self.get_dashboard()
+        self.assertEqual(response.context['teams'][0]['member_count'], 1)
+
+
+class PerfToolingTests(TransactionTestCase):
+    # Wątki benchmarku czytają też z replik, jeśli są skonfigurowane (DB_REPLICA_*)
+    databases = '__all__'
+
+    def test_seed_perf_and_bench_report_every_route(self):
+        call_command(
+            'seed_perf', teams=2, members_per_team=3, projects_per_team=3, tasks=20, comments=2, stdout=StringIO()
+        )
+        task_counts = list(Project.objects.annotate(n=Count('tasks')).values_list('n', flat=True))
+        self.assertGreater(max(task_counts), min(task_counts))
+        self.assertEqual(ProjectStats.objects.get(project_id=Project.objects.first().pk).total, task_counts[0])
+
+        output = tempfile.NamedTemporaryFile(suffix='.json', delete=False).name
+        self.addCleanup(os.remove, output)
+        call_command('bench', requests=3, concurrency=2, warmup=0, output=output, stdout=StringIO(), stderr=StringIO())
+        with open(output) as f:
+            results = json.load(f)
+
+        self.assertIn('project-events', results['meta']['skipped'])
+        board = results['routes']['project-detail']
+        self.assertEqual(board['requests'], 3)
+        self.assertEqual(board['status'], {'200': 3})
+        self.assertGreater(board['queries_per_request'], 0)
+        self.assertLessEqual(board['p50_ms'], board['p99_ms'])
+        self.assertEqual(results['routes']['api_my_tasks']['errors'], 0)
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    databases = '__all__'
+
+    def test_loadtest_reports_every_route(self):
+        call_command(
+            'seed_perf', teams=1, members_per_team=2, projects_per_team=2, tasks=10, comments=0, stdout=StringIO()
+        )
+
+        output = tempfile.NamedTemporaryFile(suffix='.json', delete=False).name
+        self.addCleanup(os.remove, output)
+        call_command(
+            'loadtest', base_url=self.live_server_url, clients=4, requests=12, output=output,
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        with open(output) as f:
+            results = json.load(f)
+
+        self.assertEqual(set(results['routes']), {'api_my_tasks', 'api-project-stats'})
+        for route in results['routes'].values():
+            self.assertEqual(route['requests'], 12)
+            self.assertEqual(route['errors'], 0)
+            self.assertEqual(route['clients'], 4)
@@ -1,31 +1,61 @@
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import F
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, F, Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
+from django.views.decorators.http import require_POST
 from django.views.generic import (
     CreateView,
     DeleteView,
     DetailView,
     FormView,
     ListView,
+    TemplateView,
     UpdateView,
 )
 from drf_spectacular.utils import OpenApiParameter, OpenApiTypes, extend_schema
-from rest_framework import generics, permissions, viewsets
+from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 
+from apps.replicas.decorators import primary_reads
+
+from .async_views import AsyncAPIView
+from .board import BOARD_COLUMN_LIMIT, with_card_data
+from .conditional import csrf_part, make_etag, not_modified_response, project_validators, set_validators
+from .dashboard import get_summary
+from .downloads import attachment_response
+from .export import export_rows
 from .forms import AddMemberForm, CommentForm, ProjectForm, TaskForm
-from .models import Project, Task, Team
+from .fragments import board_html, card_html, column_html
+from .fragments import stats as fragment_stats
+from .importing import import_tasks
+from .live import event_stream
+from .membership import aget_team_ids, get_team_ids
+from .models import Project, ProjectStats, Task, Team
+from .pagination import TaskKeysetPagination
+from .parsers import CSVParser
 from .permissions import IsTeamMember
-from .serializers import ProjectSerializer, TaskSerializer
+from .renderers import CSVRenderer, NDJSONRenderer
+from .search import DEFAULT_LIMIT, MAX_LIMIT, search
+from .serializers import (
+    ProjectSerializer,
+    SearchResultSerializer,
+    TaskImportSerializer,
+    TaskSerializer,
+    TaskStatusBulkSerializer,
+)
 
 
 class ProjectViewSet(viewsets.GenericViewSet):
     """
-    ViewSet ograniczony tylko do obsługi statystyk.
+    ViewSet ograniczony do eksportu i importu zadań projektu (statystyki: ProjectStatsView).
     Dziedziczy po GenericViewSet, aby nie wystawiać automatycznie 
     endpointów CRUD (list, create, delete).
     """
@@ -34,41 +64,96 @@ class ProjectViewSet(viewsets.GenericViewSet):
     permission_classes = [permissions.IsAuthenticated, IsTeamMember]
 
     def get_queryset(self):
-        return Project.objects.filter(team__members=self.request.user).distinct()
+        return Project.objects.filter(team_id__in=get_team_ids(self.request.user)).select_related("stats")
     
     @extend_schema(
-        summary="Pobierz statystyki projektu",
-        description="Zwraca liczbę zadań ogółem i zakończonych dla danego projektu.",
-        responses={200: OpenApiTypes.OBJECT},
+        summary="Eksportuj zadania projektu",
+        description="Strumieniowy eksport zadań (NDJSON lub CSV), opcjonalnie z komentarzami.",
+        parameters=[
+            OpenApiParameter(
+                name="format",
+                description="Format eksportu",
+                required=False,
+                type=OpenApiTypes.STR,
+                enum=["ndjson", "csv"],
+            ),
+            OpenApiParameter(
+                name="comments",
+                description="Dołącz komentarze do każdego zadania (1/0)",
+                required=False,
+                type=OpenApiTypes.BOOL,
+            ),
+        ],
+        responses={200: OpenApiTypes.BINARY},
     )
-    @action(detail=True, methods=["get"])
-    def stats(self, request, pk=None):
+    @action(detail=True, methods=["get"], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request, pk=None):
         """
-        Endpoint: GET /api/projects/{id}/stats/
+        Endpoint: GET /api/projects/{id}/export/?format=ndjson|csv&comments=1
         """
         project = self.get_object()
+        include_comments = request.query_params.get("comments", "").lower() in ("1", "true", "yes")
+
+        renderer = request.accepted_renderer
+        # Pod ASGI iterator async - synchroniczny Django zbuforowałby w całości przed wysłaniem
+        rows = export_rows(
+            renderer.format, project, include_comments, asynchronous=isinstance(request._request, ASGIRequest)
+        )
+        response = StreamingHttpResponse(rows, content_type=f"{renderer.media_type}; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="project-{project.pk}-tasks.{renderer.format}"'
+        return response
 
-        total_tasks = project.tasks.count()
-        completed_tasks = project.tasks.filter(status="done").count()
 
+    @extend_schema(
+        summary="Masowy import zadań",
+        description=(
+            "Przyjmuje listę zadań w JSON lub CSV (nagłówek: title, description, priority, status, "
+            "due_date, assigned_to). Z ?partial=1 poprawne wiersze są zapisywane mimo błędów w innych."
+        ),
+        parameters=[
+            OpenApiParameter(name="partial", required=False, type=OpenApiTypes.BOOL),
+            OpenApiParameter(name="batch_size", required=False, type=OpenApiTypes.INT),
+        ],
+        request=TaskImportSerializer(many=True),
+        responses={201: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+    )
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="tasks/bulk",
+        url_name="tasks-bulk",
+        parser_classes=[JSONParser, CSVParser],
+    )
+    def bulk_tasks(self, request, pk=None):
+        """
+        Endpoint: POST /api/projects/{id}/tasks/bulk/
+        """
+        project = self.get_object()
+        rows = request.data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValidationError("Oczekiwano listy zadań.")
+        max_rows = getattr(settings, "TASK_IMPORT_MAX_ROWS", 50000)
+        if len(rows) > max_rows:
+            raise ValidationError(f"Maksymalnie {max_rows} zadań w jednym imporcie.")
+
+        partial = request.query_params.get("partial", "").lower() in ("1", "true", "yes")
+        result = import_tasks(project, rows, partial=partial, batch_size=request.query_params.get("batch_size"))
+
+        # Bez ?partial każdy błąd oznacza, że nic nie zostało zapisane
+        failed = result.errors and not result.created
         return Response(
-            {
-                "project_id": project.id,
-                "project_name": project.name,
-                "total_tasks": total_tasks,
-                "completed_tasks": completed_tasks,
-                "remaining_tasks": total_tasks - completed_tasks,
-                "progress_percent": round((completed_tasks / total_tasks) * 100, 1) if total_tasks > 0 else 0,
-            }
+            {"created": result.created, "errors": result.errors},
+            status=status.HTTP_400_BAD_REQUEST if failed else status.HTTP_201_CREATED,
         )
 
 
-class MyTaskListView(generics.ListAPIView):
+class MyTaskListView(AsyncAPIView, generics.GenericAPIView):
     """
-    Endpoint: GET /api/my-tasks/
+    Endpoint: GET /api/my-tasks/ (async - pod ASGI nie zajmuje wątku na czas zapytań)
     """
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskKeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -82,7 +167,8 @@ class MyTaskListView(generics.ListAPIView):
             # Domyślnie wykluczamy zakończone, jeśli nie podano statusu
             queryset = queryset.exclude(status="done")
 
-        return queryset.order_by(F("due_date").asc(nulls_last=True), "created_at")
+        # Kolejność musi odpowiadać kluczowi kursora (TaskKeysetPagination)
+        return queryset.order_by(F("due_date").asc(nulls_last=True), "created_at", "id")
 
     @extend_schema(
         summary="Pobierz moje zadania",
@@ -94,25 +180,166 @@ class MyTaskListView(generics.ListAPIView):
                 type=OpenApiTypes.STR,
                 enum=['todo', 'in_progress', 'done']
             )
-        ]
+        ],
+        responses=TaskSerializer(many=True),
+    )
+    async def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # Walidator z jednego agregatu: liczba zadań, ostatnia zmiana zadania i ich projektów.
+        # Bez Last-Modified - usunięcie zadania nie przesuwa MAX(updated_at).
+        scope = await queryset.order_by().aaggregate(
+            count=Count("id"), last_task=Max("updated_at"), last_project=Max("project__stats__changed_at")
+        )
+        etag = make_etag("my-tasks", request.user.pk, request.get_full_path(), *scope.values())
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return set_validators(self.paginator.get_paginated_response(serializer.data), etag)
+
+
+class ProjectStatsView(AsyncAPIView):
+    """
+    Endpoint: GET /api/projects/{id}/stats/ (async)
+    """
+    permission_classes = [permissions.IsAuthenticated, IsTeamMember]
+
+    @extend_schema(
+        summary="Pobierz statystyki projektu",
+        description="Zwraca liczbę zadań ogółem, zakończonych, przeterminowanych oraz wg statusu i priorytetu.",
+        responses={200: OpenApiTypes.OBJECT},
     )
+    async def get(self, request, pk):
+        project = (
+            await Project.objects.filter(pk=pk, team_id__in=await aget_team_ids(request.user))
+            .select_related("stats")
+            .afirst()
+        )
+        if project is None:
+            raise Http404("Nie znaleziono projektu.")
+        await self.acheck_object_permissions(request, project)
+
+        # Liczniki są utrzymywane przyrostowo - odczyt to jeden wiersz ProjectStats
+        stats = await ProjectStats.objects.afor_project(project)
+
+        # "Przeterminowane" zmienia się z datą, więc wchodzi do walidatora
+        etag, last_modified = project_validators(stats, "stats", stats.overdue_as_of)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        total_tasks = stats.total
+        completed_tasks = stats.status_done
+
+        response = Response(
+            {
+                "project_id": project.id,
+                "project_name": project.name,
+                "total_tasks": total_tasks,
+                "completed_tasks": completed_tasks,
+                "remaining_tasks": total_tasks - completed_tasks,
+                "progress_percent": round((completed_tasks / total_tasks) * 100, 1) if total_tasks > 0 else 0,
+                "overdue_tasks": stats.overdue,
+                "by_status": {status: getattr(stats, f"status_{status}") for status, _ in Task.STATUS_CHOICES},
+                "by_priority": {
+                    priority: getattr(stats, f"priority_{priority}") for priority, _ in Task.PRIORITY_CHOICES
+                },
+            }
+        )
+        return set_validators(response, etag, last_modified)
+
+
+class TaskStatusBulkUpdateView(generics.GenericAPIView):
+    """
+    Endpoint: POST /api/tasks/status/
+    """
+    serializer_class = TaskStatusBulkSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        summary="Zmień status wielu zadań",
+        description="Przenosi zadania o podanych ID (tylko z zespołów użytkownika) do nowego statusu.",
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data["status"]
+
+        # Jeden UPDATE ... WHERE id IN (...) w projektach zespołów użytkownika.
+        # TaskQuerySet.update() podbija updated_at i przelicza liczniki ProjectStats.
+        tasks = Task.objects.filter(project__team_id__in=get_team_ids(request.user))
+        updated = (
+            tasks.filter(pk__in=serializer.validated_data["ids"])
+            .exclude(status=new_status)
+            .update(status=new_status)
+        )
+        return Response({"updated": updated, "status": new_status})
+
+
+class FragmentCacheStatsView(generics.GenericAPIView):
+    """
+    Endpoint: GET /api/fragments/stats/ - trafienia i chybienia cache fragmentów w tym procesie.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(summary="Statystyki cache fragmentów tablicy", responses={200: OpenApiTypes.OBJECT})
     def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
-        
-        
-        
+        return Response(fragment_stats.snapshot())
+
+
+class SearchAPIView(generics.GenericAPIView):
+    """
+    Endpoint: GET /api/search/?q=
+    """
+    serializer_class = SearchResultSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        summary="Szukaj w zadaniach i komentarzach",
+        description="Ranking dopasowań w tytułach i opisach zadań oraz w komentarzach z zespołów użytkownika.",
+        parameters=[
+            OpenApiParameter(name="q", description="Szukane słowa (prefiksy)", required=True, type=OpenApiTypes.STR),
+            OpenApiParameter(name="limit", description=f"Maks. {MAX_LIMIT}", required=False, type=OpenApiTypes.INT),
+        ],
+    )
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "").strip()
+        try:
+            limit = min(int(request.query_params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({"limit": "Limit musi być liczbą."})
+
+        results = search(query, get_team_ids(request.user), limit=max(limit, 1))
+        return Response({"query": query, "results": self.get_serializer(results, many=True).data})
+
+
 # --- WIDOKI HTML (FRONTEND) ---
 
-class DashboardView(LoginRequiredMixin, ListView):
+class SearchView(LoginRequiredMixin, TemplateView):
+    template_name = 'projects/search_results.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        context['results'] = search(query, get_team_ids(self.request.user)) if query else []
+        return context
+
+
+class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'dashboard.html'
-    context_object_name = 'my_tasks'
 
-    def get_queryset(self):
-        return Task.objects.filter(assigned_to=self.request.user).exclude(status='done').order_by('due_date')
-    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['teams'] = Team.objects.filter(members=self.request.user).distinct()
+        # Stała liczba zapytań niezależnie od liczby zadań i zespołów; wynik w cache per użytkownik
+        summary = get_summary(self.request.user, get_team_ids(self.request.user))
+        context['my_tasks'] = summary['tasks']
+        context['open_count'] = summary['open_count']
+        context['teams'] = summary['teams']
         return context
 
 class ProjectListView(LoginRequiredMixin, ListView):
@@ -121,7 +348,7 @@ class ProjectListView(LoginRequiredMixin, ListView):
     context_object_name = 'projects'
 
     def get_queryset(self):
-        return Project.objects.filter(team__members=self.request.user).distinct()
+        return Project.objects.filter(team_id__in=get_team_ids(self.request.user))
 
 class ProjectDetailView(LoginRequiredMixin, DetailView):
     model = Project
@@ -130,17 +357,59 @@ class ProjectDetailView(LoginRequiredMixin, DetailView):
 
     def get_queryset(self):
         # Zabezpieczenie: user widzi tylko swoje projekty
-        return Project.objects.filter(team__members=self.request.user).distinct()
+        return Project.objects.filter(team_id__in=get_team_ids(self.request.user)).select_related('stats')
+
+    column_limit = BOARD_COLUMN_LIMIT
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        self.stats = ProjectStats.objects.for_project(self.object)
+        etag, last_modified = project_validators(
+            self.stats, 'board', request.user.pk, self.column_limit, csrf_part(request)
+        )
+
+        # Oczekujące komunikaty (messages) muszą zostać wyrenderowane
+        if not len(messages.get_messages(request)):
+            not_modified = not_modified_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+
+        response = self.render_to_response(self.get_context_data(object=self.object))
+        return set_validators(response, etag, last_modified)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        tasks = self.object.tasks.select_related('assigned_to').all()
-        # Rozdzielamy zadania na kolumny KANBAN
-        context['todo_tasks'] = tasks.filter(status='todo')
-        context['in_progress_tasks'] = tasks.filter(status='in_progress')
-        context['done_tasks'] = tasks.filter(status='done')
+        # Kolumny z cache fragmentów; przy chybieniu cała tablica jednym zapytaniem
+        context['columns'], context['board'] = board_html(
+            self.object, self.stats, self.request, limit=self.column_limit
+        )
         return context
 
+
+class ProjectBoardColumnView(LoginRequiredMixin, DetailView):
+    """
+    Fragment HTML z kolejną porcją kart jednej kolumny ("Pokaż więcej").
+    """
+    model = Project
+    column_limit = BOARD_COLUMN_LIMIT
+
+    def get_queryset(self):
+        return Project.objects.filter(team_id__in=get_team_ids(self.request.user))
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        status = self.kwargs['status']
+        if status not in dict(Task.STATUS_CHOICES):
+            raise Http404("Nieznany status.")
+        try:
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            offset = 0
+        stats = ProjectStats.objects.for_project(self.object)
+        html, _ = column_html(self.object, stats, status, request, offset=offset, limit=self.column_limit)
+        return HttpResponse(html)
+
+
 class ProjectCreateView(LoginRequiredMixin, CreateView):
     model = Project
     form_class = ProjectForm
@@ -157,15 +426,21 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
     form_class = TaskForm
     template_name = 'projects/task_form.html'
 
+    def get_project(self):
+        # Zadania można dodawać tylko w projektach własnych zespołów
+        if not hasattr(self, '_project'):
+            self._project = get_object_or_404(
+                Project, pk=self.kwargs['project_id'], team_id__in=get_team_ids(self.request.user)
+            )
+        return self._project
+
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        project = get_object_or_404(Project, pk=self.kwargs['project_id'])
-        kwargs['project'] = project
+        kwargs['project'] = self.get_project()
         return kwargs
 
     def form_valid(self, form):
-        project = get_object_or_404(Project, pk=self.kwargs['project_id'])
-        form.instance.project = project
+        form.instance.project = self.get_project()
         return super().form_valid(form)
 
     def get_success_url(self):
@@ -179,7 +454,7 @@ class ProjectUpdateView(LoginRequiredMixin, UpdateView):
     success_url = reverse_lazy('project-list')
     
     def get_queryset(self):
-        return Project.objects.filter(team__members=self.request.user)
+        return Project.objects.filter(team_id__in=get_team_ids(self.request.user))
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -203,7 +478,7 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
     template_name = 'projects/task_form.html'
     
     def get_queryset(self):
-        return Task.objects.filter(project__team__members=self.request.user)
+        return Task.objects.filter(project__team_id__in=get_team_ids(self.request.user))
 
     def get_success_url(self):
         return reverse('project-detail', kwargs={'pk': self.object.project.id})
@@ -217,7 +492,7 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
     template_name = 'projects/confirm_delete.html'
     
     def get_queryset(self):
-        return Task.objects.filter(project__team__members=self.request.user)
+        return Task.objects.filter(project__team_id__in=get_team_ids(self.request.user))
 
     def get_success_url(self):
         return reverse('project-detail', kwargs={'pk': self.object.project.id})
@@ -229,14 +504,14 @@ class TeamListView(LoginRequiredMixin, ListView):
     context_object_name = 'teams'
 
     def get_queryset(self):
-        return Team.objects.filter(members=self.request.user)
+        return Team.objects.filter(pk__in=get_team_ids(self.request.user))
 
 class TeamDetailView(LoginRequiredMixin, DetailView):
     model = Team
     template_name = 'projects/team_detail.html'
     
     def get_queryset(self):
-        return Team.objects.filter(members=self.request.user)
+        return Team.objects.filter(pk__in=get_team_ids(self.request.user))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -289,14 +564,62 @@ class TeamCreateView(LoginRequiredMixin, CreateView):
     
     
 @login_required
+@require_POST
 def update_task_status(request, pk, status):
-    task = get_object_or_404(Task, pk=pk, project__team__members=request.user)
+    tasks = with_card_data(Task.objects.filter(project__team_id__in=get_team_ids(request.user)))
+    task = get_object_or_404(tasks, pk=pk)
     
-    if status in dict(Task.STATUS_CHOICES):
+    if status in dict(Task.STATUS_CHOICES) and task.status != status:
         task.status = status
-        task.save()
-    
-    return redirect('project-detail', pk=task.project.id)
+        # Zapisujemy tylko zmienione kolumny zamiast całego wiersza
+        task.save(update_fields=['status', 'updated_at'])
+
+    # Tablica podmienia tylko kartę zadania; bez JS wracamy na tablicę jak dawniej
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        response = HttpResponse(card_html(task, request))
+        response['X-Task-Status'] = task.status
+        return response
+    return redirect('project-detail', pk=task.project_id)
+
+
+@primary_reads
+@login_required
+def task_card(request, pk):
+    """
+    Fragment z jedną kartą zadania - tablica dociąga go po zdarzeniu SSE.
+    """
+    tasks = with_card_data(Task.objects.filter(project__team_id__in=get_team_ids(request.user)))
+    task = get_object_or_404(tasks, pk=pk)
+    response = HttpResponse(card_html(task, request))
+    response['X-Task-Status'] = task.status
+    return response
+
+
+@login_required
+async def project_events(request, pk):
+    """
+    Strumień SSE ze zmianami na tablicy projektu (wymaga serwera ASGI).
+    """
+    user = await request.auser()
+    team_id = await Project.objects.filter(pk=pk).values_list('team_id', flat=True).afirst()
+    if team_id is None or team_id not in await aget_team_ids(user):
+        raise Http404("Nie znaleziono projektu.")
+    if not isinstance(request, ASGIRequest):
+        # Pod WSGI strumień zająłby wątek serwera na cały czas połączenia
+        return HttpResponse("Zdarzenia na żywo wymagają serwera ASGI.", status=501, content_type='text/plain')
+
+    response = StreamingHttpResponse(event_stream(pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx nie może buforować strumienia
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required
+def download_task_attachment(request, pk):
+    task = get_object_or_404(Task.objects.filter(project__team_id__in=get_team_ids(request.user)), pk=pk)
+    if not task.attachment:
+        raise Http404("Zadanie nie ma załącznika")
+    return attachment_response(request, task)
 
 
 class TaskDetailView(LoginRequiredMixin, DetailView):
@@ -304,6 +627,9 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
     template_name = 'projects/task_detail.html'
     context_object_name = 'task'
 
+    def get_queryset(self):
+        return Task.objects.filter(project__team_id__in=get_team_ids(self.request.user))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['comment_form'] = CommentForm()
@@ -0,0 +1,35 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from .router import routing
+
+
+def primary_reads(view):
+    """
+    Widok czyta tylko z bazy głównej. Dla żądań wywołanych cudzym zapisem
+    (np. tablica dociąga kartę po zdarzeniu SSE wysłanym po COMMIT) -
+    ciasteczko ``COOKIE_NAME`` chroni tylko autora zmiany, a replika może
+    jeszcze nie mieć nowego wiersza.
+    """
+
+    def use_primary():
+        state = routing.get()
+        if state is not None:
+            state.use_replica = False
+
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            use_primary()
+            return await view(request, *args, **kwargs)
+
+    else:
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            use_primary()
+            return view(request, *args, **kwargs)
+
+    return wrapper
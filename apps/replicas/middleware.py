@@ -0,0 +1,66 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .router import RoutingState, get_config, routing
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Ustawia stan routera na czas żądania i po zapisie przykleja użytkownika
+    do bazy głównej ciasteczkiem ``COOKIE_NAME`` (znacznik czasu końca okna).
+    Pod ASGI stan w ContextVar przechodzi też do widoków synchronicznych (sync_to_async kopiuje kontekst).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        config = get_config()
+        state = self.state_for(request, config)
+        token = routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing.reset(token)
+        return self.process_response(response, state, config)
+
+    async def __acall__(self, request):
+        config = get_config()
+        state = self.state_for(request, config)
+        token = routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing.reset(token)
+        return self.process_response(response, state, config)
+
+    def state_for(self, request, config):
+        return RoutingState(use_replica=request.method in SAFE_METHODS and not self.is_sticky(request, config))
+
+    def process_response(self, response, state, config):
+        if state.wrote and config["STICKY_SECONDS"]:
+            response.set_cookie(
+                config["COOKIE_NAME"],
+                str(int(time.time() + config["STICKY_SECONDS"])),
+                max_age=config["STICKY_SECONDS"],
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def is_sticky(self, request, config):
+        try:
+            return float(request.COOKIES.get(config["COOKIE_NAME"], 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,73 @@
+"""
+Router baz: odczyty z replik, zapisy i wszystko poza żądaniami na "default".
+
+O tym, czy odczyt może iść do repliki, decyduje stan żądania ustawiany przez
+ReplicaRoutingMiddleware (contextvar - działa też w wątkach sync_to_async).
+Repliki dostają tylko odczyty bezpiecznych metod (GET, HEAD, OPTIONS) poza
+transakcją. Pierwszy zapis w żądaniu przełącza resztę żądania na bazę
+główną, a middleware ustawia ciasteczko, dzięki któremu kolejne żądania
+użytkownika przez ``STICKY_SECONDS`` czytają z bazy głównej i widzą jego
+własne zmiany mimo opóźnienia replikacji.
+"""
+
+import random
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULTS = {
+    # Aliasy z DATABASES, np. ["replica1", "replica2"]; pusta lista - wszystko na "default"
+    "REPLICAS": [],
+    # Tyle sekund po zapisie użytkownik czyta z bazy głównej
+    "STICKY_SECONDS": 10,
+    "COOKIE_NAME": "primary_until",
+    # Aplikacje zawsze czytane z bazy głównej (sesja zapisana przy logowaniu musi być od razu widoczna)
+    "PRIMARY_APPS": ["sessions"],
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "REPLICA_ROUTER", {})}
+
+
+@dataclass
+class RoutingState:
+    use_replica: bool = False
+    wrote: bool = False
+
+
+# Poza żądaniem (komendy, zadania w tle) brak stanu - baza główna
+routing = ContextVar("replica_routing", default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        if state is None or not state.use_replica or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        config = get_config()
+        if not config["REPLICAS"] or model._meta.app_label in config["PRIMARY_APPS"]:
+            return DEFAULT_DB_ALIAS
+        return random.choice(config["REPLICAS"])
+
+    def db_for_write(self, model, **hints):
+        state = routing.get()
+        if state is not None:
+            # Od pierwszego zapisu reszta żądania czyta z bazy głównej
+            state.use_replica = False
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_config()["REPLICAS"]}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Repliki dostają schemat przez replikację
+        if db in get_config()["REPLICAS"]:
+            return False
+        return None
@@ -0,0 +1,136 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.projects import dashboard, membership
+from apps.projects.models import Project, Task, Team
+from apps.users import authentication
+
+from .middleware import ReplicaRoutingMiddleware
+from .router import ReplicaRouter, RoutingState, routing
+
+REPLICAS = {'REPLICAS': ['replica1', 'replica2'], 'STICKY_SECONDS': 30, 'COOKIE_NAME': 'primary_until'}
+
+
+@override_settings(REPLICA_ROUTER=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def handle(self, request, write=False):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Project))
+            if write:
+                seen.append(self.router.db_for_write(Project))
+                seen.append(self.router.db_for_read(Project))
+            return HttpResponse()
+
+        return ReplicaRoutingMiddleware(view)(request), seen
+
+    def test_safe_reads_go_to_replicas(self):
+        _, seen = self.handle(self.factory.get('/projects/'))
+        self.assertIn(seen[0], REPLICAS['REPLICAS'])
+
+    def test_reads_after_write_stick_to_primary(self):
+        response, seen = self.handle(self.factory.post('/projects/add/'), write=True)
+        self.assertEqual(seen, ['default', 'default', 'default'])
+        self.assertIn('primary_until', response.cookies)
+
+        request = self.factory.get('/projects/')
+        request.COOKIES['primary_until'] = response.cookies['primary_until'].value
+        _, seen = self.handle(request)
+        self.assertEqual(seen, ['default'])
+
+        request.COOKIES['primary_until'] = '0'
+        _, seen = self.handle(request)
+        self.assertIn(seen[0], REPLICAS['REPLICAS'])
+
+    def test_outside_requests_and_primary_apps_use_default(self):
+        self.assertIsNone(routing.get())
+        self.assertEqual(self.router.db_for_read(Project), 'default')
+
+        def view(request):
+            return HttpResponse(self.router.db_for_read(Session))
+
+        response = ReplicaRoutingMiddleware(view)(self.factory.get('/'))
+        self.assertEqual(response.content, b'default')
+        self.assertFalse(self.router.allow_migrate('replica1', 'projects'))
+
+
+
+@override_settings(REPLICA_ROUTER=REPLICAS)
+class CacheFillTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='anna', password='pass12345')
+        self.team = Team.objects.create(name='Zespół', owner=self.user)
+        self.team.members.add(self.user)
+        project = Project.objects.create(name='Projekt', team=self.team)
+        Task.objects.create(title='Zadanie', project=project, assigned_to=self.user)
+        authentication.clear()
+        membership.clear()
+        dashboard._cache().clear()
+        self.addCleanup(authentication.clear)
+        self.addCleanup(membership.clear)
+
+    def test_cache_fills_skip_lagging_replica(self):
+        # Replika "nie widzi" jeszcze danych z setUp - każdy odczyt z niej trafiłby do cache nieaktualny
+        lagging = []
+
+        def db_for_read(router, model, **hints):
+            lagging.append(model._meta.label)
+            return 'default'
+
+        token = routing.set(RoutingState(use_replica=True))
+        self.addCleanup(routing.reset, token)
+        with mock.patch.object(ReplicaRouter, 'db_for_read', db_for_read):
+            team_ids = membership.get_team_ids(self.user)
+            user = authentication.load_user(str(self.user.pk))
+            summary = dashboard.get_summary(self.user, team_ids)
+            authentication.RevocationList().refresh(force=True)
+            self.assertEqual(lagging, [])
+
+            Project.objects.count()
+            self.assertEqual(lagging, ['projects.Project'])
+
+        self.assertEqual(team_ids, {self.team.pk})
+        self.assertEqual(user, self.user)
+        self.assertEqual(len(summary['tasks']), 1)
+
+
+@override_settings(REPLICA_ROUTER=REPLICAS)
+class PrimaryReadsTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='ola', password='pass12345')
+        team = Team.objects.create(name='Zespół', owner=user)
+        team.members.add(user)
+        self.project = Project.objects.create(name='Projekt', team=team)
+        self.task = Task.objects.create(title='Nowe zadanie', project=self.project)
+        self.client.force_login(user)
+
+    def routed_reads(self, url):
+        # Zapamiętuje, czy odczyt mógł pójść do repliki (stan routera w chwili zapytania)
+        use_replica = []
+
+        def db_for_read(router, model, **hints):
+            use_replica.append(routing.get().use_replica)
+            return 'default'
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', db_for_read):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return use_replica
+
+    def test_task_card_reads_from_primary(self):
+        # Kartę dociągają po zdarzeniu SSE inni użytkownicy - bez ciasteczka po własnym zapisie
+        reads = self.routed_reads(reverse('task-card', args=[self.task.pk]))
+        self.assertTrue(reads)
+        self.assertNotIn(True, reads)
+
+        self.assertIn(True, self.routed_reads(reverse('project-list')))
@@ -0,0 +1,327 @@
+"""
+Uwierzytelnianie (JWT i sesje) z użytkownikami w cache.
+
+JWTAuthentication z simplejwt czyta wiersz User przy każdym żądaniu, choć
+token niesie ID użytkownika. CachedJWTAuthentication (API) i CachedModelBackend
+(sesje, apps/users/backends.py) biorą użytkownika z ``load_user``: wartości pól
+użytkownika i profilu są w lokalnym (per proces) LRU, opcjonalnie wspartym
+wspólnym cache Django (``JWT_USER_CACHE["SHARED_CACHE"]``), a każde żądanie
+dostaje z nich nowe instancje.
+
+Zapis lub usunięcie użytkownika albo profilu (dezaktywacja, zmiana hasła) usuwa wpis
+w bieżącym procesie i we wspólnym cache oraz zapisuje wiersz TokenRevocation.
+Każdy proces co ``REVOCATION_REFRESH`` sekund czyta aktywne wiersze tej
+tabeli: usuwa z LRU wskazanych użytkowników i odrzuca unieważnione tokeny
+(``revoke_token``). Zapisy przez QuerySet.update() omijają sygnały - wtedy
+trzeba wywołać ``forget_user``.
+"""
+
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from apps.common.cache import LRUCache
+
+from .models import Profile, TokenRevocation
+
+DEFAULTS = {
+    "MAX_USERS": 10000,
+    "LOCAL_TTL": 300,
+    "SHARED_CACHE": None,
+    "SHARED_TTL": 300,
+    # Co ile sekund proces czyta unieważnienia zapisane przez inne procesy
+    "REVOCATION_REFRESH": 5,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "JWT_USER_CACHE", {})}
+
+
+_config = get_config()
+_local = LRUCache(_config["MAX_USERS"], ttl=_config["LOCAL_TTL"])
+
+
+def _shared_cache():
+    alias = get_config()["SHARED_CACHE"]
+    return caches[alias] if alias else None
+
+
+def _user_key(user_id):
+    # simplejwt zapisuje w tokenie ID jako tekst, a sygnały mają wartość z modelu
+    return str(user_id)
+
+
+def _cache_key(user_id):
+    return f"jwt-user:{user_id}"
+
+
+def _field_names(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _values(instance):
+    # Wartości jak do zapisu w bazie (np. nazwa pliku zamiast FieldFile) - bez obiektów współdzielonych w cache
+    return tuple(field.get_prep_value(field.value_from_object(instance)) for field in instance._meta.concrete_fields)
+
+
+def _entry(user):
+    profile = getattr(user, "profile", None)
+    return (user._state.db, _values(user), None if profile is None else _values(profile))
+
+
+def _hydrate(entry):
+    db, user_values, profile_values = entry
+    user = User.from_db(db, _field_names(User), user_values)
+    profile = None
+    if profile_values is not None:
+        profile = Profile.from_db(db, _field_names(Profile), profile_values)
+        Profile._meta.get_field("user").set_cached_value(profile, user)
+    # Brak profilu też trafia do cache - user.profile rzuci wtedy DoesNotExist bez zapytania
+    User._meta.get_field("profile").set_cached_value(user, profile)
+    return user
+
+
+def _store(user_id, entry):
+    _local.set(user_id, entry)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(_cache_key(user_id), entry, get_config()["SHARED_TTL"])
+
+
+def _user_queryset(user_id):
+    # Wpis żyje LOCAL_TTL - odczyt z opóźnionej repliki (np. tuż po dezaktywacji) zostałby w cache
+    users = User.objects.using(DEFAULT_DB_ALIAS).select_related("profile")
+    return users.filter(**{api_settings.USER_ID_FIELD: user_id})
+
+
+def load_user(user_id):
+    """
+    Użytkownik (z profilem) o ``USER_ID_FIELD`` równym ``user_id`` albo None.
+    Każde wywołanie zwraca nowe instancje - zmiany w request.user nie trafiają do cache.
+    """
+    user_id = _user_key(user_id)
+    revocations.refresh()
+    entry = _local.get(user_id)
+    if entry is None:
+        shared = _shared_cache()
+        if shared is not None:
+            entry = shared.get(_cache_key(user_id))
+            if entry is not None:
+                _local.set(user_id, entry)
+    if entry is not None:
+        return _hydrate(entry)
+
+    user = _user_queryset(user_id).first()
+    if user is None:
+        return None
+    entry = _entry(user)
+    # Jak w membership.py: wewnątrz transakcji zapisujemy dopiero po commit
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _store(user_id, entry))
+    else:
+        _store(user_id, entry)
+    return user
+
+
+async def aload_user(user_id):
+    """
+    ``load_user`` dla widoków async: trafienie w lokalne LRU nie zajmuje wątku,
+    a odczyt z bazy idzie przez async ORM.
+    """
+    user_id = _user_key(user_id)
+    if revocations.refresh_due():
+        await sync_to_async(revocations.refresh)()
+    entry = _local.get(user_id)
+    shared = _shared_cache()
+    if entry is None and shared is not None:
+        entry = await shared.aget(_cache_key(user_id))
+        if entry is not None:
+            _local.set(user_id, entry)
+    if entry is not None:
+        return _hydrate(entry)
+
+    user = await _user_queryset(user_id).afirst()
+    if user is None:
+        return None
+    entry = _entry(user)
+    _local.set(user_id, entry)
+    if shared is not None:
+        await shared.aset(_cache_key(user_id), entry, get_config()["SHARED_TTL"])
+    return user
+
+
+def _forget(user_ids):
+    shared = _shared_cache()
+    for user_id in user_ids:
+        _local.delete(user_id)
+    if shared is not None:
+        shared.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate(*user_ids):
+    """
+    Usuwa wpisy od razu i ponownie po zatwierdzeniu transakcji (tylko bieżący proces i wspólny cache).
+    """
+    user_ids = [_user_key(user_id) for user_id in user_ids if user_id is not None]
+    if not user_ids:
+        return
+    _forget(user_ids)
+    transaction.on_commit(lambda: _forget(user_ids))
+
+
+def forget_user(user):
+    """
+    Unieważnia wpis użytkownika we wszystkich procesach: lokalnie od razu,
+    w pozostałych przy najbliższym odczycie listy unieważnień.
+    """
+    user_id = _user_key(getattr(user, api_settings.USER_ID_FIELD))
+    invalidate(user_id)
+    config = get_config()
+    now = timezone.now()
+    # Po LOCAL_TTL wpis i tak wygasa w każdym procesie, więc dłużej wiersz nie jest potrzebny
+    TokenRevocation.objects.filter(expires_at__lte=now).delete()
+    TokenRevocation.objects.create(
+        user_id=user_id,
+        expires_at=now + timedelta(seconds=config["LOCAL_TTL"] + config["REVOCATION_REFRESH"]),
+    )
+
+
+class RevocationList:
+    """
+    Unieważnione ``jti`` w pamięci procesu, odświeżane z TokenRevocation
+    najwyżej raz na ``REVOCATION_REFRESH`` sekund.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._seen = set()
+        self._next_refresh = 0.0
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now < self._next_refresh:
+                return
+            self._next_refresh = now + get_config()["REVOCATION_REFRESH"]
+
+        tokens, seen, stale_users = {}, set(), []
+        rows = TokenRevocation.objects.using(DEFAULT_DB_ALIAS).filter(expires_at__gt=timezone.now()).values_list(
+            "pk", "jti", "user_id", "expires_at"
+        )
+        for pk, jti, user_id, expires_at in rows:
+            seen.add(pk)
+            if jti:
+                tokens[jti] = expires_at
+            elif pk not in self._seen:
+                stale_users.append(user_id)
+
+        for user_id in stale_users:
+            _local.delete(user_id)
+        with self._lock:
+            current = timezone.now()
+            # Zostawiamy też dodane lokalnie w trakcie odczytu
+            self._tokens = {
+                **{jti: expires_at for jti, expires_at in self._tokens.items() if expires_at > current},
+                **tokens,
+            }
+            self._seen = seen
+
+    def refresh_due(self):
+        return time.monotonic() >= self._next_refresh
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._tokens[jti] = expires_at
+
+    def is_revoked(self, jti):
+        return jti is not None and jti in self._tokens
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._seen.clear()
+            self._next_refresh = 0.0
+
+
+revocations = RevocationList()
+
+
+def revoke_token(token):
+    """
+    Unieważnia zwalidowany token (np. ``request.auth``) do końca jego ważności.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime.fromtimestamp(token["exp"], tz=UTC)
+    TokenRevocation.objects.filter(expires_at__lte=timezone.now()).delete()
+    TokenRevocation.objects.create(
+        jti=jti, user_id=_user_key(token[api_settings.USER_ID_CLAIM]), expires_at=expires_at
+    )
+    revocations.add(jti, expires_at)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication z użytkownikiem z ``load_user`` i listą unieważnionych tokenów.
+    """
+
+    def get_user(self, validated_token):
+        return self.check_user(validated_token, load_user(self.get_user_id(validated_token)))
+
+    async def aauthenticate(self, request):
+        """
+        ``authenticate`` dla widoków async (apps/projects/async_views.py).
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user = await aload_user(self.get_user_id(validated_token))
+        return self.check_user(validated_token, user), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from exc
+
+    def check_user(self, validated_token, user):
+        if revocations.is_revoked(validated_token.get(api_settings.JTI_CLAIM)):
+            raise AuthenticationFailed("Token został unieważniony.", code="token_revoked")
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    # Schemat OpenAPI (Swagger) jak dla JWTAuthentication
+    target_class = CachedJWTAuthentication
+
+
+def clear():
+    _local.clear()
+    revocations.clear()
@@ -0,0 +1,14 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .authentication import load_user
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, który użytkownika sesji bierze z cache (authentication.load_user)
+    zamiast z bazy przy każdym żądaniu.
+    """
+
+    def get_user(self, user_id):
+        user = load_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
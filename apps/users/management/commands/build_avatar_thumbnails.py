@@ -0,0 +1,30 @@
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from apps.users.models import Profile
+from apps.users.thumbnails import file_digest, schedule_variants
+
+
+class Command(BaseCommand):
+    help = "Generuje brakujące miniatury awatarów (np. dla plików wgranych przed wprowadzeniem miniatur)."
+
+    def handle(self, *args, **options):
+        futures = []
+        profiles = Profile.objects.exclude(avatar="").exclude(avatar__isnull=True).only("avatar", "avatar_hash")
+        for profile in profiles.iterator():
+            if not profile.avatar.storage.exists(profile.avatar.name):
+                self.stdout.write(self.style.WARNING(f"Profil {profile.pk}: brak pliku {profile.avatar.name}"))
+                continue
+            if not profile.avatar_hash:
+                with profile.avatar.open("rb") as avatar:
+                    profile.avatar_hash = file_digest(avatar)
+                # update() zamiast save(): bez sygnałów, które zleciłyby pracę drugi raz
+                Profile.objects.filter(pk=profile.pk).update(avatar_hash=profile.avatar_hash)
+            future = schedule_variants(profile.avatar.name, profile.avatar_hash)
+            if future is not None:
+                futures.append(future)
+
+        done, _ = wait(futures)
+        failed = sum(1 for future in done if future.exception() is not None)
+        self.stdout.write(self.style.SUCCESS(f"Zlecono {len(futures)} profili, błędy: {failed}"))
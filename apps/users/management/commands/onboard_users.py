@@ -0,0 +1,42 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.onboarding import onboard_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Zakłada konta z pliku CSV (nagłówek: username,email,first_name,last_name,password,teams) "
+        "lub JSON (lista obiektów). Kolumna teams to ID zespołów rozdzielone średnikami."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--partial", action="store_true", help="Zapisz poprawne wiersze mimo błędów w innych")
+        parser.add_argument("--workers", type=int, help="Procesy do hashowania haseł (0 - bez puli)")
+
+    def handle(self, *args, path, partial=False, workers=None, **options):
+        try:
+            with open(path, encoding="utf-8", newline="") as f:
+                if path.endswith(".json"):
+                    rows = json.load(f)
+                else:
+                    rows = [{key: value for key, value in row.items() if value != ""} for row in csv.DictReader(f)]
+        except (OSError, ValueError, csv.Error) as exc:
+            raise CommandError(f"Nie można wczytać {path}: {exc}")
+
+        started = time.monotonic()
+        result = onboard_users(rows, partial=partial, workers=workers)
+        for error in result.errors:
+            self.stderr.write(f"Wiersz {error['row']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+        if result.errors and not result.created:
+            raise CommandError(f"Nic nie zapisano, błędne wiersze: {len(result.errors)}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Utworzono kont: {len(result.created)}, członkostw: {result.memberships} "
+                f"w {time.monotonic() - started:.1f} s"
+            )
+        )
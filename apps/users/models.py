@@ -5,7 +5,51 @@ from django.db import models
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
     avatar = models.ImageField(upload_to="profile_images", blank=True, null=True)
+    # SHA-256 awatara - z niego wynikają nazwy miniatur (apps/users/thumbnails.py)
+    avatar_hash = models.CharField(max_length=64, blank=True, editable=False)
     bio = models.TextField(blank=True, null=True)
 
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name} profile"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_values = instance._field_values()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._saved_values = self._field_values()
+
+    def _field_values(self):
+        deferred = self.get_deferred_fields()
+        return {
+            field.attname: field.get_prep_value(field.value_from_object(self))
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+    def has_unsaved_changes(self):
+        """
+        Czy pola różnią się od stanu z ostatniego odczytu lub zapisu (nowy profil - zawsze).
+        """
+        saved = getattr(self, "_saved_values", None)
+        return saved is None or self._field_values() != saved
+
+
+class TokenRevocation(models.Model):
+    """
+    Unieważniony token JWT (``jti``) albo - przy pustym ``jti`` - sygnał dla innych
+    procesów, że wpis użytkownika w cache uwierzytelniania jest nieaktualny
+    (apps/users/authentication.py). Wiersze są potrzebne tylko do ``expires_at``.
+    """
+
+    jti = models.CharField(max_length=255, blank=True)
+    # Wartość USER_ID_FIELD jak w tokenie, bez klucza obcego - wiersz ma przetrwać usunięcie użytkownika
+    user_id = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.jti or 'użytkownik'} ({self.user_id})"
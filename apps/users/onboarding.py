@@ -0,0 +1,123 @@
+"""
+Masowe zakładanie kont: użytkownicy, profile i członkostwa w zespołach.
+
+Zamiast User.objects.create_user() w pętli (hash hasła, INSERT i sygnały
+per wiersz) walidujemy wszystkie wiersze, hashujemy hasła w puli procesów
+(passwords.make_passwords) i zapisujemy wszystko przez bulk_create w jednej
+transakcji. bulk_create nie wysyła sygnałów, więc profile tworzymy tutaj,
+a cache'e zależne od członkostwa unieważniamy ręcznie.
+"""
+
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from apps.projects import dashboard
+from apps.projects.models import Team
+
+from .models import Profile
+from .passwords import make_passwords
+from .serializers import UserOnboardingSerializer
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+@dataclass
+class OnboardingResult:
+    created: list = field(default_factory=list)
+    memberships: int = 0
+    errors: list = field(default_factory=list)
+
+
+def validate_rows(rows):
+    """
+    Zwraca (poprawne wiersze, błędy per wiersz). Istniejące loginy i zespoły
+    sprawdzamy po jednym zapytaniu dla całego pliku.
+    """
+    serializer = UserOnboardingSerializer()
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, serializer.run_validation(row)))
+        except ValidationError as exc:
+            errors.append({"row": index, "errors": exc.detail})
+
+    usernames = [data["username"] for _, data in valid]
+    taken = set(User.objects.filter(username__in=usernames).values_list("username", flat=True))
+    team_ids = {team_id for _, data in valid for team_id in data["teams"]}
+    known_teams = set(Team.objects.filter(pk__in=team_ids).values_list("pk", flat=True))
+
+    accepted, seen = [], set()
+    for index, data in valid:
+        row_errors = {}
+        if data["username"] in taken or data["username"] in seen:
+            row_errors["username"] = ["Użytkownik o tej nazwie już istnieje."]
+        unknown = sorted(set(data["teams"]) - known_teams)
+        if unknown:
+            row_errors["teams"] = [f"Nie ma zespołów: {', '.join(map(str, unknown))}."]
+        if row_errors:
+            errors.append({"row": index, "errors": row_errors})
+            continue
+        seen.add(data["username"])
+        accepted.append(data)
+    errors.sort(key=lambda error: error["row"])
+    return accepted, errors
+
+
+def onboard_users(rows, partial=False, workers=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Tworzy konta z ``rows``. Bez ``partial`` jakikolwiek błędny wiersz
+    przerywa całość; z ``partial`` poprawne wiersze są zapisywane, a błędne
+    wracają w ``errors``.
+    """
+    accepted, errors = validate_rows(rows)
+    if (errors and not partial) or not accepted:
+        return OnboardingResult(errors=errors)
+
+    passwords = make_passwords([data["password"] for data in accepted], workers=workers)
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=data["username"],
+                    email=data["email"],
+                    first_name=data["first_name"],
+                    last_name=data["last_name"],
+                    password=password,
+                )
+                for data, password in zip(accepted, passwords)
+            ],
+            batch_size=batch_size,
+        )
+        Profile.objects.bulk_create([Profile(user=user) for user in users], batch_size=batch_size)
+
+        memberships = [
+            Team.members.through(team_id=team_id, user_id=user.pk)
+            for data, user in zip(accepted, users)
+            for team_id in set(data["teams"])
+        ]
+        Team.members.through.objects.bulk_create(memberships, batch_size=batch_size)
+
+        # Nowe konta nie mają jeszcze wpisów w cache członkostwa, ale pozostali
+        # członkowie zespołów widzą na dashboardzie nową liczbę członków
+        team_ids = {membership.team_id for membership in memberships}
+        dashboard.invalidate(
+            *Team.members.through.objects.filter(team_id__in=team_ids).values_list("user_id", flat=True)
+        )
+
+    return OnboardingResult(
+        created=[{"id": user.pk, "username": user.username} for user in users],
+        memberships=len(memberships),
+        errors=errors,
+    )
+
+
+def get_max_rows():
+    return getattr(settings, "USER_ONBOARDING_MAX_ROWS", 1000)
+
+
+def get_max_passwords():
+    return getattr(settings, "USER_ONBOARDING_MAX_PASSWORDS", 40)
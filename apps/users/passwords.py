@@ -0,0 +1,63 @@
+"""
+Hashowanie wielu haseł naraz w puli procesów.
+
+Jeden hash PBKDF2 to setki milisekund CPU, więc przy tysiącach kont
+rozkładamy pracę na rdzenie. Procesy robocze (spawn) dostają tylko
+ścieżkę klasy hashera i hasła - moduł nie importuje modeli, żeby dało
+się go rozpakować przed django.setup().
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.utils.module_loading import import_string
+
+DEFAULTS = {
+    # 0 = hashowanie w bieżącym procesie; None = liczba rdzeni
+    "WORKERS": None,
+    "CHUNK_SIZE": 50,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "PASSWORD_HASHING_POOL", {})}
+
+
+def hash_chunk(hasher_path, passwords):
+    """
+    Uruchamiane w procesie roboczym.
+    """
+    hasher = import_string(hasher_path)()
+    return [hasher.encode(password, hasher.salt()) for password in passwords]
+
+
+def make_passwords(passwords, workers=None):
+    """
+    Hashe haseł w tej samej kolejności; None daje hasło nieużywalne (jak make_password(None)).
+    """
+    config = get_config()
+    workers = config["WORKERS"] if workers is None else workers
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunk_size = config["CHUNK_SIZE"]
+
+    # Hasher z bieżących ustawień (także override_settings) - procesy robocze nie widzą zmian ustawień
+    hasher = get_hasher()
+    hasher_path = f"{type(hasher).__module__}.{type(hasher).__qualname__}"
+    indexes = [index for index, password in enumerate(passwords) if password is not None]
+    to_hash = [passwords[index] for index in indexes]
+    hashes = [make_password(None) if password is None else None for password in passwords]
+
+    if workers <= 1 or len(to_hash) <= chunk_size:
+        hashed = hash_chunk(hasher_path, to_hash)
+    else:
+        chunks = [to_hash[start:start + chunk_size] for start in range(0, len(to_hash), chunk_size)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=get_context("spawn")) as pool:
+            hashed = [value for chunk in pool.map(hash_chunk, [hasher_path] * len(chunks), chunks) for value in chunk]
+
+    for index, value in zip(indexes, hashed):
+        hashes[index] = value
+    return hashes
@@ -1,7 +1,40 @@
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError as DjangoValidationError
 from djoser.serializers import UserCreateSerializer
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from .models import Profile
+from .thumbnails import variant_urls
+
+# {rozmiar: {format: url}} - w schemacie OpenAPI jako obiekt, nie tekst
+AVATAR_VARIANTS_SCHEMA = {
+    "type": "object",
+    "additionalProperties": {"type": "object", "additionalProperties": {"type": "string", "format": "uri"}},
+    "example": {"32": {"webp": "https://example.com/media/profile_images/thumbs/ab/ab12-32.webp"}},
+}
+
+
+@extend_schema_field(AVATAR_VARIANTS_SCHEMA)
+class AvatarVariantsField(serializers.ReadOnlyField):
+    """
+    Gotowe miniatury awatara jako {"32": {"webp": url, "jpeg": url}, ...}.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        super().__init__(**kwargs)
+
+    def to_representation(self, profile):
+        request = self.context.get("request")
+        variants = variant_urls(profile)
+        if request is not None:
+            for urls in variants.values():
+                for fmt, url in urls.items():
+                    urls[fmt] = request.build_absolute_uri(url)
+        return variants
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -15,7 +48,52 @@ class ProfileSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source="user.username", read_only=True)
     first_name = serializers.CharField(source="user.first_name", read_only=True)
     last_name = serializers.CharField(source="user.last_name", read_only=True)
+    avatar_variants = AvatarVariantsField()
 
     class Meta:
         model = Profile
-        fields = ("username", "bio", "avatar", "first_name", "last_name")
+        fields = ("username", "bio", "avatar", "avatar_variants", "first_name", "last_name")
+
+
+class TeamIdsField(serializers.ListField):
+    """
+    Lista ID zespołów; w CSV także tekst "1;2;3".
+    """
+
+    child = serializers.IntegerField(min_value=1)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [part.strip() for part in data.replace(",", ";").split(";") if part.strip()]
+        return super().to_internal_value(data)
+
+
+class UserOnboardingSerializer(serializers.Serializer):
+    """
+    Walidacja jednego wiersza masowego zakładania kont. Unikalność loginów
+    i istnienie zespołów sprawdza onboarding.validate_rows jednym zapytaniem.
+    """
+
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(required=False, allow_blank=True, default="")
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default="")
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default="")
+    # Bez hasła konto dostaje hasło nieużywalne - użytkownik ustawia je przez reset hasła
+    password = serializers.CharField(required=False, allow_null=True, allow_blank=True, default=None)
+    teams = TeamIdsField(required=False, default=list)
+
+    def validate(self, attrs):
+        if attrs["password"]:
+            user = User(
+                username=attrs["username"],
+                email=attrs["email"],
+                first_name=attrs["first_name"],
+                last_name=attrs["last_name"],
+            )
+            try:
+                validate_password(attrs["password"], user)
+            except DjangoValidationError as exc:
+                raise serializers.ValidationError({"password": list(exc.messages)})
+        else:
+            attrs["password"] = None
+        return attrs
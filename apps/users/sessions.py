@@ -0,0 +1,50 @@
+"""
+Sesje w cache z zapisem do bazy (cached_db) bez zbędnych zapisów.
+
+Odczyt idzie z cache (``SESSION_CACHE_ALIAS``), a baza jest tylko źródłem
+prawdy po restarcie lub wyczyszczeniu cache. SessionMiddleware zapisuje
+sesję, gdy coś ją oznaczyło jako zmienioną albo przy każdym żądaniu
+(SESSION_SAVE_EVERY_REQUEST, przesuwane wygaśnięcie). Ten magazyn pomija
+zapis, jeśli dane są takie jak przy odczycie, a od ostatniego zapisu
+minęło mniej niż ``SESSION_STORE["WRITE_INTERVAL"]`` sekund.
+"""
+
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBSessionStore
+
+DEFAULTS = {
+    "WRITE_INTERVAL": 300,
+}
+
+# Czas ostatniego zapisu w samych danych sesji - dostępny bez zapytania o expire_date
+WRITTEN_AT_KEY = "_session_written_at"
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "SESSION_STORE", {})}
+
+
+class SessionStore(CachedDBSessionStore):
+    def load(self):
+        data = super().load()
+        self._loaded_data = copy.deepcopy(data)
+        return data
+
+    def is_unchanged(self):
+        """
+        Czy dane są takie jak przy odczycie, a ostatni zapis jest świeższy niż WRITE_INTERVAL.
+        """
+        loaded = getattr(self, "_loaded_data", None)
+        if loaded is None or self._get_session() != loaded:
+            return False
+        return time.time() - loaded.get(WRITTEN_AT_KEY, 0) < get_config()["WRITE_INTERVAL"]
+
+    def save(self, must_create=False):
+        if not must_create and self.session_key is not None and self.is_unchanged():
+            return
+        self._get_session(no_load=must_create)[WRITTEN_AT_KEY] = int(time.time())
+        super().save(must_create=must_create)
+        self._loaded_data = copy.deepcopy(self._get_session(no_load=True))
@@ -1,8 +1,12 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
 
+from . import authentication
 from .models import Profile
+from .thumbnails import file_digest, schedule_variants
 
 
 @receiver(post_save, sender=User)
@@ -12,5 +16,55 @@ def create_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_profile(sender, instance, **kwargs):
-    instance.profile.save()
+def save_profile(sender, instance, created, raw=False, **kwargs):
+    # Zapisujemy tylko profil zmieniony w pamięci - bez zapytania o niewczytany profil
+    # i bez UPDATE przy każdym User.save() (np. last_login przy logowaniu)
+    profile = instance._state.fields_cache.get("profile")
+    if not created and not raw and profile is not None and profile.pk and profile.has_unsaved_changes():
+        profile.save()
+
+
+@receiver(post_save, sender=User)
+def forget_authenticated_user(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Dezaktywacja, zmiana hasła i inne zmiany - poza samym last_login przy logowaniu
+    if raw or (update_fields is not None and set(update_fields) <= {"last_login"}):
+        return
+    if created:
+        # Inne procesy nie mogą mieć wpisu nowego konta; lokalnie tylko na wypadek ponownie użytego ID
+        authentication.invalidate(getattr(instance, api_settings.USER_ID_FIELD))
+    else:
+        authentication.forget_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    authentication.forget_user(instance)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def forget_user_with_profile(sender, instance, raw=False, **kwargs):
+    # Profil jest w cache razem z użytkownikiem (np. awatar w nawigacji)
+    if not raw:
+        authentication.forget_user(instance.user)
+
+
+@receiver(pre_save, sender=Profile)
+def update_avatar_hash(sender, instance, raw=False, **kwargs):
+    instance._avatar_changed = False
+    if raw:
+        return
+    if instance.avatar and not instance.avatar._committed:
+        instance.avatar_hash = file_digest(instance.avatar)
+        instance._avatar_changed = True
+    elif not instance.avatar and instance.avatar_hash:
+        instance.avatar_hash = ""
+
+
+@receiver(post_save, sender=Profile)
+def generate_avatar_thumbnails(sender, instance, **kwargs):
+    if getattr(instance, "_avatar_changed", False):
+        name, digest = instance.avatar.name, instance.avatar_hash
+        # Miniatury powstają w tle, dopiero gdy zapis profilu jest zatwierdzony
+        transaction.on_commit(lambda: schedule_variants(name, digest))
+        instance._avatar_changed = False
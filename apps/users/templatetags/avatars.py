@@ -0,0 +1,13 @@
+from django import template
+
+from ..thumbnails import variant_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar_url(profile, size, fmt="webp"):
+    """
+    {% avatar_url profile 64 %} - URL miniatury awatara dopasowanej do rozmiaru.
+    """
+    return variant_url(profile, int(size), fmt)
@@ -1,5 +1,37 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.common.cache import LRUCache
+from apps.projects.models import Project, Team
+
+from . import authentication, thumbnails
+from .models import Profile, TokenRevocation
+from .passwords import make_passwords
+from .thumbnails import schedule_variants, variant_name
+
+
+def png_upload(name='avatar.png', size=(400, 300), color='red'):
+    buffer = BytesIO()
+    Image.new('RGBA', size, color).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
 
 
 class UserSignalTests(TestCase):
@@ -11,4 +43,238 @@ class UserSignalTests(TestCase):
         user.refresh_from_db()
         
         self.assertTrue(hasattr(user, 'profile'))
-        self.assertEqual(user.profile.user.username, 'newuser')
\ No newline at end of file
+        self.assertEqual(user.profile.user.username, 'newuser')
+
+    def test_user_save_skips_unchanged_profile(self):
+        with CaptureQueriesContext(connection) as queries:
+            user = User.objects.create_user(username='quiet', password='password123')
+            user.first_name = 'Jan'
+            user.save()
+        profile_writes = [q['sql'] for q in queries.captured_queries if 'users_profile' in q['sql']]
+        self.assertEqual(len(profile_writes), 1)
+        self.assertTrue(profile_writes[0].startswith('INSERT'))
+
+        user = User.objects.select_related('profile').get(pk=user.pk)
+        user.profile.bio = 'Nowe bio'
+        user.save()
+        self.assertEqual(Profile.objects.get(user=user).bio, 'Nowe bio')
+
+
+class AvatarThumbnailTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, AVATAR_THUMBNAILS={'SIZES': (32, 64), 'FORMATS': ('webp', 'jpeg'), 'WORKERS': 0}
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(username='avatar_user', password='password123')
+
+    def test_upload_generates_variants_after_commit(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch('/api/my-profile/', {'avatar': png_upload()}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+
+        profile = self.user.profile
+        profile.refresh_from_db()
+        self.assertEqual(len(profile.avatar_hash), 64)
+        name = variant_name(profile.avatar_hash, 64, 'jpeg')
+        with default_storage.open(name) as thumb, Image.open(thumb) as image:
+            self.assertEqual(image.size, (64, 64))
+            self.assertEqual(image.format, 'JPEG')
+
+        variants = client.get('/api/my-profile/').data['avatar_variants']
+        self.assertEqual(set(variants), {'32', '64'})
+        self.assertTrue(variants['32']['webp'].endswith('-32.webp'))
+
+        rendered = Template('{% load avatars %}{% avatar_url profile 40 %}').render(Context({'profile': profile}))
+        self.assertTrue(rendered.endswith(f'{profile.avatar_hash}-64.webp'))
+
+        # Awatar w pasku nawigacji na każdej stronie - miniatura, nie oryginał
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(reverse('dashboard')), f'{profile.avatar_hash}-32.webp')
+
+    def test_variants_are_rendered_in_worker_process(self):
+        profile = self.user.profile
+        profile.avatar = png_upload()
+        profile.save()
+
+        with override_settings(AVATAR_THUMBNAILS={'SIZES': (32,), 'FORMATS': ('webp',), 'WORKERS': 1}):
+            future = schedule_variants(profile.avatar.name, profile.avatar_hash)
+            self.assertEqual(len(future.result(timeout=60)), 1)
+        self.assertTrue(default_storage.exists(variant_name(profile.avatar_hash, 32, 'webp')))
+
+    def test_ready_variants_are_remembered_in_bounded_cache(self):
+        first, second = (variant_name(digest * 64, 32, 'webp') for digest in 'ab')
+        with mock.patch.object(thumbnails, '_ready', LRUCache(1)):
+            self.assertFalse(thumbnails.is_ready(first))
+            for name in (first, second):
+                default_storage.save(name, ContentFile(b'webp'))
+                self.assertTrue(thumbnails.is_ready(name))
+            self.assertEqual(len(thumbnails._ready), 1)
+
+            # Najstarszy wpis wypadł z cache - sprawdzany ponownie w storage
+            default_storage.delete(first)
+            default_storage.delete(second)
+            self.assertFalse(thumbnails.is_ready(first))
+            self.assertTrue(thumbnails.is_ready(second))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserOnboardingTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password123', is_staff=True)
+        self.team = Team.objects.create(name='Nowi', owner=self.admin)
+        self.team.members.add(self.admin)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_bulk_onboarding_creates_users_profiles_and_memberships(self):
+        rows = [
+            {'username': 'anna', 'email': 'anna@example.com', 'password': 'Tajne-haslo-123', 'teams': [self.team.pk]},
+            {'username': 'piotr', 'first_name': 'Piotr', 'teams': f'{self.team.pk}'},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/users/onboarding/', rows, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['memberships'], 2)
+        anna = User.objects.get(username='anna')
+        self.assertTrue(anna.check_password('Tajne-haslo-123'))
+        self.assertFalse(User.objects.get(username='piotr').has_usable_password())
+        self.assertEqual(Profile.objects.filter(user__username__in=['anna', 'piotr']).count(), 2)
+        self.assertEqual(self.team.members.count(), 3)
+        # Stała liczba zapytań: bez INSERT/UPDATE per wiersz
+        self.assertLess(len(queries.captured_queries), 15)
+
+    def test_invalid_rows_abort_onboarding(self):
+        rows = [
+            {'username': 'ewa'},
+            {'username': 'admin'},
+            {'username': 'ewa'},
+            {'username': 'jan', 'teams': [999]},
+            {'username': 'ola', 'password': '123'},
+        ]
+        response = self.client.post('/api/users/onboarding/', rows, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1, 2, 3, 4])
+        self.assertFalse(User.objects.filter(username='ewa').exists())
+
+    @override_settings(USER_ONBOARDING_MAX_PASSWORDS=1)
+    def test_onboarding_limits_passwords_per_request(self):
+        rows = [{'username': 'anna', 'password': 'Tajne-haslo-123'}, {'username': 'ewa', 'password': 'Inne-haslo-456'}]
+        response = self.client.post('/api/users/onboarding/', rows, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('onboard_users', str(response.data[0]))
+        self.assertFalse(User.objects.filter(username='anna').exists())
+
+    def test_onboarding_requires_staff(self):
+        user = User.objects.create_user(username='zwykly', password='password123')
+        self.client.force_authenticate(user)
+        response = self.client.post('/api/users/onboarding/', [{'username': 'x'}], format='json')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(PASSWORD_HASHING_POOL={'WORKERS': 2, 'CHUNK_SIZE': 2})
+    def test_passwords_are_hashed_in_worker_processes(self):
+        passwords = ['pierwsze', None, 'drugie', 'trzecie', 'czwarte']
+        hashes = make_passwords(passwords)
+
+        self.assertEqual(len(hashes), 5)
+        self.assertTrue(hashes[0].startswith('md5$'))
+        self.assertTrue(check_password('trzecie', hashes[3]))
+        self.assertTrue(hashes[1].startswith('!'))
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        authentication.clear()
+        self.addCleanup(authentication.clear)
+        self.user = User.objects.create_user(username='api', password='password123')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def auth_queries(self):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get('/api/my-profile/')
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in queries.captured_queries if 'auth_user' in q['sql'] or 'tokenrevocation' in q['sql']]
+
+    def test_repeated_requests_skip_user_query(self):
+        self.assertTrue(self.auth_queries())
+        self.assertEqual(self.auth_queries(), [])
+
+    def test_deactivation_and_password_change_invalidate_cache(self):
+        self.auth_queries()
+        self.user.set_password('nowe-haslo-456')
+        self.user.save()
+        self.assertTrue(authentication.load_user(self.user.pk).check_password('nowe-haslo-456'))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/my-profile/').status_code, 401)
+
+    def test_change_in_other_process_is_picked_up_on_refresh(self):
+        self.auth_queries()
+        # Inny proces zapisał dezaktywację: lokalny wpis znika po odczycie listy unieważnień
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        TokenRevocation.objects.create(user_id=self.user.pk, expires_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(self.client.get('/api/my-profile/').status_code, 200)
+
+        authentication.revocations.refresh(force=True)
+        self.assertEqual(self.client.get('/api/my-profile/').status_code, 401)
+
+    def test_revoked_token_is_rejected(self):
+        response = self.client.post('/api/auth/jwt/revoke/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get('/api/my-profile/').status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.assertEqual(self.client.get('/api/my-profile/').status_code, 200)
+
+
+class SessionCacheTests(TestCase):
+    def setUp(self):
+        authentication.clear()
+        self.addCleanup(authentication.clear)
+        self.user = User.objects.create_user(username='tablica', password='password123')
+        team = Team.objects.create(name='Frontend', owner=self.user)
+        team.members.add(self.user)
+        self.project = Project.objects.create(name='Tablica', description='Desc', team=team)
+        self.client.force_login(self.user)
+
+    def get_board(self):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(f'/projects/{self.project.pk}/')
+        return response, [q['sql'] for q in queries.captured_queries]
+
+    def test_board_page_has_no_auth_queries_on_warm_cache(self):
+        self.get_board()
+        response, queries = self.get_board()
+
+        self.assertEqual(response.status_code, 200)
+        auth_tables = ('FROM "django_session"', 'FROM "auth_user"', 'FROM "users_profile"', 'tokenrevocation')
+        self.assertEqual([sql for sql in queries if any(table in sql for table in auth_tables)], [])
+
+    @override_settings(SESSION_SAVE_EVERY_REQUEST=True)
+    def test_unchanged_session_is_written_at_most_once_per_interval(self):
+        self.get_board()
+        _, queries = self.get_board()
+        self.assertFalse([sql for sql in queries if 'django_session' in sql])
+
+        with self.settings(SESSION_STORE={'WRITE_INTERVAL': 0}):
+            _, queries = self.get_board()
+        self.assertTrue([sql for sql in queries if sql.startswith('UPDATE "django_session"')])
+
+    def test_deactivated_user_is_logged_out(self):
+        self.get_board()
+        self.user.is_active = False
+        self.user.save()
+
+        response, _ = self.get_board()
+        self.assertEqual(response.status_code, 302)
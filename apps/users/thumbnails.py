@@ -0,0 +1,192 @@
+"""
+Miniatury awatarów.
+
+Po wgraniu awatara liczymy SHA-256 pliku (tanie) i zlecamy wygenerowanie
+kwadratowych wariantów (np. 32/64/256 px, WebP i JPEG) w puli procesów -
+widok zapisujący profil nie czeka na Pillow. Nazwy wariantów wynikają
+z hasha źródła, więc pliki są niezmienne: raz wygenerowany wariant nigdy
+się nie zmienia, a ten sam obrazek wgrany ponownie nie jest przetwarzany.
+
+Funkcje wykonywane w procesach roboczych (``render_variants``) operują
+tylko na ścieżkach plików - nie dotykają bazy ani ustawień Django.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from apps.common.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+THUMBNAILS_PREFIX = "profile_images/thumbs"
+
+DEFAULTS = {
+    "SIZES": (32, 64, 256),
+    "FORMATS": ("webp", "jpeg"),
+    # 0 = generowanie synchronicznie w bieżącym procesie (testy, narzędzia)
+    "WORKERS": 2,
+    "QUALITY": 85,
+    # Ile nazw gotowych wariantów pamiętać w procesie (pozostałe sprawdzamy w storage)
+    "READY_CACHE_SIZE": 10000,
+}
+
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "AVATAR_THUMBNAILS", {})}
+
+
+# Nazwy wariantów, które już istnieją - są niezmienne, więc wpisy nie wymagają unieważniania
+_ready = None
+
+
+def _ready_cache():
+    global _ready
+    if _ready is None:
+        # Tworzony przy pierwszym użyciu: moduł ładują też procesy robocze (render_variants),
+        # które nie czytają ustawień Django
+        _ready = LRUCache(get_config()["READY_CACHE_SIZE"])
+    return _ready
+
+
+def is_ready(name):
+    ready = _ready_cache()
+    if ready.get(name):
+        return True
+    if default_storage.exists(name):
+        ready.set(name, True)
+        return True
+    return False
+
+
+def file_digest(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def variant_name(digest, size, fmt):
+    return f"{THUMBNAILS_PREFIX}/{digest[:2]}/{digest}-{size}.{EXTENSIONS[fmt]}"
+
+
+def pick_size(size, sizes=None):
+    """
+    Najmniejszy wariant nie mniejszy niż ``size`` (albo największy dostępny).
+    """
+    sizes = sorted(sizes or get_config()["SIZES"])
+    return next((candidate for candidate in sizes if candidate >= size), sizes[-1])
+
+
+def render_variants(source_path, targets, quality=DEFAULTS["QUALITY"]):
+    """
+    Generuje warianty ``targets`` = [(rozmiar, format, ścieżka docelowa)].
+    Uruchamiane w procesie roboczym; zwraca listę zapisanych ścieżek.
+    """
+    from PIL import Image, ImageOps
+
+    written = []
+    with Image.open(source_path) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        for size, fmt, path in targets:
+            if os.path.exists(path):
+                continue
+            variant = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            if fmt == "jpeg" and variant.mode != "RGB":
+                # JPEG nie ma przezroczystości - podkładamy białe tło
+                background = Image.new("RGB", variant.size, "white")
+                background.paste(variant, mask=variant.getchannel("A"))
+                variant = background
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Zapis do pliku tymczasowego i rename: czytelnik nigdy nie zobaczy połowy pliku
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as tmp:
+                    variant.save(tmp, format=fmt.upper(), quality=quality)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            written.append(path)
+    return written
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: procesy robocze nie dziedziczą połączeń z bazą ani wątków serwera
+            _executor = ProcessPoolExecutor(max_workers=get_config()["WORKERS"], mp_context=get_context("spawn"))
+        return _executor
+
+
+def _log_failure(future):
+    error = future.exception()
+    if error is not None:
+        logger.error("Nie udało się wygenerować miniatur awatara", exc_info=error)
+
+
+def schedule_variants(source_name, digest):
+    """
+    Zleca wygenerowanie brakujących wariantów awatara. Zwraca Future albo None,
+    jeśli nie ma nic do zrobienia (lub praca została wykonana synchronicznie).
+    """
+    config = get_config()
+    targets = [
+        (size, fmt, default_storage.path(variant_name(digest, size, fmt)))
+        for size in config["SIZES"]
+        for fmt in config["FORMATS"]
+        if not default_storage.exists(variant_name(digest, size, fmt))
+    ]
+    if not targets:
+        return None
+    source_path = default_storage.path(source_name)
+    if not config["WORKERS"]:
+        render_variants(source_path, targets, config["QUALITY"])
+        return None
+    future = get_executor().submit(render_variants, source_path, targets, config["QUALITY"])
+    future.add_done_callback(_log_failure)
+    return future
+
+
+def variant_url(profile, size, fmt="webp"):
+    """
+    URL wariantu awatara najbliższego ``size``; dopóki miniatury nie są gotowe - oryginał.
+    """
+    if not profile.avatar:
+        return ""
+    if profile.avatar_hash:
+        name = variant_name(profile.avatar_hash, pick_size(size), fmt)
+        if is_ready(name):
+            return default_storage.url(name)
+    return profile.avatar.url
+
+
+def variant_urls(profile):
+    """
+    Gotowe warianty awatara: {rozmiar: {format: url}}.
+    """
+    config = get_config()
+    variants = {}
+    if not profile.avatar or not profile.avatar_hash:
+        return variants
+    for size in config["SIZES"]:
+        for fmt in config["FORMATS"]:
+            name = variant_name(profile.avatar_hash, size, fmt)
+            if is_ready(name):
+                variants.setdefault(str(size), {})[fmt] = default_storage.url(name)
+    return variants
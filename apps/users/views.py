@@ -3,12 +3,21 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, DetailView, UpdateView
-from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes, extend_schema
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from apps.projects.parsers import CSVParser
+
+from .authentication import revoke_token
 from .forms import CustomUserCreationForm, ProfileForm, UserUpdateForm
 from .models import Profile
-from .serializers import ProfileSerializer
+from .onboarding import get_max_passwords, get_max_rows, onboard_users
+from .serializers import ProfileSerializer, UserOnboardingSerializer
 
 
 class MyProfileView(generics.RetrieveUpdateAPIView):
@@ -19,6 +28,63 @@ class MyProfileView(generics.RetrieveUpdateAPIView):
         return self.request.user.profile
     
     
+class TokenRevokeView(APIView):
+    """
+    Endpoint: POST /api/auth/jwt/revoke/ - unieważnia token dostępu, którym podpisano żądanie (wylogowanie).
+    """
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(summary="Unieważnienie tokenu JWT", request=None, responses={204: None})
+    def post(self, request, *args, **kwargs):
+        revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UserOnboardingView(generics.GenericAPIView):
+    """
+    Endpoint: POST /api/users/onboarding/ - masowe zakładanie kont z przypisaniem do zespołów (JSON lub CSV).
+
+    Import musi zmieścić się w jednym żądaniu: liczba wierszy i haseł do
+    zahashowania jest ograniczona, a hasła liczymy w bieżącym procesie, bez
+    puli procesów. Większe pliki obsługuje ``manage.py onboard_users``.
+    """
+    permission_classes = (IsAdminUser,)
+    serializer_class = UserOnboardingSerializer
+    parser_classes = (JSONParser, CSVParser)
+
+    @extend_schema(
+        summary="Masowe zakładanie kont",
+        request=UserOnboardingSerializer(many=True),
+        parameters=[OpenApiParameter("partial", OpenApiTypes.BOOL, description="Zapisz poprawne wiersze mimo błędów")],
+        responses={201: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+    )
+    def post(self, request, *args, **kwargs):
+        rows = request.data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValidationError("Oczekiwano listy użytkowników.")
+        max_rows = get_max_rows()
+        if len(rows) > max_rows:
+            raise ValidationError(
+                f"Maksymalnie {max_rows} użytkowników w jednym imporcie; większe pliki: manage.py onboard_users."
+            )
+        max_passwords = get_max_passwords()
+        if sum(1 for row in rows if row.get("password")) > max_passwords:
+            raise ValidationError(
+                f"Maksymalnie {max_passwords} haseł w jednym imporcie (hashowanie trwa); "
+                "większe pliki: manage.py onboard_users."
+            )
+
+        partial = request.query_params.get("partial", "").lower() in ("1", "true", "yes")
+        result = onboard_users(rows, partial=partial, workers=0)
+
+        # Bez ?partial każdy błąd oznacza, że nic nie zostało zapisane
+        failed = result.errors and not result.created
+        return Response(
+            {"created": result.created, "memberships": result.memberships, "errors": result.errors},
+            status=status.HTTP_400_BAD_REQUEST if failed else status.HTTP_201_CREATED,
+        )
+
+
 class RegisterView(CreateView):
     form_class = CustomUserCreationForm
     template_name = 'registration/register.html'
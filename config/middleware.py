@@ -0,0 +1,56 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseFileResponse, WhiteNoiseMiddleware
+
+
+async def _read_chunks(file, block_size=WhiteNoiseFileResponse.block_size):
+    # Lokalne, małe pliki - odczyt w pętli zdarzeń jest tańszy niż wątek na każdy blok
+    if file is None:
+        return
+    try:
+        while chunk := file.read(block_size):
+            yield chunk
+    finally:
+        file.close()
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware działający też asynchronicznie. WhiteNoise ma tylko
+    wersję synchroniczną - pod ASGI Django przełączyłby się na niej do wątku
+    i widoki async (apps/projects/async_views.py) straciłyby zysk. Pliki są
+    oddawane strumieniem async, bez wczytywania całości przez sync_to_async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Tryb deweloperski: szukanie pliku na dysku przy każdym żądaniu
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.aserve(static_file, request)
+        return await self.get_response(request)
+
+    @staticmethod
+    def aserve(static_file, request):
+        response = static_file.get_response(request.method, request.META)
+        http_response = WhiteNoiseFileResponse(_read_chunks(response.file), status=int(response.status))
+        del http_response["content-type"]
+        for key, value in response.headers:
+            http_response[key] = value
+        return http_response
@@ -11,8 +11,11 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import warnings
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -21,10 +24,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-n!d2y4bpdl6@17odgi24%t)4dx(l&9p1^=sd%3+i6sz_p33ee$"
+SECRET_KEY = os.environ.get("SECRET_KEY", "django-insecure-n!d2y4bpdl6@17odgi24%t)4dx(l&9p1^=sd%3+i6sz_p33ee$")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get("DEBUG", "True").lower() in ("1", "true", "yes")
 
 ALLOWED_HOSTS = os.environ.get("DJANGO_ALLOWED_HOSTS", "localhost").split(",")
 
@@ -39,9 +42,13 @@ INSTALLED_APPS = [
     "rest_framework",
     "rest_framework_simplejwt",
     "drf_spectacular",
+    "drf_spectacular_sidecar",
     "djoser",
     "apps.users",
     "apps.projects",
+    "apps.jobs",
+    "apps.metrics",
+    "apps.replicas",
     "corsheaders",
 ]
 
@@ -65,8 +72,14 @@ DJOSER = {
 }
 
 MIDDLEWARE = [
+    # Pierwszy, żeby mierzyć czas całego żądania razem z pozostałymi middleware
+    "apps.metrics.middleware.MetricsMiddleware",
+    # Przed sesjami i uwierzytelnianiem - one też czytają z bazy
+    "apps.replicas.middleware.ReplicaRoutingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # Zaraz po SecurityMiddleware: pliki statyczne bez sesji, CSRF i uwierzytelniania
+    "config.middleware.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -109,6 +122,55 @@ DATABASES = {
     }
 }
 
+# Połączenia z bazą (DB_CONNECTION_MODE):
+#   "none"       - nowe połączenie (TCP + uwierzytelnienie) na każde żądanie
+#   "persistent" - połączenie wątku żyje DB_CONN_MAX_AGE sekund, sprawdzane przed ponownym użyciem
+#                  (pod ASGI każde żądanie ma inny wątek - tam lepiej "pool")
+#   "pool"       - pula psycopg 3 wspólna dla wątków procesu (tylko PostgreSQL, psycopg[pool])
+# Stan puli i liczba otwieranych połączeń: /metrics (apps/metrics/database.py).
+DB_CONNECTION_MODE = os.environ.get("DB_CONNECTION_MODE", "persistent")
+if DB_CONNECTION_MODE == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", "60"))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+elif DB_CONNECTION_MODE == "pool":
+    from psycopg_pool import ConnectionPool
+
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            # Na proces; razem z liczbą workerów musi się zmieścić w max_connections Postgresa
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+            # Tyle sekund wątek czeka na wolne połączenie, potem błąd zamiast wiszącego żądania
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+            "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", "300")),
+            "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", "3600")),
+            # Health check przy wydawaniu połączenia (SELECT 1 tylko dla połączeń dłużej bezczynnych)
+            "check": ConnectionPool.check_connection,
+        },
+    }
+elif DB_CONNECTION_MODE != "none":
+    raise ImproperlyConfigured(f"Nieznany DB_CONNECTION_MODE: {DB_CONNECTION_MODE}")
+
+# Repliki do odczytu (apps/replicas/router.py), po przecinku: DB_REPLICA_HOSTS (PostgreSQL)
+# albo DB_REPLICA_NAMES (nazwy baz, np. pliki SQLite do testów lokalnych). Aliasy: replica1, replica2...
+DB_REPLICA_HOSTS = [host for host in os.environ.get("DB_REPLICA_HOSTS", "").split(",") if host]
+DB_REPLICA_NAMES = [name for name in os.environ.get("DB_REPLICA_NAMES", "").split(",") if name]
+for _index in range(max(len(DB_REPLICA_HOSTS), len(DB_REPLICA_NAMES))):
+    DATABASES[f"replica{_index + 1}"] = {
+        **DATABASES["default"],
+        **({"HOST": DB_REPLICA_HOSTS[_index]} if _index < len(DB_REPLICA_HOSTS) else {}),
+        **({"NAME": DB_REPLICA_NAMES[_index]} if _index < len(DB_REPLICA_NAMES) else {}),
+        # W testach replika to ta sama baza co "default"
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["apps.replicas.router.ReplicaRouter"]
+REPLICA_ROUTER = {
+    "REPLICAS": [alias for alias in DATABASES if alias != "default"],
+    "STICKY_SECONDS": int(os.environ.get("DB_REPLICA_STICKY_SECONDS", "10")),
+    "COOKIE_NAME": "primary_until",
+    "PRIMARY_APPS": ["sessions"],
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -131,7 +193,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_AUTHENTICATION_CLASSES": ("rest_framework_simplejwt.authentication.JWTAuthentication",),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("apps.users.authentication.CachedJWTAuthentication",),
     #  domyślnie wymagaj logowania wszędzie w API
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
 }
@@ -142,6 +204,10 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'Dokumentacja API do zarządzania projektami',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
+    # Swagger UI z własnych plików statycznych (drf-spectacular-sidecar) zamiast z CDN
+    'SWAGGER_UI_DIST': 'SIDECAR',
+    'SWAGGER_UI_FAVICON_HREF': 'SIDECAR',
+    'REDOC_DIST': 'SIDECAR',
     'COMPONENT_SPLIT_REQUEST': True,
     
     'SECURITY': [{'Bearer': []}], 
@@ -168,7 +234,9 @@ USE_I18N = True
 USE_TZ = True
 
 #EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# E-maile trafiają do kolejki zadań (apps.jobs); SMTP obsługuje `manage.py runworker`
+EMAIL_BACKEND = "apps.jobs.mail.QueuedEmailBackend"
+JOBS_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 DEFAULT_FROM_EMAIL = "noreply@myproject.com"
 SITE_NAME = "DjangoProjekt"
 
@@ -187,19 +255,191 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# Wynik collectstatic; w obrazie Dockera poza katalogiem kodu (docker-compose go montuje)
+STATIC_ROOT = os.environ.get("STATIC_ROOT", BASE_DIR / "staticfiles")
+
 
 # Media files (Uploads)
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    # Załączniki zadań: pliki pod nazwą z SHA-256, deduplikowane między zadaniami
+    "attachments": {
+        "BACKEND": "apps.projects.storage.ContentAddressedStorage",
+    },
+}
+
+# Serwowanie plików statycznych przez WhiteNoise (STATIC_SERVING):
+#   "finders"  - prosto z STATICFILES_DIRS i katalogów aplikacji, bez collectstatic (dev, testy)
+#   "manifest" - collectstatic (przy budowie obrazu) zapisuje nazwy z hashem treści oraz
+#                warianty .gz i .br; pliki z hashem idą z Cache-Control: immutable (10 lat)
+STATIC_SERVING = os.environ.get("STATIC_SERVING", "finders")
+if STATIC_SERVING == "finders":
+    WHITENOISE_USE_FINDERS = True
+    # Bez collectstatic katalog STATIC_ROOT zwykle nie istnieje
+    warnings.filterwarnings("ignore", message="No directory at: ")
+elif STATIC_SERVING == "manifest":
+    STORAGES["staticfiles"]["BACKEND"] = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+    WHITENOISE_USE_FINDERS = False
+    WHITENOISE_AUTOREFRESH = False
+else:
+    raise ImproperlyConfigured(f"Nieznany STATIC_SERVING: {STATIC_SERVING!r} (finders, manifest)")
+
+# Nieużywane pliki załączników młodsze niż ten próg nie są usuwane (sekundy)
+ATTACHMENT_GC_GRACE_SECONDS = int(os.environ.get("ATTACHMENT_GC_GRACE_SECONDS", 3600))
+# Przekazanie wysyłki pliku do serwera WWW: None, "nginx" (X-Accel-Redirect) lub "sendfile" (X-Sendfile)
+ATTACHMENT_SENDFILE = os.environ.get("ATTACHMENT_SENDFILE") or None
+# Wewnętrzna lokalizacja nginx (internal) wskazująca na MEDIA_ROOT
+ATTACHMENT_ACCEL_PREFIX = os.environ.get("ATTACHMENT_ACCEL_PREFIX", "/protected-media/")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Sesje z cache z zapisem do bazy (apps/users/sessions.py), użytkownik sesji z cache (apps/users/backends.py)
+SESSION_ENGINE = "apps.users.sessions"
+SESSION_CACHE_ALIAS = "sessions"
+SESSION_STORE = {
+    # Niezmieniona sesja jest zapisywana najwyżej raz na tyle sekund (np. przy SESSION_SAVE_EVERY_REQUEST)
+    "WRITE_INTERVAL": 300,
+}
+AUTHENTICATION_BACKENDS = ["apps.users.backends.CachedModelBackend"]
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+# Cache członkostwa w zespołach (apps/projects/membership.py)
+TEAM_MEMBERSHIP_CACHE = {
+    "MAX_USERS": 10000,
+    "LOCAL_TTL": 30,
+    # Alias z CACHES współdzielony między procesami, np. "default"; None = tylko lokalne LRU
+    "SHARED_CACHE": os.environ.get("TEAM_MEMBERSHIP_SHARED_CACHE") or None,
+    "SHARED_TTL": 300,
+}
+
+# Użytkownicy uwierzytelniani tokenem JWT w cache (apps/users/authentication.py)
+JWT_USER_CACHE = {
+    "MAX_USERS": 10000,
+    "LOCAL_TTL": 300,
+    "SHARED_CACHE": os.environ.get("JWT_USER_SHARED_CACHE") or None,
+    "SHARED_TTL": 300,
+    "REVOCATION_REFRESH": 5,
+}
+
+# Podsumowanie na dashboardzie, w cache per użytkownik (apps/projects/dashboard.py)
+DASHBOARD = {
+    "CACHE": "default",
+    "TIMEOUT": 300,
+    "TASK_LIMIT": 50,
+}
+
+# Metryki żądań i zapytań SQL, GET /metrics (apps/metrics)
+METRICS = {
+    "ENABLED": os.environ.get("METRICS_ENABLED", "1") == "1",
+    # Przy kilku procesach (gunicorn/uvicorn --workers) każdy zapisuje tu swoją migawkę
+    "DIR": os.environ.get("METRICS_DIR") or None,
+    "FLUSH_INTERVAL": 5,
+    "TOKEN": os.environ.get("METRICS_TOKEN") or None,
+    "SLOW_REQUEST_THRESHOLD": float(os.environ["METRICS_SLOW_REQUEST_THRESHOLD"])
+    if os.environ.get("METRICS_SLOW_REQUEST_THRESHOLD")
+    else None,
+    "SIMILAR_QUERY_THRESHOLD": 5,
+}
+
+# Masowe zakładanie kont przez API (POST /api/users/onboarding/). Limity tak, by import zmieścił się
+# w REQUEST_TIMEOUT: wiersze bez hasła są tanie, a hash PBKDF2 to ~0,5 s CPU na hasło.
+# Większe importy: manage.py onboard_users (bez limitów, hasła w puli procesów).
+USER_ONBOARDING_MAX_ROWS = int(os.environ.get("USER_ONBOARDING_MAX_ROWS", 1000))
+USER_ONBOARDING_MAX_PASSWORDS = int(os.environ.get("USER_ONBOARDING_MAX_PASSWORDS", 40))
+# Hashowanie haseł przy masowym zakładaniu kont (apps/users/passwords.py); WORKERS=None - liczba rdzeni
+PASSWORD_HASHING_POOL = {
+    "WORKERS": int(os.environ["PASSWORD_HASHING_WORKERS"]) if os.environ.get("PASSWORD_HASHING_WORKERS") else None,
+    "CHUNK_SIZE": 50,
+}
+
+# Masowy import zadań (POST /api/projects/{id}/tasks/bulk/)
+TASK_IMPORT_BATCH_SIZE = int(os.environ.get("TASK_IMPORT_BATCH_SIZE", 1000))
+TASK_IMPORT_MAX_ROWS = int(os.environ.get("TASK_IMPORT_MAX_ROWS", 50000))
+
+# Miniatury awatarów generowane w puli procesów (WORKERS=0 - synchronicznie)
+AVATAR_THUMBNAILS = {
+    "SIZES": (32, 64, 256),
+    "FORMATS": ("webp", "jpeg"),
+    "WORKERS": int(os.environ.get("AVATAR_THUMBNAIL_WORKERS", 2)),
+}
+
+# Kolejka zadań w bazie (apps/jobs), workery: `manage.py runworker`
+JOBS = {
+    "PROCESSES": int(os.environ.get("JOBS_PROCESSES", 1)),
+    "THREADS": int(os.environ.get("JOBS_THREADS", 4)),
+    "QUEUES": ["default"],
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF_BASE": 10,
+    "BACKOFF_MAX": 3600,
+    "LOCK_TIMEOUT": 600,
+}
+
+# Zdarzenia tablicy na żywo (SSE, apps/projects/live.py); przy wielu workerach ASGI:
+# LIVE_EVENTS_BACKEND=apps.projects.live.PostgresBackend
+LIVE_EVENTS = {
+    "BACKEND": os.environ.get("LIVE_EVENTS_BACKEND", "apps.projects.live.LocalBackend"),
+    "HEARTBEAT": 15,
+    "QUEUE_SIZE": 100,
+}
+
+# Cache fragmentów HTML tablicy (apps/projects/fragments.py).
+# FRAGMENT_CACHE_BACKEND: "locmem" (per proces), "file" (wspólny dla procesów na jednej maszynie)
+# albo "shared" (Redis pod FRAGMENT_CACHE_LOCATION, wspólny dla wszystkich serwerów).
+FRAGMENT_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "fragments",
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("FRAGMENT_CACHE_LOCATION", os.path.join(BASE_DIR, "cache", "fragments")),
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("FRAGMENT_CACHE_LOCATION", "redis://localhost:6379/1"),
+    },
+}
+# Cache sesji: "locmem" wystarcza przy jednym procesie; przy wielu workerach "shared"
+# (Redis pod SESSION_CACHE_LOCATION, usługa redis w docker-compose), inaczej wylogowanie
+# nie usunie sesji z cache pozostałych. docker-entrypoint.sh nie uruchomi kilku workerów z "locmem".
+SESSION_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "sessions",
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("SESSION_CACHE_LOCATION", "redis://localhost:6379/2"),
+    },
+}
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "fragments": FRAGMENT_CACHE_BACKENDS[os.environ.get("FRAGMENT_CACHE_BACKEND", "locmem")],
+    "sessions": SESSION_CACHE_BACKENDS[os.environ.get("SESSION_CACHE_BACKEND", "locmem")],
+}
+FRAGMENT_CACHE = {
+    "ALIAS": "fragments",
+    "TIMEOUT": 24 * 60 * 60,
+}
@@ -8,26 +8,43 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework.routers import DefaultRouter
 
 # Import widoków API oraz Frontendowych (DashboardView, ProjectListView itd.)
+from apps.metrics.views import metrics
 from apps.projects.views import (
     DashboardView,
+    FragmentCacheStatsView,
     MyTaskListView,
+    ProjectBoardColumnView,
     ProjectCreateView,
     ProjectDeleteView,
     ProjectDetailView,
     ProjectListView,
+    ProjectStatsView,
     ProjectUpdateView,
     ProjectViewSet,
+    SearchAPIView,
+    SearchView,
     TaskCreateView,
     TaskDeleteView,
     TaskDetailView,
+    TaskStatusBulkUpdateView,
     TaskUpdateView,
     TeamAddMemberView,
     TeamCreateView,
     TeamDetailView,
     TeamListView,
+    download_task_attachment,
+    project_events,
+    task_card,
     update_task_status,
 )
-from apps.users.views import MyProfileView, ProfileDetailView, ProfileUpdateView, RegisterView
+from apps.users.views import (
+    MyProfileView,
+    ProfileDetailView,
+    ProfileUpdateView,
+    RegisterView,
+    TokenRevokeView,
+    UserOnboardingView,
+)
 
 router = DefaultRouter()
 router.register(r"projects", ProjectViewSet, basename="api-project")
@@ -35,6 +52,7 @@ router.register(r"projects", ProjectViewSet, basename="api-project")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics, name="metrics"),
 
     # --- FRONTEND: AUTH (Logowanie) ---
     path('accounts/', include('django.contrib.auth.urls')),
@@ -50,6 +68,8 @@ urlpatterns = [
     path('projects/', ProjectListView.as_view(), name='project-list'),
     path('projects/add/', ProjectCreateView.as_view(), name='project-create'),
     path('projects/<int:pk>/', ProjectDetailView.as_view(), name='project-detail'),
+    path('projects/<int:pk>/board/<str:status>/', ProjectBoardColumnView.as_view(), name='project-board-column'),
+    path('projects/<int:pk>/events/', project_events, name='project-events'),
     path('projects/<int:project_id>/add-task/', TaskCreateView.as_view(), name='task-create'),
         
     path('projects/<int:pk>/edit/', ProjectUpdateView.as_view(), name='project-edit'),
@@ -58,8 +78,12 @@ urlpatterns = [
     path('tasks/<int:pk>/edit/', TaskUpdateView.as_view(), name='task-edit'),
     path('tasks/<int:pk>/delete/', TaskDeleteView.as_view(), name='task-delete'),
     path('tasks/<int:pk>/status/<str:status>/', update_task_status, name='task-update-status'),
+    path('tasks/<int:pk>/attachment/', download_task_attachment, name='task-attachment'),
+    path('tasks/<int:pk>/card/', task_card, name='task-card'),
     path('tasks/<int:pk>/', TaskDetailView.as_view(), name='task-detail'),
 
+    path('search/', SearchView.as_view(), name='search'),
+
     path('teams/', TeamListView.as_view(), name='team-list'),
     path('teams/add/', TeamCreateView.as_view(), name='team-create'),
     path('teams/<int:pk>/', TeamDetailView.as_view(), name='team-detail'),
@@ -73,9 +97,15 @@ urlpatterns = [
     
     path("api/auth/", include("djoser.urls")),
     path("api/auth/", include("djoser.urls.jwt")),
+    path("api/auth/jwt/revoke/", TokenRevokeView.as_view(), name="jwt-revoke"),
     
     path("api/my-profile/", MyProfileView.as_view(), name="api_my_profile"),
+    path("api/users/onboarding/", UserOnboardingView.as_view(), name="api_users_onboarding"),
     path("api/my-tasks/", MyTaskListView.as_view(), name="api_my_tasks"),
+    path("api/tasks/status/", TaskStatusBulkUpdateView.as_view(), name="api_tasks_status"),
+    path("api/search/", SearchAPIView.as_view(), name="api_search"),
+    path("api/fragments/stats/", FragmentCacheStatsView.as_view(), name="api_fragment_stats"),
+    path("api/projects/<int:pk>/stats/", ProjectStatsView.as_view(), name="api-project-stats"),
     
     # Router API na końcu
     path("api/", include(router.urls)),
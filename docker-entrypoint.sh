@@ -0,0 +1,87 @@
+#!/bin/sh
+# Start kontenera. Z argumentami uruchamia je (np. `python3 manage.py migrate` z manage.sh),
+# bez argumentów - serwer aplikacji wybrany przez SERVER_MODE:
+#   asgi (domyślnie) - uvicorn; widoki async nie zajmują wątku na czas zapytań
+#   wsgi             - gunicorn z wątkami (gthread)
+#   dev              - manage.py runserver z przeładowaniem kodu (docker-compose)
+#   worker           - manage.py runworker: kolejka zadań (apps.jobs), w tym wysyłka e-maili;
+#                      bez niego EMAIL_BACKEND (QueuedEmailBackend) tylko kolejkuje wiadomości
+#
+# PORT              port (8000)
+# WEB_CONCURRENCY   liczba procesów (asgi: liczba CPU, wsgi: 2 * CPU + 1);
+#                   każdy ma własną pulę połączeń z bazą (DB_POOL_MAX_SIZE); przy więcej niż
+#                   jednym wymagany SESSION_CACHE_BACKEND=shared (Redis pod SESSION_CACHE_LOCATION)
+# GUNICORN_THREADS  wątki na proces w trybie wsgi (4)
+# REQUEST_TIMEOUT   po tylu sekundach gunicorn restartuje zawieszony proces (30)
+# KEEP_ALIVE        sekundy bezczynnego połączenia keep-alive (5)
+# MAX_REQUESTS      restart procesu po tylu żądaniach (domyślnie bez restartów)
+# FORWARDED_ALLOW_IPS  adresy proxy, którym wierzymy w X-Forwarded-* (127.0.0.1)
+# METRICS_DIR       migawki metryk procesów serwera (/tmp/metrics), czyszczone przy starcie
+# JOBS_PROCESSES, JOBS_THREADS  procesy i wątki workera kolejki (1 i 4)
+# DJANGO_MIGRATE=1  migracje przed startem serwera
+set -e
+
+if [ "$#" -gt 0 ]; then
+    exec "$@"
+fi
+
+if [ "${DJANGO_MIGRATE:-0}" = "1" ]; then
+    python manage.py migrate --noinput
+fi
+
+PORT="${PORT:-8000}"
+CPUS="$(nproc)"
+SERVER_MODE="${SERVER_MODE:-asgi}"
+
+if [ "$SERVER_MODE" = "asgi" ] || [ "$SERVER_MODE" = "wsgi" ]; then
+    # Kilka procesów - /metrics sumuje ich migawki z wspólnego katalogu (apps/metrics).
+    # Pliki z poprzedniego uruchomienia kontenera usuwamy, żeby nie liczyć martwych procesów.
+    export METRICS_DIR="${METRICS_DIR:-/tmp/metrics}"
+    mkdir -p "$METRICS_DIR"
+    rm -f "$METRICS_DIR"/metrics-*
+
+    if [ "$SERVER_MODE" = "asgi" ]; then
+        WEB_CONCURRENCY="${WEB_CONCURRENCY:-$CPUS}"
+    else
+        WEB_CONCURRENCY="${WEB_CONCURRENCY:-$((CPUS * 2 + 1))}"
+    fi
+    # Sesje w locmem są per proces: wylogowanie w jednym workerze nie usunęłoby ich z pozostałych
+    if [ "$WEB_CONCURRENCY" -gt 1 ] && [ "${SESSION_CACHE_BACKEND:-locmem}" = "locmem" ]; then
+        echo "WEB_CONCURRENCY=$WEB_CONCURRENCY wymaga wspólnego cache sesji:" \
+            "SESSION_CACHE_BACKEND=shared i SESSION_CACHE_LOCATION (Redis) albo WEB_CONCURRENCY=1" >&2
+        exit 1
+    fi
+fi
+
+case "$SERVER_MODE" in
+    asgi)
+        exec uvicorn config.asgi:application \
+            --host 0.0.0.0 --port "$PORT" \
+            --workers "$WEB_CONCURRENCY" \
+            --timeout-keep-alive "${KEEP_ALIVE:-5}" \
+            ${MAX_REQUESTS:+--limit-max-requests "$MAX_REQUESTS" --limit-max-requests-jitter "$((MAX_REQUESTS / 10))"} \
+            --proxy-headers --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-127.0.0.1}" \
+            --lifespan off --no-server-header
+        ;;
+    wsgi)
+        exec gunicorn config.wsgi:application \
+            --bind "0.0.0.0:$PORT" \
+            --workers "$WEB_CONCURRENCY" \
+            --worker-class gthread --threads "${GUNICORN_THREADS:-4}" \
+            --timeout "${REQUEST_TIMEOUT:-30}" \
+            --keep-alive "${KEEP_ALIVE:-5}" \
+            ${MAX_REQUESTS:+--max-requests "$MAX_REQUESTS" --max-requests-jitter "$((MAX_REQUESTS / 10))"} \
+            --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-127.0.0.1}" \
+            --access-logfile -
+        ;;
+    dev)
+        exec python manage.py runserver "0.0.0.0:$PORT"
+        ;;
+    worker)
+        exec python manage.py runworker
+        ;;
+    *)
+        echo "Nieznany SERVER_MODE: $SERVER_MODE (asgi, wsgi, dev, worker)" >&2
+        exit 1
+        ;;
+esac